@@ -40,6 +40,7 @@
 
   scripts.gomod-graph.exec = ''
   go mod graph > go_mod_graph.txt
+  python3 gomodgraph.compile.py go_mod_graph.txt
   '';
 
   scripts.component_diagram.exec =''
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+This script compiles a go-mod dependency graph file into the binary graph cache used by the
+gomodgraph scripts. The cache holds the interned module names, the CSR edge arrays and the
+precomputed safe IDs, and is written next to the input as "<input>.graphcache".
+It is validated against the SHA-256 hash of the input file, so later runs of any renderer
+memory-map it instead of re-parsing the text file.
+
+The renderers build the cache on their own when it is missing or stale; this script is useful
+to prepare it up front (e.g. right after "go mod graph > go_mod_graph.txt").
+
+Usage:
+    python3 gomodgraph.compile.py go_mod_graph.txt [--force]
+"""
+
+import sys
+import time
+import argparse
+from gomodgraph_core import build_graph, cache_path, file_digest, read_graph_cache, write_graph_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compile a go-mod dependency graph into a memory-mappable binary cache."
+    )
+    parser.add_argument("input", help="Input file containing go mod graph output")
+    parser.add_argument("--force", action="store_true", help="Rebuild the cache even if it is up to date")
+    args = parser.parse_args()
+
+    output = cache_path(args.input)
+    try:
+        digest = file_digest(args.input)
+    except OSError as e:
+        sys.stderr.write(f"Error reading file {args.input}: {e}\n")
+        sys.exit(1)
+
+    if not args.force and read_graph_cache(output, digest) is not None:
+        print(f"Graph cache is up to date: {output}")
+        return
+
+    start = time.perf_counter()
+    graph = build_graph(args.input)
+    try:
+        write_graph_cache(graph, output, digest)
+    except OSError as e:
+        sys.stderr.write(f"Error writing graph cache {output}: {e}\n")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+    print(f"Graph cache saved: {output} ({graph.num_nodes} modules, {graph.num_edges} edges, {elapsed:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+This script keeps a go-mod dependency graph loaded in a resident daemon and answers JSON
+queries over a local Unix socket, so editor tooling and scripts that ask many small questions
+in a row do not reload and re-filter the graph every time.
+
+The daemon loads the graph once (through the binary graph cache), builds the reachability
+index (see gomodgraph_index.py) up front and memoizes the masks of recently used filters.
+It polls the input file and reloads everything when it changes. Clients are served
+concurrently with asyncio: queries, filters and materialization run in worker threads and
+renders in a separate process pool, so a heavy request never blocks the other clients.
+
+Protocol: one JSON object per line in, one JSON object per line out. Every request has an
+"op" and may carry the usual filter options ("packages", "hide_packages", "max_depth",
+"remove_isolated", "transitive_reduction", "condense", "cluster"):
+    {"op": "ping"}
+    {"op": "stats"}
+    {"op": "subgraph", "packages": ["github.com/containers"], "max_depth": 2}
+    {"op": "depths", "packages": ["*"], "min_depth": 1, "max_depth": 1}
+    {"op": "dependents" | "dependencies" | "why", "modules": ["golang.org/x/sys"], "from": null}
+    {"op": "render", "format": "png" | "svg" | "html" | "puml" | "mermaid", "output": "out.png", "show_version": false}
+    {"op": "reload"}
+Responses are {"ok": true, "result": ...} or {"ok": false, "error": "..."}. Render outputs are
+written relative to the daemon's working directory; the result is the absolute path.
+
+Usage:
+    python3 gomodgraph.daemon.py serve go_mod_graph.txt [--socket PATH] [--mvs] [--poll SECONDS]
+    python3 gomodgraph.daemon.py request [--socket PATH] JSON
+Example:
+    python3 gomodgraph.daemon.py serve go_mod_graph.txt &
+    python3 gomodgraph.daemon.py request '{"op": "why", "modules": ["golang.org/x/sys"]}'
+"""
+
+import os
+import sys
+import json
+import socket
+import asyncio
+import threading
+import argparse
+from functools import partial
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from gomodgraph_core import import_script, load_graph, minimal_version_selection, compute_depths, FilterPipeline
+from gomodgraph_index import ReachabilityIndex
+
+DEFAULT_SOCKET = "go_mod_graph.txt.sock"
+
+# Number of filter results kept per loaded graph.
+FILTER_CACHE_SIZE = 32
+
+FILTER_KEYS = ("packages", "hide_packages", "max_depth", "remove_isolated", "transitive_reduction",
+               "condense", "cluster", "cluster_resolution", "expand_cluster")
+
+
+class GraphState:
+    """The loaded graph of one input file version, with its index and memoized filters."""
+
+    def __init__(self, input_file, mvs=False):
+        self.input_file = input_file
+        self.mtime = os.stat(input_file).st_mtime_ns
+        graph = load_graph(input_file)
+        if mvs:
+            graph, _ = minimal_version_selection(graph)
+        self.graph = graph
+        self.index = ReachabilityIndex(graph)
+        self.pipelines = OrderedDict()
+        self.pipelines_lock = threading.Lock()
+
+    def pipeline(self, request):
+        """
+        Returns the (memoized) FilterPipeline for the filter options of a request. Safe to call
+        from several threads; the masks are computed outside the lock.
+        """
+        options = {key: request[key] for key in FILTER_KEYS if request.get(key) not in (None, False, [])}
+        key = json.dumps(options, sort_keys=True)
+        with self.pipelines_lock:
+            if key in self.pipelines:
+                self.pipelines.move_to_end(key)
+                return self.pipelines[key]
+
+        package_list = options.get("packages") or ["*"]
+        allow_all = ("*" in package_list)
+        pipeline = FilterPipeline(self.graph).packages(package_list, options.get("hide_packages", ()), allow_all=allow_all)
+        if "max_depth" in options:
+            pipeline.max_depth(int(options["max_depth"]))
+        if options.get("remove_isolated"):
+            pipeline.remove_isolated()
+        if options.get("transitive_reduction"):
+            pipeline.transitive_reduction()
+        if options.get("condense"):
+            pipeline.condense()
+        if options.get("cluster"):
+            pipeline.cluster(float(options.get("cluster_resolution", 1.0)), options.get("expand_cluster", ()))
+        pipeline.masks()
+        with self.pipelines_lock:
+            self.pipelines[key] = pipeline
+            if len(self.pipelines) > FILTER_CACHE_SIZE:
+                self.pipelines.popitem(last=False)
+        return pipeline
+
+
+def subgraph_result(pipeline):
+    G = pipeline.materialize()
+    return {"nodes": list(G.nodes()), "edges": [[u, v] for u, v in G.edges()]}
+
+
+def depths_result(state, pipeline, request):
+    node_mask, edge_mask = pipeline.masks()
+    depths = compute_depths(state.graph, node_mask, edge_mask)
+    min_depth = int(request.get("min_depth", 0))
+    max_depth = request.get("max_depth")
+    selected = (depths >= min_depth) & node_mask
+    if max_depth is not None:
+        selected &= depths <= int(max_depth)
+    return [{"module": state.graph.names[n], "depth": int(depths[n])} for n in np.flatnonzero(selected).tolist()]
+
+
+def query_result(state, request):
+    query_script = import_script("gomodgraph.query.py")
+    root = 0
+    if request.get("from"):
+        roots = state.graph.find(request["from"])
+        if not roots:
+            raise ValueError(f"start module not found: {request['from']}")
+        root = roots[0]
+    return [query_script.run_query(state.graph, state.index, request["op"], module, root)
+            for module in request.get("modules", [])]
+
+
+def render_job(output_format, G, output, package_prefix, show_version):
+    """
+    Runs in a worker process: renders G with the matching gomodgraph.render.py emitter. The
+    render pool already uses every CPU, so the layout runs in this process only.
+    """
+    render = import_script("gomodgraph.render.py")
+    if output_format in ("png", "svg"):
+        render.emit_image(G, [output], package_prefix, show_version, layout_jobs=1)
+    elif output_format == "html":
+        render.emit_html(G, output, package_prefix, show_version, layout_jobs=1)
+    elif output_format == "puml":
+        render.emit_plantuml(G, output, package_prefix, show_version)
+    elif output_format == "mermaid":
+        render.emit_mermaid(G, output, package_prefix, show_version)
+    return os.path.abspath(output)
+
+
+class Daemon:
+    def __init__(self, input_file, mvs=False, poll_interval=1.0):
+        self.input_file = input_file
+        self.mvs = mvs
+        self.poll_interval = poll_interval
+        self.state = GraphState(input_file, mvs)
+        self.renderer = None
+
+    async def reload(self):
+        # Load the new version off the event loop; requests keep using the old state meanwhile.
+        self.state = await asyncio.to_thread(GraphState, self.input_file, self.mvs)
+        print(f"Graph reloaded: {self.input_file} ({self.state.graph.num_nodes} modules)")
+
+    async def watch(self):
+        """Reloads the graph whenever the input file's modification time changes."""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                changed = os.stat(self.input_file).st_mtime_ns != self.state.mtime
+                if changed:
+                    await self.reload()
+            except Exception as e:
+                sys.stderr.write(f"Error reloading {self.input_file}: {e}\n")
+
+    async def handle(self, request):
+        op = request.get("op")
+        state = self.state
+        if op == "ping":
+            return "pong"
+        if op == "stats":
+            return {"input": state.input_file, "modules": state.graph.num_nodes, "edges": state.graph.num_edges,
+                    "components": state.index.num_components, "cached_filters": len(state.pipelines)}
+        if op == "reload":
+            await self.reload()
+            return {"modules": self.state.graph.num_nodes}
+        # Everything below can take a while on a large graph: run it off the event loop.
+        if op in ("dependents", "dependencies", "why"):
+            return await asyncio.to_thread(query_result, state, request)
+        if op == "subgraph":
+            pipeline = await asyncio.to_thread(state.pipeline, request)
+            return await asyncio.to_thread(subgraph_result, pipeline)
+        if op == "depths":
+            pipeline = await asyncio.to_thread(state.pipeline, request)
+            return await asyncio.to_thread(depths_result, state, pipeline, request)
+        if op == "render":
+            output_format = request.get("format")
+            if output_format not in ("png", "svg", "html", "puml", "mermaid") or not request.get("output"):
+                raise ValueError("render needs a format (png, svg, html, puml or mermaid) and an output")
+            pipeline = await asyncio.to_thread(state.pipeline, request)
+            G = await asyncio.to_thread(pipeline.materialize)
+            packages = request.get("packages") or ["*"]
+            package_prefix = packages[0] if "*" not in packages else ""
+            if self.renderer is None:
+                self.renderer = ProcessPoolExecutor()
+            job = partial(render_job, output_format, G, request["output"], package_prefix,
+                          bool(request.get("show_version")))
+            return await asyncio.get_running_loop().run_in_executor(self.renderer, job)
+        raise ValueError(f"unknown op: {op}")
+
+    async def serve_client(self, reader, writer):
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                request = json.loads(line)
+                response = {"ok": True, "result": await self.handle(request)}
+            except Exception as e:
+                response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            writer.write(json.dumps(response).encode("utf-8") + b"\n")
+            await writer.drain()
+        writer.close()
+
+    async def serve(self, socket_path):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = await asyncio.start_unix_server(self.serve_client, path=socket_path, limit=1 << 24)
+        watcher = asyncio.create_task(self.watch())
+        print(f"Serving {self.input_file} ({self.state.graph.num_nodes} modules) on {socket_path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+            if self.renderer is not None:
+                self.renderer.shutdown()
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+
+def send_request(socket_path, request):
+    """Sends one request to a running daemon and returns the decoded response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            return json.loads(f.readline())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve go-mod dependency graph queries from a resident daemon over a Unix socket."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="Load the graph and serve requests")
+    serve.add_argument("input", help="Input file containing go mod graph output")
+    serve.add_argument("--socket", default=None, help="Unix socket path (default: <input>.sock)")
+    serve.add_argument("--mvs", action="store_true", help="Serve the versions selected by Go's Minimal Version Selection")
+    serve.add_argument("--poll", type=float, default=1.0, help="Seconds between checks for a changed input file (default: 1)")
+    request = commands.add_parser("request", help="Send one JSON request to a running daemon and print the response")
+    request.add_argument("request", help="JSON request, e.g. '{\"op\": \"stats\"}'")
+    request.add_argument("--socket", default=DEFAULT_SOCKET, help=f"Unix socket path (default: {DEFAULT_SOCKET})")
+    args = parser.parse_args()
+
+    if args.command == "request":
+        try:
+            response = send_request(args.socket, json.loads(args.request))
+        except (OSError, ValueError) as e:
+            sys.stderr.write(f"Error sending request to {args.socket}: {e}\n")
+            sys.exit(1)
+        print(json.dumps(response, indent=2))
+        if not response.get("ok"):
+            sys.exit(1)
+        return
+
+    try:
+        daemon = Daemon(args.input, mvs=args.mvs, poll_interval=args.poll)
+    except Exception as e:
+        sys.stderr.write(f"Error reading file {args.input}: {e}\n")
+        sys.exit(1)
+    try:
+        asyncio.run(daemon.serve(args.socket or f"{args.input}.sock"))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
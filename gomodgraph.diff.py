@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+This script compares two go-mod dependency graph files (e.g. go mod graph output before and
+after a dependency upgrade) and reports the added, removed, upgraded and downgraded modules
+and the added and removed requirement edges, joined on the module path (see gomodgraph_diff.py).
+
+Optionally the changes are drawn as a delta diagram in any of the existing output formats:
+changed modules and edges are highlighted (added green, removed red, upgraded orange,
+downgraded purple) and unchanged edges between them are kept in gray as context. The
+--packages / --hide-packages filters apply to the delta diagram.
+
+Usage:
+    python3 gomodgraph.diff.py old_graph.txt new_graph.txt [--mvs] [--json] [--packages ...] [--hide-packages ...] [--no-context] [--show-version] [--png out.png] [--svg out.svg] [--html out.html] [--puml out.puml] [--mermaid out.mmd]
+Example:
+    python3 gomodgraph.diff.py go_mod_graph.old.txt go_mod_graph.txt --mvs --mermaid gomod_diff.md
+    git show main:go_mod_graph.txt | python3 gomodgraph.diff.py - go_mod_graph.txt --html gomod_diff.html
+"""
+
+import os
+import sys
+import json
+import argparse
+
+# Never open a plot window.
+os.environ["MPLBACKEND"] = "Agg"
+
+from gomodgraph_core import import_script, load_graph, minimal_version_selection, FilterPipeline
+from gomodgraph_diff import DIFF_COLORS, GraphDiff
+
+PALETTE = ["green", "red", "orange", "purple", "brown", "olive", "teal", "maroon"]
+
+
+def load_snapshot(input_file, use_cache, mvs):
+    try:
+        graph = load_graph(input_file, use_cache=use_cache)
+    except Exception as e:
+        sys.stderr.write(f"Error reading file {input_file}: {e}\n")
+        sys.exit(1)
+    if mvs and graph.num_nodes:
+        graph, _ = minimal_version_selection(graph)
+    return graph
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare two go-mod dependency graphs and report or draw the added, removed and upgraded modules and edges."
+    )
+    parser.add_argument("old", help="Old go mod graph output ('-' to read it from stdin)")
+    parser.add_argument("new", help="New go mod graph output ('-' to read it from stdin)")
+    parser.add_argument("--mvs", action="store_true", help="Compare the versions selected by Go's Minimal Version Selection instead of the full graphs")
+    parser.add_argument("--json", action="store_true", help="Print the diff as JSON")
+    parser.add_argument(
+        "--packages",
+        nargs="*",
+        default=[],
+        help="Allowed package prefixes for the delta diagram, matched per path segment; globs and 're:' regexes are supported. Use '*' to allow all."
+    )
+    parser.add_argument(
+        "--hide-packages",
+        nargs="*",
+        default=[],
+        help="Package prefixes to hide from the delta diagram. Same syntax as --packages."
+    )
+    parser.add_argument("--no-context", action="store_true", help="Only draw changed edges, not the unchanged edges between changed modules")
+    parser.add_argument("--show-version", action="store_true", help="Display version text on nodes/edges of the delta diagram")
+    parser.add_argument("--no-cache", action="store_true", help="Re-parse the inputs instead of using the binary graph caches next to them")
+    parser.add_argument("--png", help="Output PNG filename for the delta diagram")
+    parser.add_argument("--svg", help="Output SVG filename for the delta diagram")
+    parser.add_argument("--html", help="Output pyvis HTML filename for the delta diagram")
+    parser.add_argument("--puml", help="Output PlantUML filename for the delta diagram")
+    parser.add_argument("--mermaid", help="Output Mermaid filename for the delta diagram (.mmd, or .md for a fenced block)")
+    args = parser.parse_args()
+    if args.old == "-" and args.new == "-":
+        parser.error("only one of the inputs can be read from stdin")
+
+    old_graph = load_snapshot(args.old, not args.no_cache, args.mvs)
+    new_graph = load_snapshot(args.new, not args.no_cache, args.mvs)
+    diff = GraphDiff(old_graph, new_graph)
+
+    if args.json:
+        print(json.dumps(diff.to_dict(), indent=2))
+    else:
+        print(diff.summary())
+
+    images = [f for f in (args.png, args.svg) if f]
+    if not (images or args.html or args.puml or args.mermaid):
+        return
+
+    delta, node_status, edge_status = diff.delta_graph(context=not args.no_context)
+    package_list = args.packages if args.packages else ["*"]
+    allow_all = ("*" in package_list)
+    package_prefix = package_list[0] if not allow_all else ""
+    G_delta = FilterPipeline(delta).packages(package_list, args.hide_packages, allow_all=allow_all).materialize()
+    node_colors = {node: DIFF_COLORS[status] for node, status in node_status.items()}
+    edge_colors = {edge: DIFF_COLORS[status] for edge, status in edge_status.items()}
+
+    if images:
+        module = import_script("gomodgraph.networkx.py")
+        module.draw_and_save_graph(G_delta, package_prefix, PALETTE, images, args.show_version, show=False,
+                                   node_colors=node_colors, edge_colors=edge_colors)
+    if args.html:
+        module = import_script("gomodgraph.pyvis.py")
+        module.draw_and_save_graph_pyvis(G_delta, package_prefix, PALETTE, args.html, args.show_version, open_browser=False,
+                                         node_colors=node_colors, edge_colors=edge_colors)
+    try:
+        if args.puml:
+            module = import_script("gomodgraph.plantuml.py")
+            module.draw_and_save_graph_plantuml(G_delta, package_prefix, args.puml, args.show_version,
+                                                node_colors=node_colors, edge_colors=edge_colors)
+        if args.mermaid:
+            module = import_script("gomodgraph.mermaid.py")
+            module.draw_and_save_graph_mermaid(G_delta, args.mermaid, args.show_version,
+                                               node_colors=node_colors, edge_colors=edge_colors)
+    except OSError as e:
+        sys.stderr.write(f"Error writing {e.filename}: {e}\n")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
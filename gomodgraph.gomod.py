@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+This script builds the module graph of a Go module straight from its go.mod, go.sum,
+vendor/modules.txt and the go.mod files in the module cache, without a Go toolchain or
+network access (see gomodgraph_gomod.py), and writes it in `go mod graph` format. That
+output can be used as go_mod_graph.txt by all other gomodgraph scripts; they also accept the
+module directory itself as input.
+
+Usage:
+    python3 gomodgraph.gomod.py MODULE_DIR [--output go_mod_graph.txt] [--mod-cache DIR] [--no-verify] [--direct-only] [--report]
+Example:
+    python3 gomodgraph.gomod.py ../podman --output go_mod_graph.txt --report
+"""
+
+import sys
+import argparse
+from gomodgraph_gomod import build_go_module_graph
+
+
+def print_report(graph, report):
+    """Prints a summary of the directives applied and the go.mod files that were not found."""
+    indirect = int(graph.indirect.sum()) if graph.indirect is not None else 0
+    print(f"{report['main']}: {graph.num_nodes} modules, {graph.num_edges} requirements ({indirect} indirect)",
+          file=sys.stderr)
+    for key, title in (("replaced", "replaced"), ("excluded", "excluded requirements"),
+                       ("mismatched", "go.mod files not matching go.sum"),
+                       ("invalid", "go.mod files that could not be parsed"),
+                       ("missing", "module versions without go.mod")):
+        if report[key]:
+            print(f"  {len(report[key])} {title}", file=sys.stderr)
+    if report["vendored"]:
+        print(f"  {report['vendored']} modules in vendor/modules.txt", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build a go mod graph from go.mod, go.sum and vendor/modules.txt without the Go toolchain."
+    )
+    parser.add_argument("module", help="Go module directory (or its go.mod or vendor/modules.txt)")
+    parser.add_argument("--output", default=None, help="Output file (default: standard output)")
+    parser.add_argument("--mod-cache", default=None, help="Module cache directory (default: $GOMODCACHE, $GOPATH/pkg/mod or ~/go/pkg/mod)")
+    parser.add_argument("--no-verify", action="store_true", help="Use cached go.mod files even if they do not match go.sum")
+    parser.add_argument("--direct-only", action="store_true", help="Leave out '// indirect' requirements")
+    parser.add_argument("--report", action="store_true", help="Print a summary of replace/exclude directives and missing go.mod files to stderr")
+    args = parser.parse_args()
+
+    try:
+        graph, report = build_go_module_graph(args.module, mod_cache=args.mod_cache, verify=not args.no_verify)
+    except (OSError, ValueError) as e:
+        sys.stderr.write(f"Error reading module {args.module}: {e}\n")
+        sys.exit(1)
+
+    names = graph.names
+    lines = [f"{names[u]} {names[v]}\n"
+             for u, v, indirect in zip(graph.sources.tolist(), graph.targets.tolist(), graph.indirect.tolist())
+             if not (args.direct_only and indirect)]
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        print(f"Module graph saved: {args.output}")
+    else:
+        sys.stdout.writelines(lines)
+    if args.report:
+        print_report(graph, report)
+
+
+if __name__ == "__main__":
+    main()
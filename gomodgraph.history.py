@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+This script records how a Go module's dependency graph changed over its git history and
+answers questions about it, without checking anything out (see gomodgraph_history.py).
+
+Commands:
+    build     scan the first-parent history of a revision into a delta-compressed history
+              file (an existing file is updated incrementally)
+    stats     node/edge counts, depth and added/removed modules per revision, as a table,
+              CSV and/or a PNG chart
+    at        the graph at a commit in `go mod graph` format, for the other gomodgraph scripts
+    appeared  the commit in which modules (all versions of a module path, or one
+              module@version) first appeared
+
+Usage:
+    python3 gomodgraph.history.py build REPO [--output podman.graphhist] [--rev HEAD] [--subdir DIR] [--use-mod-cache]
+    python3 gomodgraph.history.py stats podman.graphhist [--csv history.csv] [--plot history.png]
+    python3 gomodgraph.history.py at podman.graphhist COMMIT [--repo REPO] [--output go_mod_graph.txt]
+    python3 gomodgraph.history.py appeared podman.graphhist MODULE [MODULE ...]
+Example:
+    python3 gomodgraph.history.py build ../podman --rev main --output podman.graphhist
+    python3 gomodgraph.history.py appeared podman.graphhist github.com/containers/image/v5
+    python3 gomodgraph.history.py at podman.graphhist v4.0.0 --repo ../podman --output go_mod_graph_v4.txt
+"""
+
+import os
+import csv
+import sys
+import time
+import argparse
+import subprocess
+from gomodgraph_history import GraphHistory, build_history, git
+
+
+def format_time(timestamp):
+    return time.strftime("%Y-%m-%d", time.gmtime(timestamp))
+
+
+def load_history(filename):
+    try:
+        return GraphHistory.load(filename)
+    except (OSError, ValueError, KeyError) as e:
+        sys.stderr.write(f"Error reading history file {filename}: {e}\n")
+        sys.exit(1)
+
+
+def stats_rows(history):
+    rows = []
+    for i, (nodes, edges, depth) in enumerate(history.stats):
+        added, removed = history.node_changes(i)
+        rows.append({"commit": history.commits[i], "date": format_time(history.times[i]), "nodes": nodes,
+                     "edges": edges, "depth": depth, "added": len(added), "removed": len(removed)})
+    return rows
+
+
+def plot_stats(rows, output_filename):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from datetime import datetime
+
+    dates = [datetime.strptime(row["date"], "%Y-%m-%d") for row in rows]
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.step(dates, [row["nodes"] for row in rows], where="post", label="modules")
+    ax.step(dates, [row["edges"] for row in rows], where="post", label="requirements")
+    ax.set_ylabel("count")
+    depth_ax = ax.twinx()
+    depth_ax.step(dates, [row["depth"] for row in rows], where="post", color="gray", alpha=0.6, label="depth")
+    depth_ax.set_ylabel("depth")
+    ax.legend(loc="upper left")
+    ax.set_title("Dependency graph history")
+    fig.tight_layout()
+    fig.savefig(output_filename)
+    plt.close(fig)
+    print(f"History chart saved: {output_filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Record and query the dependency graph history of a Go module from its git objects."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Scan the history into a history file")
+    build.add_argument("repo", help="Git repository of the Go module")
+    build.add_argument("--output", default="go_mod_graph.graphhist", help="History file (updated if it exists)")
+    build.add_argument("--rev", default="HEAD", help="Revision whose first-parent history is scanned (default: HEAD)")
+    build.add_argument("--subdir", default="", help="Directory of go.mod inside the repository (default: top level)")
+    build.add_argument("--use-mod-cache", action="store_true", help="Follow dependency go.mod files in the local module cache (adds depth)")
+    build.add_argument("--mod-cache", default=None, help="Module cache directory for --use-mod-cache")
+    stats = commands.add_parser("stats", help="Print node/edge counts and depth per revision")
+    stats.add_argument("history", help="History file")
+    stats.add_argument("--csv", default=None, help="Write the table as CSV")
+    stats.add_argument("--plot", default=None, help="Write a chart of the counts over time (PNG/SVG)")
+    at = commands.add_parser("at", help="Print the graph at a commit in go mod graph format")
+    at.add_argument("history", help="History file")
+    at.add_argument("commit", help="Commit hash (prefix), or any revision with --repo")
+    at.add_argument("--repo", default=None, help="Repository to resolve revisions that did not change the graph")
+    at.add_argument("--output", default=None, help="Output file (default: standard output)")
+    appeared = commands.add_parser("appeared", help="Print when modules first appeared")
+    appeared.add_argument("history", help="History file")
+    appeared.add_argument("modules", nargs="+", help="Module paths or module@version names")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        history = None
+        if os.path.exists(args.output):
+            try:
+                history = GraphHistory.load(args.output)
+            except (OSError, ValueError, KeyError) as e:
+                sys.stderr.write(f"Warning: cannot read history file {args.output} ({e}), rebuilding it\n")
+        previous = len(history) if history is not None else 0
+        start = time.perf_counter()
+        try:
+            history = build_history(args.repo, args.rev, args.subdir, history, mod_cache=args.mod_cache,
+                                    use_mod_cache=args.use_mod_cache)
+        except (OSError, subprocess.CalledProcessError) as e:
+            sys.stderr.write(f"Error reading repository {args.repo}: {e}\n")
+            sys.exit(1)
+        history.save(args.output)
+        print(f"{len(history)} revisions ({len(history) - previous} new), {len(history.names)} module versions "
+              f"in {time.perf_counter() - start:.2f}s")
+        print(f"History saved: {args.output}")
+        return
+
+    history = load_history(args.history)
+
+    if args.command == "stats":
+        rows = stats_rows(history)
+        print(f"{'date':<10}  {'commit':<10}  {'nodes':>6}  {'edges':>6}  {'depth':>5}  {'added':>5}  {'removed':>7}")
+        for row in rows:
+            print(f"{row['date']:<10}  {row['commit'][:10]:<10}  {row['nodes']:>6}  {row['edges']:>6}  "
+                  f"{row['depth']:>5}  {row['added']:>5}  {row['removed']:>7}")
+        if args.csv:
+            with open(args.csv, "w", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["commit"])
+                writer.writeheader()
+                writer.writerows(rows)
+            print(f"History table saved: {args.csv}")
+        if args.plot and rows:
+            plot_stats(rows, args.plot)
+
+    elif args.command == "at":
+        revision = history.find(args.commit)
+        if revision is None and args.repo:
+            # The last commit at or before the requested one that changed the graph files.
+            paths = [os.path.join(history.subdir, "go.mod"), os.path.join(history.subdir, "vendor", "modules.txt")]
+            try:
+                for sha in git(args.repo, "log", "--first-parent", "--format=%H", args.commit, "--", *paths).split():
+                    revision = history.find(sha)
+                    if revision is not None:
+                        break
+            except subprocess.CalledProcessError as e:
+                sys.stderr.write(f"Error resolving {args.commit}: {e.stderr.strip()}\n")
+                sys.exit(1)
+        if revision is None:
+            sys.stderr.write(f"Commit not found in history: {args.commit}\n")
+            sys.exit(1)
+        graph = history.graph_at(revision)
+        names = graph.names
+        lines = [f"{names[u]} {names[v]}\n" for u, v in zip(graph.sources.tolist(), graph.targets.tolist())]
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.writelines(lines)
+            print(f"Graph at {history.commits[revision][:10]} ({format_time(history.times[revision])}) saved: {args.output}")
+        else:
+            sys.stdout.writelines(lines)
+
+    elif args.command == "appeared":
+        for spec in args.modules:
+            found = history.appeared(spec)
+            if not found:
+                print(f"{spec}: never appeared")
+                continue
+            name, revision = found[0]
+            print(f"{spec}: {format_time(history.times[revision])} {history.commits[revision][:10]} ({name})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+This script reads a go-mod dependency graph file, filters it by allowed package prefixes,
+optionally hides packages matching specified prefixes, restricts maximum dependency depth,
+removes isolated nodes, and outputs the filtered dependency graph as a Mermaid flowchart
+(based on unused/mermaid_modgraph.py). If the output file ends in ".md", the diagram is
+wrapped in a ```mermaid fence so it renders directly on GitHub.
+
+Usage:
+    python3 gomodgraph.mermaid.py go_mod_graph.txt output.mmd --packages github.com/containers [--hide-packages github.com/containers/vendor ...] [--remove-isolated] [--max-depth=N] [--show-version]
+Example:
+    python3 gomodgraph.mermaid.py go_mod_graph.txt gomod_graph.md --packages github.com/containers --remove-isolated --max-depth=3
+"""
+
+import sys
+import argparse
+from gomodgraph_core import (load_graph, module_path, module_version, safe_id, minimal_version_selection,
+                             print_version_report, FilterPipeline)
+
+
+def draw_and_save_graph_mermaid(G, output_filename: str, show_version, node_colors=None, edge_colors=None):
+    """
+    Writes the dependency graph as a Mermaid "graph LR" flowchart.
+    Each node is declared once with its module path as label; if show_version is True the
+    version of the required module is written on each edge. node_colors and edge_colors
+    optionally map nodes / (u, v) edges to a highlight color (e.g. for a diff).
+    """
+    lines = []
+    if output_filename.endswith(".md"):
+        lines.append("```mermaid")
+    lines.append("graph LR")
+    lines.append("    %% Go Module Dependency Graph")
+    lines.append("")
+
+    # Declare the nodes with the syntax: id["Display Name"]
+    for node in G.nodes():
+        lines.append(f'    {safe_id(node)}["{module_path(node)}"]')
+
+    lines.append("")
+    # Add dependency edges.
+    for u, v, data in G.edges(data=True):
+        version = module_version(v)
+        if "weight" in data:
+            # Aggregated edge of a --cluster summary: label it with the number of requirements.
+            lines.append(f'    {safe_id(u)} -->|"{data["weight"]}"| {safe_id(v)}')
+        elif show_version and version:
+            lines.append(f'    {safe_id(u)} -->|"{version[:10]}"| {safe_id(v)}')
+        else:
+            lines.append(f'    {safe_id(u)} --> {safe_id(v)}')
+
+    # Highlight colors: node fills, and edges by their position in the edge list.
+    if node_colors or edge_colors:
+        lines.append("")
+    for node, color in (node_colors or {}).items():
+        if node in G:
+            lines.append(f'    style {safe_id(node)} fill:{color}')
+    for i, edge in enumerate(G.edges()):
+        if edge_colors and edge in edge_colors:
+            lines.append(f'    linkStyle {i} stroke:{edge_colors[edge]}')
+
+    if output_filename.endswith(".md"):
+        lines.append("```")
+
+    # An OSError is raised to the caller (the CLI reports it and exits).
+    with open(output_filename, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    print(f"Mermaid file saved: {output_filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Filter a go-mod dependency graph and output a Mermaid flowchart."
+    )
+    parser.add_argument("input", help="Input file containing go mod graph output ('-' to read it from stdin)")
+    parser.add_argument("output", help="Output Mermaid filename (.mmd, or .md for a fenced block)")
+    parser.add_argument(
+        "--packages",
+        nargs="*",
+        default=[],
+        help="Allowed package prefixes (e.g., 'github.com/containers'), matched per path segment; globs ('golang.org/x/*') and 're:' regexes are supported. Use '*' to allow all."
+    )
+    parser.add_argument(
+        "--hide-packages",
+        nargs="*",
+        default=[],
+        help="Package prefixes to hide (e.g., 'github.com/containers/vendor'). Same syntax as --packages."
+    )
+    parser.add_argument("--remove-isolated", action="store_true", help="Remove nodes with no edges")
+    parser.add_argument("--max-depth", type=int, default=None, help="Maximum dependency depth to include")
+    parser.add_argument("--show-version", action="store_true", help="Display version text on edges")
+    parser.add_argument("--mvs", action="store_true", help="Keep only the version of each module selected by Go's Minimal Version Selection")
+    parser.add_argument("--mvs-report", action="store_true", help="With --mvs, print how many versions were pruned per module")
+    parser.add_argument("--condense", action="store_true", help="Collapse every dependency cycle (strongly connected component) into one node")
+    parser.add_argument("--transitive-reduction", action="store_true", help="Drop edges implied by longer dependency paths (reachability is unchanged)")
+    parser.add_argument("--cluster", action="store_true", help="Collapse each community of the filtered graph (Louvain) into one super-node")
+    parser.add_argument("--cluster-resolution", type=float, default=1.0, help="With --cluster, higher values give more, smaller clusters (default: 1.0)")
+    parser.add_argument("--expand-cluster", nargs="*", default=[], help="With --cluster, keep the clusters containing these modules expanded (same syntax as --packages)")
+    parser.add_argument("--no-cache", action="store_true", help="Re-parse the input instead of using the binary graph cache next to it")
+    parser.add_argument("--from-command", metavar="CMD", default=None, help="Stream the graph from the output of CMD (e.g. 'go mod graph') instead of the input file; pass '-' as input")
+    args = parser.parse_args()
+
+    package_list = args.packages if args.packages else ["*"]
+    allow_all = ("*" in package_list)
+
+    try:
+        graph = load_graph(args.input, use_cache=not args.no_cache, from_command=args.from_command)
+    except Exception as e:
+        sys.stderr.write(f"Error reading file {args.input}: {e}\n")
+        sys.exit(1)
+    if args.mvs:
+        graph, pruned = minimal_version_selection(graph)
+        if args.mvs_report:
+            print_version_report(pruned)
+
+    pipeline = FilterPipeline(graph).packages(package_list, args.hide_packages, allow_all=allow_all)
+    if args.max_depth is not None:
+        pipeline.max_depth(args.max_depth)
+    if args.remove_isolated:
+        pipeline.remove_isolated()
+    if args.transitive_reduction:
+        pipeline.transitive_reduction()
+    if args.condense:
+        pipeline.condense()
+    if args.cluster:
+        pipeline.cluster(args.cluster_resolution, args.expand_cluster)
+
+    try:
+        draw_and_save_graph_mermaid(pipeline.materialize(), args.output, args.show_version)
+    except OSError as e:
+        sys.stderr.write(f"Error writing Mermaid file {args.output}: {e}\n")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
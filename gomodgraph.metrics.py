@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+This script ranks the modules of a go-mod dependency graph file as candidates for vendoring
+or auditing. For every module of the (optionally filtered) graph it computes the in/out
+degree, the number of transitive dependencies and dependents, and the approximate
+betweenness (the share of shortest dependency chains passing through it, estimated from
+sampled source modules in several processes, see gomodgraph_metrics.py).
+
+The table is printed sorted by betweenness and can be written as CSV with --output; the
+networkx and pyvis renderers size their nodes from that file with --node-sizes.
+
+Usage:
+    python3 gomodgraph.metrics.py go_mod_graph.txt [--packages ...] [--hide-packages ...] [--max-depth=N] [--mvs] [--epsilon E] [--delta D | --samples K] [--jobs N] [--top N] [--output metrics.csv] [--json]
+Example:
+    python3 gomodgraph.metrics.py go_mod_graph.txt --mvs --top 20 --output gomod_metrics.csv
+    python3 gomodgraph.networkx.py go_mod_graph.txt gomod.png "*" --mvs --node-sizes gomod_metrics.csv
+"""
+
+import sys
+import json
+import argparse
+from gomodgraph_core import load_graph, minimal_version_selection, FilterPipeline
+from gomodgraph_metrics import module_metrics, write_metrics
+
+
+def format_table(table, top=None):
+    """Formats the metrics table as aligned plain text."""
+    rows = table[:top] if top else table
+    width = max([len("module")] + [len(row["module"]) for row in rows])
+    lines = [f"{'module':<{width}}  {'in':>5}  {'out':>5}  {'deps':>6}  {'dependents':>10}  {'betweenness':>11}"]
+    for row in rows:
+        lines.append(f"{row['module']:<{width}}  {row['in_degree']:>5}  {row['out_degree']:>5}  "
+                     f"{row['dependencies']:>6}  {row['dependents']:>10}  {row['betweenness']:>11.5f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute degree, closure size and approximate betweenness metrics for the modules of a go-mod dependency graph."
+    )
+    parser.add_argument("input", help="Input file containing go mod graph output ('-' to read it from stdin)")
+    parser.add_argument(
+        "--packages",
+        nargs="*",
+        default=[],
+        help="Allowed package prefixes (e.g., 'github.com/containers'), matched per path segment; globs ('golang.org/x/*') and 're:' regexes are supported. Use '*' to allow all."
+    )
+    parser.add_argument(
+        "--hide-packages",
+        nargs="*",
+        default=[],
+        help="Package prefixes to hide (e.g., 'github.com/containers/vendor'). Same syntax as --packages."
+    )
+    parser.add_argument("--max-depth", type=int, default=None, help="Maximum dependency depth to include")
+    parser.add_argument("--mvs", action="store_true", help="Keep only the version of each module selected by Go's Minimal Version Selection")
+    parser.add_argument("--epsilon", type=float, default=0.05, help="Maximum additive error of the normalized betweenness (default: 0.05)")
+    parser.add_argument("--delta", type=float, default=0.1, help="Probability that the error bound is exceeded (default: 0.1)")
+    parser.add_argument("--samples", type=int, default=None, help="Number of sampled source modules (overrides --epsilon/--delta)")
+    parser.add_argument("--jobs", type=int, default=None, help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument("--top", type=int, default=None, help="Only print the first N modules")
+    parser.add_argument("--output", default=None, help="Write the full table as CSV (for --node-sizes of the renderers)")
+    parser.add_argument("--json", action="store_true", help="Print the table as JSON")
+    parser.add_argument("--no-cache", action="store_true", help="Re-parse the input instead of using the binary graph cache next to it")
+    parser.add_argument("--from-command", metavar="CMD", default=None, help="Stream the graph from the output of CMD (e.g. 'go mod graph') instead of the input file; pass '-' as input")
+    args = parser.parse_args()
+
+    package_list = args.packages if args.packages else ["*"]
+    allow_all = ("*" in package_list)
+
+    try:
+        graph = load_graph(args.input, use_cache=not args.no_cache, from_command=args.from_command)
+    except Exception as e:
+        sys.stderr.write(f"Error reading file {args.input}: {e}\n")
+        sys.exit(1)
+    if args.mvs:
+        graph, _ = minimal_version_selection(graph)
+
+    pipeline = FilterPipeline(graph).packages(package_list, args.hide_packages, allow_all=allow_all)
+    if args.max_depth is not None:
+        pipeline.max_depth(args.max_depth)
+    node_mask, edge_mask = pipeline.masks()
+
+    table, num_samples = module_metrics(graph, node_mask, edge_mask, epsilon=args.epsilon, delta=args.delta,
+                                        samples=args.samples, jobs=args.jobs)
+    if args.output:
+        write_metrics(table, args.output)
+        print(f"Metrics saved: {args.output}")
+    if args.json:
+        print(json.dumps(table[:args.top] if args.top else table, indent=2))
+    else:
+        exact = "exact" if num_samples >= len(table) else f"{num_samples} sampled sources"
+        print(f"{len(table)} modules, betweenness from {exact}")
+        print(format_table(table, args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -13,117 +13,16 @@ Example:
     python3 gomodgraph.networkx.py go_mod_graph.txt gomod_networkx.png "github.com/containers" --remove-isolated --max-depth=3 --show-version
 """
 
+import os
 import re
 import sys
 import argparse
-import hashlib
-import collections
 import networkx as nx
 import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.patches import FancyArrowPatch
-
-# Utility: Create a safe identifier by replacing non-alphanumerics with underscores.
-def safe_id(modname):
-    return re.sub(r'[^A-Za-z0-9]', '_', modname)
-
-# Utility: Convert an organization prefix to its safe version.
-def safe_prefix(org_prefix):
-    return re.sub(r'[^A-Za-z0-9]', '_', org_prefix.rstrip("/"))
-
-# Deterministically assign a color to an org prefix using MD5 hash.
-def assign_color(prefix, palette):
-    h = hashlib.md5(prefix.encode("utf-8")).hexdigest()
-    index = int(h[:8], 16) % len(palette)
-    return palette[index]
-
-# Build the full dependency graph from file.
-def build_graph(input_file):
-    """
-    Reads the go mod graph data from a file and builds a directed NetworkX graph.
-    
-    Returns:
-        G (nx.DiGraph): A directed graph with nodes as original module names.
-        nodes_defined (dict): Mapping of original module names to their safe IDs.
-    """
-    G = nx.DiGraph()
-    nodes_defined = {}
-    with open(input_file, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue  # Skip empty lines or comments.
-            parts = line.split()
-            if len(parts) != 2:
-                continue  # Skip if line does not have exactly two modules.
-            modA, modB = parts
-            # Record nodes (if not already added).
-            if modA not in nodes_defined:
-                nodes_defined[modA] = safe_id(modA)
-                G.add_node(modA, safe_id=nodes_defined[modA])
-            if modB not in nodes_defined:
-                nodes_defined[modB] = safe_id(modB)
-                G.add_node(modB, safe_id=nodes_defined[modB])
-            # Add directed edge.
-            G.add_edge(modA, modB)
-    return G, nodes_defined
-
-def filter_graph_by_orgs(G, nodes_defined, allowed_safe_prefixes, allow_all=False):
-    """
-    Produces a new graph that retains only nodes whose safe IDs start with one of the allowed_safe_prefixes and
-    only adds edges where both endpoints are among these nodes.
-    If allow_all is True, no filtering is done.
-    
-    Returns:
-        G_filtered (nx.DiGraph): The filtered graph.
-    """
-    if allow_all:
-        return G.copy()
-
-    allowed_nodes = {node for node, safe in nodes_defined.items() 
-                     if any(safe.startswith(prefix) for prefix in allowed_safe_prefixes)}
-    
-    G_filtered = nx.DiGraph()
-    for node in allowed_nodes:
-        G_filtered.add_node(node, safe_id=nodes_defined[node])
-    
-    for u, v in G.edges():
-        if u in allowed_nodes and v in allowed_nodes:
-            G_filtered.add_edge(u, v)
-    
-    return G_filtered
-
-def compute_depths(G):
-    """
-    Compute the minimum depth for every node in graph G starting from roots.
-    Roots are defined as nodes with no incoming edges.
-    
-    Returns:
-        depths (dict): Mapping node -> depth.
-    """
-    depths = {}
-    roots = [node for node in G.nodes() if G.in_degree(node) == 0]
-    if not roots:
-        roots = list(G.nodes())
-    queue = collections.deque()
-    for r in roots:
-        depths[r] = 0
-        queue.append(r)
-    while queue:
-        node = queue.popleft()
-        for neighbor in G.successors(node):
-            if neighbor not in depths or depths[node] + 1 < depths[neighbor]:
-                depths[neighbor] = depths[node] + 1
-                queue.append(neighbor)
-    return depths
-
-def filter_graph_by_max_depth(G, max_depth):
-    """
-    Returns a subgraph of G containing only nodes with depth <= max_depth.
-    """
-    depths = compute_depths(G)
-    nodes_in_range = {node for node, depth in depths.items() if depth <= max_depth}
-    return G.subgraph(nodes_in_range).copy()
+from gomodgraph_layout import compute_layout
+from gomodgraph_metrics import read_node_sizes
+from gomodgraph_core import assign_color, load_graph, minimal_version_selection, print_version_report, FilterPipeline
 
 def simplify_label(module_name, org_prefix):
     """
@@ -149,25 +48,33 @@ def simplify_label(module_name, org_prefix):
     
     return simplified
 
-def draw_and_save_graph(G, nodes_defined, allowed_org_prefix, palette, output_filename, show_version):
+def draw_and_save_graph(G, allowed_org_prefix, palette, output_filename, show_version, show=True, layout_cache=True,
+                        node_colors=None, edge_colors=None, node_sizes=None, layout_jobs=None):
     """
     Draws the graph with manually adjusted arrows so that they start and end at the node borders.
+    The arrow geometry is computed with NumPy for all edges at once and drawn as a single
+    quiver collection, so rendering time scales gently with the number of edges.
     Each node is assigned a unique color (used for the node fill and for all its outgoing arrows).
     If show_version is True, version text (if any) is displayed along each edge with lower opacity.
     Node labels are simplified (with no version information) and formatted over multiple lines.
     
     Parameters:
         G: The filtered NetworkX graph.
-        nodes_defined: Mapping of original module names to safe IDs.
         allowed_org_prefix: The raw organization prefix (e.g., "github.com/containers/")
                             to remove from node labels.
         palette: List of color names.
-        output_filename: Path to the output PNG file.
+        output_filename: Path to the output image, or a list of paths to save the same drawing
+                         in several formats. The format follows the file extension (PNG by default).
         show_version: Boolean flag that controls whether version text is displayed on edges.
+        show: Open the interactive matplotlib window after saving. Pass False for batch jobs.
+        layout_cache: Reuse (or warm start from) cached node positions, see gomodgraph_layout.py.
+        layout_jobs: Number of processes for the per-component layout (see full_layout in
+                     gomodgraph_layout.py).
+        node_colors, edge_colors: Optional node -> color and (u, v) -> color mappings that
+                                  override the palette colors (e.g. to highlight a diff).
+        node_sizes: Optional node -> relative size in [0, 1] (see read_node_sizes in
+                    gomodgraph_metrics.py); nodes are then drawn between 800 and 5000 pt^2.
     """
-    import numpy as np
-    from matplotlib.patches import FancyArrowPatch
-
     default_edge_color = "gray"
     
     # Create a node-to-color mapping using each node's name (hashed) to pick a color.
@@ -175,12 +82,15 @@ def draw_and_save_graph(G, nodes_defined, allowed_org_prefix, palette, output_fi
     for node in G.nodes():
         # Here we use the assign_color function by passing the node's name.
         node_color_mapping[node] = assign_color(node, palette)
+    if node_colors:
+        node_color_mapping.update(node_colors)
     
     # Use graphviz layout for left-to-right, or fall back to spring layout.
-    try:
-        pos = nx.nx_agraph.graphviz_layout(G, prog="dot", args="-Grankdir=LR")
-    except Exception:
-        pos = nx.spring_layout(G, k=5, iterations=50)
+    # Positions are cached per output, so re-rendering a similar graph is a warm start.
+    output_filenames = [output_filename] if isinstance(output_filename, str) else output_filename
+    slot = os.path.splitext(os.path.basename(output_filenames[0]))[0]
+    pos = compute_layout(G, prog="dot", args="-Grankdir=LR", slot=slot, use_cache=layout_cache,
+                         jobs=layout_jobs)
     
     # Create simplified multiline labels.
     labels = {node: simplify_label(node, allowed_org_prefix) for node in G.nodes()}
@@ -188,88 +98,128 @@ def draw_and_save_graph(G, nodes_defined, allowed_org_prefix, palette, output_fi
     fig, ax = plt.subplots(figsize=(16, 12))
     
     # Set node colors from the node_color_mapping.
-    node_colors = [node_color_mapping[node] for node in G.nodes()]
-    nx.draw_networkx_nodes(G, pos, node_color=node_colors, node_size=2500, ax=ax)
+    node_color_list = [node_color_mapping[node] for node in G.nodes()]
+    if node_sizes is not None:
+        node_size = [800 + 4200 * node_sizes.get(node, 0.0) for node in G.nodes()]
+    else:
+        node_size = 2500
+    nx.draw_networkx_nodes(G, pos, node_color=node_color_list, node_size=node_size, ax=ax)
     nx.draw_networkx_labels(G, pos, labels=labels, font_size=8, font_color="black", ax=ax)
     
-    for u, v in G.edges():
-        # Use the color of the source node for the arrow.
-        edge_color = node_color_mapping.get(u, default_edge_color)
-        
-        src = np.array(pos[u])
-        tgt = np.array(pos[v])
-        
+    # Compute the geometry of all edges at once.
+    edges = [(u, v) for u, v in G.edges()]
+    if edges:
+        src = np.array([pos[u] for u, _ in edges], dtype=float)
+        tgt = np.array([pos[v] for _, v in edges], dtype=float)
         vec = tgt - src
-        distance = np.linalg.norm(vec)
-        if distance == 0:
-            continue
-        direction = vec / distance
-        
-        # Offset so that arrows start/end at node borders.
-        offset = 0.05 * distance  
-        new_src = src + direction * offset
-        new_tgt = tgt - direction * offset
-        
-        arrow = FancyArrowPatch(tuple(new_src), tuple(new_tgt),
-                                arrowstyle="-|>",
-                                mutation_scale=12,
-                                color=edge_color,
-                                lw=1)
-        arrow.set_zorder(2)
-        ax.add_patch(arrow)
-        
+        # Skip edges whose endpoints coincide (e.g. self-loops).
+        keep = np.linalg.norm(vec, axis=1) > 0
+        # Offset so that arrows start/end at node borders (5% of the edge length on each side).
+        new_src = src[keep] + vec[keep] * 0.05
+        new_tgt = tgt[keep] - vec[keep] * 0.05
+        kept_edges = [edge for edge, k in zip(edges, keep) if k]
+        # Use the color of the source node for the arrow.
+        edge_color_overrides = edge_colors or {}
+        edge_color_list = [edge_color_overrides.get((u, v)) or node_color_mapping.get(u, default_edge_color)
+                           for u, v in kept_edges]
+
+        # Draw every arrow in one batched collection instead of one patch per edge.
+        # Shaft of 1pt with a head of about the size of FancyArrowPatch's "-|>" at mutation_scale 12.
+        delta = new_tgt - new_src
+        arrows = ax.quiver(new_src[:, 0], new_src[:, 1], delta[:, 0], delta[:, 1],
+                           color=edge_color_list, angles="xy", scale_units="xy", scale=1,
+                           units="dots", width=fig.dpi / 72.0,
+                           headwidth=5, headlength=5, headaxislength=4.5, minlength=0)
+        arrows.set_zorder(2)
+
         # Draw version text along the edge if the flag --show-version is provided.
         if show_version:
-            version_text = ""
-            if "@" in v:
-                version_text = v.split("@", 1)[1]
-            if version_text:
-                version_text = version_text[:min(len(version_text),10)]
-                midpoint = (new_src + new_tgt) / 2.0
-                ax.text(midpoint[0], midpoint[1], version_text,
-                        fontsize=6, color="black", alpha=0.5,
-                        horizontalalignment='',
-                        verticalalignment='center')
+            midpoints = (new_src + new_tgt) / 2.0
+            for (_, v), midpoint in zip(kept_edges, midpoints):
+                version_text = v.split("@", 1)[1] if "@" in v else ""
+                if version_text:
+                    ax.text(midpoint[0], midpoint[1], version_text[:10],
+                            fontsize=6, color="black", alpha=0.5,
+                            horizontalalignment='center',
+                            verticalalignment='center')
     
     ax.set_title("Go Module Dependency Graph (Filtered)", fontsize=16)
     ax.axis("off")
     plt.tight_layout()
-    plt.savefig(output_filename, format="PNG")
-    print(f"Graph saved as {output_filename}")
-    plt.show()
+    for filename in output_filenames:
+        image_format = filename.rsplit(".", 1)[-1].lower() if "." in filename else "png"
+        plt.savefig(filename, format=image_format)
+        print(f"Graph saved as {filename}")
+    if show:
+        plt.show()
+    plt.close(fig)
+
 def main():
     parser = argparse.ArgumentParser(
         description="Filter a go-mod dependency graph by allowed organization prefixes, "
                     "optionally restrict maximum depth, remove isolated nodes, and output a PNG visualization."
     )
-    parser.add_argument("input", help="Input file containing go mod graph output")
-    parser.add_argument("output", help="Output PNG filename")
-    parser.add_argument("orgs", help="Comma-separated allowed organization prefixes (e.g., 'github.com/containers' or '*' to allow all)")
+    parser.add_argument("input", help="Input file containing go mod graph output ('-' to read it from stdin)")
+    parser.add_argument("output", help="Output image filename (PNG, or SVG/PDF by extension)")
+    parser.add_argument("orgs", help="Comma-separated allowed organization prefixes (e.g., 'github.com/containers' or '*' to allow all). Globs and 're:' regexes are supported.")
     parser.add_argument("--remove-isolated", action="store_true", help="Remove nodes with no edges")
     parser.add_argument("--max-depth", type=int, default=None, help="Maximum dependency depth to include (default: include all depths)")
     parser.add_argument("--show-version", action="store_true", help="Display version text on edges")
+    parser.add_argument("--mvs", action="store_true", help="Keep only the version of each module selected by Go's Minimal Version Selection")
+    parser.add_argument("--mvs-report", action="store_true", help="With --mvs, print how many versions were pruned per module")
+    parser.add_argument("--no-layout-cache", action="store_true", help="Always compute the layout from scratch instead of reusing cached positions")
+    parser.add_argument("--headless", action="store_true", help="Only save the image, do not open a matplotlib window")
+    parser.add_argument("--condense", action="store_true", help="Collapse every dependency cycle (strongly connected component) into one node")
+    parser.add_argument("--transitive-reduction", action="store_true", help="Drop edges implied by longer dependency paths (reachability is unchanged)")
+    parser.add_argument("--cluster", action="store_true", help="Collapse each community of the filtered graph (Louvain) into one super-node")
+    parser.add_argument("--cluster-resolution", type=float, default=1.0, help="With --cluster, higher values give more, smaller clusters (default: 1.0)")
+    parser.add_argument("--expand-cluster", nargs="*", default=[], help="With --cluster, keep the clusters containing these modules expanded (same syntax as --packages)")
+    parser.add_argument("--node-sizes", metavar="METRICS_CSV", default=None, help="Size the nodes by a column of a gomodgraph.metrics.py --output file")
+    parser.add_argument("--size-column", default="betweenness", help="Metrics column used by --node-sizes (default: betweenness)")
+    parser.add_argument("--no-cache", action="store_true", help="Re-parse the input instead of using the binary graph cache next to it")
+    parser.add_argument("--from-command", metavar="CMD", default=None, help="Stream the graph from the output of CMD (e.g. 'go mod graph') instead of the input file; pass '-' as input")
     args = parser.parse_args()
+    if args.headless:
+        plt.switch_backend("Agg")
     
     org_list = [o.strip() for o in args.orgs.split(",") if o.strip()]
     allow_all = ("*" in org_list)
     allowed_org_prefix = org_list[0] if not allow_all else ""
-    allowed_safe_prefixes = [] if allow_all else [safe_prefix(o) for o in org_list]
     
     palette = ["green", "red", "orange", "purple",
                "brown", "olive", "teal", "maroon"]
     
-    G, nodes_defined = build_graph(args.input)
-    G_filtered = filter_graph_by_orgs(G, nodes_defined, allowed_safe_prefixes, allow_all=allow_all)
+    graph = load_graph(args.input, use_cache=not args.no_cache, from_command=args.from_command)
+    if args.mvs:
+        graph, pruned = minimal_version_selection(graph)
+        if args.mvs_report:
+            print_version_report(pruned)
+    pipeline = FilterPipeline(graph).packages(org_list, allow_all=allow_all)
     
     if args.max_depth is not None:
-        G_filtered = filter_graph_by_max_depth(G_filtered, args.max_depth)
+        pipeline.max_depth(args.max_depth)
     
     if args.remove_isolated:
-        isolates = list(nx.isolates(G_filtered))
-        if isolates:
-            G_filtered.remove_nodes_from(isolates)
-    
-    draw_and_save_graph(G_filtered, nodes_defined, allowed_org_prefix, palette, args.output, args.show_version)
+        pipeline.remove_isolated()
+    if args.transitive_reduction:
+        pipeline.transitive_reduction()
+    if args.condense:
+        pipeline.condense()
+    if args.cluster:
+        pipeline.cluster(args.cluster_resolution, args.expand_cluster)
+    
+    node_sizes = None
+    if args.node_sizes:
+        try:
+            node_sizes = read_node_sizes(args.node_sizes, args.size_column)
+        except (OSError, KeyError) as e:
+            sys.stderr.write(f"Error reading metrics file {args.node_sizes}: {e}\n")
+            sys.exit(1)
+    
+    # Only the final filtered subgraph is materialized as a NetworkX graph.
+    G_filtered = pipeline.materialize()
+    draw_and_save_graph(G_filtered, allowed_org_prefix, palette, args.output, args.show_version, show=not args.headless,
+                        layout_cache=not args.no_layout_cache, node_sizes=node_sizes)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+This script builds the package-level import graph of a Go module (e.g. a podman checkout)
+from the import declarations of its .go files, see gomodgraph_packages.py. The files are
+scanned in parallel and only up to the end of their imports, and the results are cached
+per file, so rescanning after a change takes well under a second.
+
+The graph is written as an edge list in `go mod graph` format (one "importer imported" pair
+per line), so every gomodgraph script can filter and render it like a module graph. With
+--puml the filtered graph is also written as a PlantUML component diagram that
+calculate_reflexion_score.py can compare with a hand-drawn architecture (podman_manual.puml).
+
+Usage:
+    python3 gomodgraph.packages.py MODULE_DIR [--output package_graph.txt] [--depth N] [--external {module,package,drop}] [--std] [--tests] [--jobs N] [--no-cache] [--puml FILE --packages ... --hide-packages ...]
+Example:
+    python3 gomodgraph.packages.py ../podman --output podman_packages.txt --depth 2 --external drop
+    python3 gomodgraph.render.py podman_packages.txt --packages github.com/containers/podman/v5 --remove-isolated --png podman_packages.png
+    python3 gomodgraph.packages.py ../podman --depth 1 --external drop --puml podman_packages.puml
+    python3 calculate_reflexion_score.py podman_manual.puml podman_packages.puml
+"""
+
+import sys
+import time
+import argparse
+from gomodgraph_core import import_script, FilterPipeline
+from gomodgraph_packages import build_package_graph
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the package import graph of a Go module from its source files."
+    )
+    parser.add_argument("module", help="Go module directory (containing go.mod)")
+    parser.add_argument("--output", default=None, help="Write the edge list to this file (default: standard output unless --puml is given)")
+    parser.add_argument("--depth", type=int, default=None, help="Collapse the module's packages to their first N path segments (e.g. 2: pkg/domain)")
+    parser.add_argument("--external", choices=["module", "package", "drop"], default="module",
+                        help="Imports of other modules: map to the required module (default), keep the package, or drop them")
+    parser.add_argument("--std", action="store_true", help="Keep standard library imports")
+    parser.add_argument("--tests", action="store_true", help="Also scan _test.go files")
+    parser.add_argument("--jobs", type=int, default=None, help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument("--no-cache", action="store_true", help="Rescan every file instead of using the import cache")
+    parser.add_argument("--puml", default=None, help="Also write the (filtered) graph as a PlantUML diagram")
+    parser.add_argument("--packages", nargs="*", default=[], help="With --puml, allowed package prefixes (same syntax as the other scripts)")
+    parser.add_argument("--hide-packages", nargs="*", default=[], help="With --puml, package prefixes to hide")
+    args = parser.parse_args()
+    if args.depth is not None and args.depth < 1:
+        parser.error("--depth must be at least 1")
+
+    start = time.perf_counter()
+    try:
+        graph, report = build_package_graph(args.module, depth=args.depth, external=args.external,
+                                            include_std=args.std, include_tests=args.tests, jobs=args.jobs,
+                                            use_cache=not args.no_cache)
+    except (OSError, ValueError) as e:
+        sys.stderr.write(f"Error reading module {args.module}: {e}\n")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+    sys.stderr.write(f"{report['module']}: {report['packages']} packages in {report['files']} files "
+                     f"({report['parsed']} read) -> {graph.num_nodes} nodes, {graph.num_edges} edges in {elapsed:.2f}s\n")
+
+    names = graph.names
+    lines = [f"{names[u]} {names[v]}\n" for u, v in zip(graph.sources.tolist(), graph.targets.tolist())]
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        print(f"Package graph saved: {args.output}")
+    elif not args.puml:
+        sys.stdout.writelines(lines)
+
+    if args.puml:
+        package_list = args.packages if args.packages else ["*"]
+        allow_all = ("*" in package_list)
+        G = FilterPipeline(graph).packages(package_list, args.hide_packages, allow_all=allow_all).materialize()
+        plantuml_script = import_script("gomodgraph.plantuml.py")
+        try:
+            plantuml_script.draw_and_save_graph_plantuml(G, report["module"], args.puml, False)
+        except OSError as e:
+            sys.stderr.write(f"Error writing PlantUML file {args.puml}: {e}\n")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
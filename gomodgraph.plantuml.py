@@ -4,120 +4,21 @@ This script reads a go-mod dependency graph file, filters it by allowed package
 optionally hides packages matching specified prefixes, restricts maximum dependency depth,
 removes isolated nodes, and outputs the filtered dependency graph as a PlantUML file.
 Each node in the diagram is rendered as a component and each edge represents a dependency connection.
+With --shard org|cluster the diagram is split into one file per organisation or cluster plus
+an index diagram, so large graphs render in pieces (and in parallel).
 Usage:
     python3 gomodgraph_plantuml.py go_mod_graph.txt output.puml --packages github.com/containers [--hide-packages github.com/containers/vendor ...] [--remove-isolated] [--max-depth=N] [--show-version]
 Example:
     python3 gomodgraph_plantuml.py go_mod_graph.txt gomod_graph.puml --packages github.com/containers --hide-packages github.com/containers/vendor --remove-isolated --max-depth=3 --show-version
+    python3 gomodgraph_plantuml.py go_mod_graph.txt gomod_graph.puml --packages '*' --shard org
 """
 
+import os
 import re
 import sys
 import argparse
-import hashlib
-import collections
-import networkx as nx
-
-# Utility: Create a safe identifier by replacing non-alphanumerics with underscores.
-def safe_id(modname):
-    return re.sub(r'[^A-Za-z0-9]', '_', modname)
-
-# Utility: Convert a package prefix to its safe version.
-def safe_prefix(prefix):
-    return re.sub(r'[^A-Za-z0-9]', '_', prefix.rstrip("/"))
-
-def build_graph(input_file):
-    """
-    Reads the go mod graph data from a file and builds a directed NetworkX graph.
-    Returns:
-        G (nx.DiGraph): A directed graph with nodes as original module names.
-        nodes_defined (dict): Mapping of original module names to their safe IDs.
-    """
-    G = nx.DiGraph()
-    nodes_defined = {}
-    try:
-        with open(input_file, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue  # Skip empty or commented lines.
-                parts = line.split()
-                if len(parts) != 2:
-                    continue  # Skip lines that don't have exactly two modules.
-                modA, modB = parts
-
-                # Add modA only if not already added.
-                if modA not in nodes_defined:
-                    safe_modA = safe_id(modA)
-                    nodes_defined[modA] = safe_modA
-                    G.add_node(modA, safe_id=safe_modA)
-
-                # Add modB only if not already added.
-                if modB not in nodes_defined:
-                    safe_modB = safe_id(modB)
-                    nodes_defined[modB] = safe_modB
-                    G.add_node(modB, safe_id=safe_modB)
-
-                # Add the edge between the two nodes.
-                G.add_edge(modA, modB)
-    except Exception as e:
-        sys.stderr.write(f"Error reading file {input_file}: {e}\n")
-        sys.exit(1)
-    return G, nodes_defined
-
-def filter_graph_by_packages(G, nodes_defined, allowed_safe_prefixes, hidden_safe_prefixes, allow_all=False):
-    """
-    Produces a new graph that retains nodes based on allowed_safe_prefixes.
-    Nodes whose safe IDs start with any of hidden_safe_prefixes are removed.
-    Returns:
-        G_filtered (nx.DiGraph): The filtered graph.
-    """
-    if allow_all:
-        allowed_nodes = set(G.nodes())
-    else:
-        allowed_nodes = {node for node, safe in nodes_defined.items() 
-                         if any(safe.startswith(prefix) for prefix in allowed_safe_prefixes)}
-    # Remove nodes that should be hidden.
-    if hidden_safe_prefixes:
-        allowed_nodes = {node for node in allowed_nodes
-                         if not any(nodes_defined[node].startswith(prefix) for prefix in hidden_safe_prefixes)}
-    G_filtered = nx.DiGraph()
-    for node in allowed_nodes:
-        G_filtered.add_node(node, safe_id=nodes_defined[node])
-    for u, v in G.edges():
-        if u in allowed_nodes and v in allowed_nodes:
-            G_filtered.add_edge(u, v)
-    return G_filtered
-
-def compute_depths(G):
-    """
-    Compute minimum depth for every node in graph G starting from roots.
-    Roots are defined as nodes with no incoming edges.
-    Returns:
-        depths (dict): Mapping of node -> depth.
-    """
-    depths = {}
-    roots = [node for node in G.nodes() if G.in_degree(node) == 0]
-    if not roots:
-        roots = list(G.nodes())
-    queue = collections.deque()
-    for r in roots:
-        depths[r] = 0
-        queue.append(r)
-    while queue:
-        node = queue.popleft()
-        for neighbor in G.successors(node):
-            if neighbor not in depths or depths[node] + 1 < depths[neighbor]:
-                depths[neighbor] = depths[node] + 1
-                queue.append(neighbor)
-    return depths
-
-def filter_graph_by_max_depth(G, max_depth):
-    """
-    Returns a subgraph of G containing only nodes with depth <= max_depth.
-    """
-    depths = compute_depths(G)
-    nodes_in_range = {node for node, depth in depths.items() if depth <= max_depth}
-    return G.subgraph(nodes_in_range).copy()
+import functools
+from gomodgraph_core import load_graph, safe_id, module_org, module_path, minimal_version_selection, print_version_report, FilterPipeline
 
 def simplify_label(module_name, package_prefix):
     """
@@ -169,55 +70,59 @@ def get_project_name(module_name, package_prefix):
     
     return f'{project_name}_' # append a dash so we don't have conflicts with the PlantUML syntax
 
-def draw_and_save_graph_plantuml(G, nodes_defined, allowed_package_prefix, output_filename: str, show_version):
+@functools.lru_cache(maxsize=None)
+def node_alias(module_name, package_prefix):
     """
-    Draws the dependency graph as a PlantUML file.
-    Consolidates nodes that produce the same simplified alias.
-    
-    Instead of creating duplicates, we map the module's simplified label (and its base alias)
-    to one unique entry and then create a consolidated node. Edges between nodes are then 
-    merged into a set to prevent duplicate connections.
+    Returns the simplified label and the PlantUML alias of a module. Both run several regexes,
+    so they are computed once per module name and memoized.
     """
-    lines = []
-    lines.append("@startuml")
-    config = [
+    simplified = simplify_label(module_name, package_prefix)
+    return simplified, get_project_name(simplified, package_prefix)
+
+def plantuml_header(title):
+    return [
+        "@startuml",
         "skinparam componentStyle rectangle",
         "left to right direction",
-        "title Generated Architecture of Podman",
+        f"title {title}",
         'legend "Naming scheme: Organisations | ProjectName"',
         "skinparam backgroundColor white",
         "skinparam ArrowFontSize 15",
-        "skinparam ArrowFontBackgroundColor White"
+        "skinparam ArrowFontBackgroundColor White",
     ]
-    lines.extend(config)
-    lines.append("")
 
-    # Consolidate nodes by their simplified label.
-    # Mapping from base alias (from get_project_name) to its simplified label.
-    consolidated_nodes = {}
-    for node in G.nodes():
-        # Obtain the simplified label.
-        simplified = simplify_label(node, allowed_package_prefix)
-        base_alias = get_project_name(simplified, allowed_package_prefix)
-        # If this node's base alias is already present, choose one common simplified label.
-        if base_alias not in consolidated_nodes:
-            consolidated_nodes[base_alias] = simplified
+def consolidate_graph(G, allowed_package_prefix, show_version, node_colors=None, edge_colors=None):
+    """
+    Consolidates nodes that produce the same simplified alias.
 
-    # Write out the consolidated component definitions.
-    for base_alias, simplified in consolidated_nodes.items():
-        lines.append(f'component "{simplified}" as {base_alias}')
+    Instead of creating duplicates, we map the module's simplified label (and its base alias)
+    to one unique entry and then create a consolidated node. Edges between nodes are then
+    merged into a set to prevent duplicate connections. Aliases are looked up once per node.
 
-    lines.append("")
+    Returns:
+        components (dict): Alias -> simplified label, in node order.
+        alias_colors (dict): Alias -> highlight color (first color wins).
+        edges (list): Sorted (src_alias, dst_alias, edge_comment, arrow) tuples.
+    """
+    # Consolidate nodes by their simplified label.
+    components = {}
+    alias_colors = {}
+    aliases = {}
+    for node in G.nodes():
+        simplified, base_alias = node_alias(node, allowed_package_prefix)
+        aliases[node] = base_alias
+        # If this node's base alias is already present, keep the first simplified label.
+        components.setdefault(base_alias, simplified)
+        if node_colors and node in node_colors:
+            alias_colors.setdefault(base_alias, node_colors[node])
 
     # Consolidate edges based on the base alias.
-    # These sets will store edges between consolidated nodes so duplicates are eliminated.
+    # This set stores edges between consolidated nodes so duplicates are eliminated.
     consolidated_edges = set()
     for u, v in G.edges():
-        u_simplified = simplify_label(u, allowed_package_prefix)
-        v_simplified = simplify_label(v, allowed_package_prefix)
-        u_alias = get_project_name(u_simplified, allowed_package_prefix)
-        v_alias = get_project_name(v_simplified, allowed_package_prefix)
-        # If both nodes consolidate to the same alias, then ignore self-loops (or decide otherwise).
+        u_alias = aliases[u]
+        v_alias = aliases[v]
+        # If both nodes consolidate to the same alias, then ignore self-loops.
         if u_alias == v_alias:
             continue
         # Optionally, include version information on the edge if desired.
@@ -225,71 +130,218 @@ def draw_and_save_graph_plantuml(G, nodes_defined, allowed_package_prefix, outpu
         if show_version and "@" in v:
             version = v.split("@", 1)[1]
             edge_comment = f" : {version[:10]}"
-        # Use a tuple (src, dst, edge_comment) to represent the edge uniquely.
-        consolidated_edges.add((u_alias, v_alias, edge_comment))
-    
+        arrow = f"-[#{edge_colors[(u, v)]}]->" if edge_colors and (u, v) in edge_colors else "-->"
+        # Use a tuple (src, dst, edge_comment, arrow) to represent the edge uniquely.
+        consolidated_edges.add((u_alias, v_alias, edge_comment, arrow))
+    # Sorted, so the same graph always gives the same file.
+    return components, alias_colors, sorted(consolidated_edges)
+
+def write_plantuml(output_filename, lines):
+    """Writes a PlantUML file. An OSError is raised to the caller (the CLI reports it and exits)."""
+    with open(output_filename, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    print(f"PlantUML file saved: {output_filename}")
+
+def draw_and_save_graph_plantuml(G, allowed_package_prefix, output_filename: str, show_version, node_colors=None, edge_colors=None):
+    """
+    Draws the dependency graph as a PlantUML file, see consolidate_graph.
+
+    node_colors and edge_colors optionally map nodes / (u, v) edges to a color that is used
+    to highlight them (e.g. for a diff); for consolidated nodes the first color wins.
+    """
+    components, alias_colors, edges = consolidate_graph(G, allowed_package_prefix, show_version,
+                                                        node_colors, edge_colors)
+    lines = plantuml_header("Generated Architecture of Podman")
+    lines.append("")
+
+    # Write out the consolidated component definitions.
+    for base_alias, simplified in components.items():
+        color = f" #{alias_colors[base_alias]}" if base_alias in alias_colors else ""
+        lines.append(f'component "{simplified}" as {base_alias}{color}')
+
+    lines.append("")
+
     # Write out edges from the consolidated set.
-    for src_alias, dst_alias, edge_comment in consolidated_edges:
-        lines.append(f"{src_alias} --> {dst_alias}{edge_comment}")
+    for src_alias, dst_alias, edge_comment, arrow in edges:
+        lines.append(f"{src_alias} {arrow} {dst_alias}{edge_comment}")
 
     lines.append("")
     lines.append("@enduml")
+    write_plantuml(output_filename, lines)
 
-    try:
-        with open(output_filename, "w", encoding="utf-8") as f:
-            f.write("\n".join(lines))
-        print(f"PlantUML file saved: {output_filename}")
-    except Exception as e:
-        sys.stderr.write(f"Error writing PlantUML file {output_filename}: {e}\n")
-        sys.exit(1)
+def shard_components(components, edges, shard_by, modules=None):
+    """
+    Assigns every consolidated component to a shard.
+      - "org":     one shard per organisation of the component's module (modules: alias ->
+                   module name), see gomodgraph_core.module_org, so the shards are the same
+                   organisations as gomodgraph.render.py --per-org uses.
+      - "cluster": one shard per community of the component graph (see gomodgraph_cluster.py),
+                   named after its first component.
+
+    Returns:
+        shards (dict): Alias -> shard name.
+    """
+    if shard_by == "org":
+        return {alias: module_org(module_path(modules[alias])) for alias in components}
+    from gomodgraph_core import ModuleGraph
+    from gomodgraph_cluster import louvain_communities
+    index = {alias: i for i, alias in enumerate(components)}
+    graph = ModuleGraph.from_edges(index, [index[u] for u, *_ in edges], [index[v] for _, v, *_ in edges])
+    community = louvain_communities(graph).tolist()
+    names = {}
+    for alias in components:
+        names.setdefault(community[index[alias]], alias.strip("_"))
+    return {alias: names[community[index[alias]]] for alias in components}
+
+def draw_and_save_graph_plantuml_sharded(G, allowed_package_prefix, output_filename: str, show_version, shard_by="org",
+                                         node_colors=None, edge_colors=None):
+    """
+    Splits the PlantUML diagram into one file per organisation or cluster
+    ("<output>.<shard>.puml") plus an index diagram in output_filename, so every shard renders
+    quickly on its own and the shards can be rendered in parallel.
+
+    A shard holds its own components and every edge starting or ending in it. The other end of
+    a cross-shard edge is drawn as a grey <<stub>> component linking to its shard. The index
+    diagram has one component per shard, labelled with its number of modules, and one edge per
+    pair of connected shards labelled with the number of edges between them. Links point to
+    the SVG rendering of the shards.
+    """
+    components, alias_colors, edges = consolidate_graph(G, allowed_package_prefix, show_version,
+                                                        node_colors, edge_colors)
+    modules = {}
+    for node in G.nodes():
+        modules.setdefault(node_alias(node, allowed_package_prefix)[1], node)
+    shards = shard_components(components, edges, shard_by, modules)
+    stem, _ = os.path.splitext(output_filename)
+    shard_ids = {}
+    for shard in shards.values():
+        shard_ids.setdefault(shard, safe_id(shard))
+    shard_file = lambda shard: f"{stem}.{shard_ids[shard]}.puml"
+    shard_link = lambda shard: os.path.basename(f"{stem}.{shard_ids[shard]}.svg")
+
+    shard_edges = {shard: [] for shard in shard_ids}
+    between = {}
+    for edge in edges:
+        src_shard, dst_shard = shards[edge[0]], shards[edge[1]]
+        shard_edges[src_shard].append(edge)
+        if src_shard != dst_shard:
+            shard_edges[dst_shard].append(edge)
+            between[(src_shard, dst_shard)] = between.get((src_shard, dst_shard), 0) + 1
+
+    members = {shard: [] for shard in shard_ids}
+    for alias in components:
+        members[shards[alias]].append(alias)
+
+    for shard, aliases in members.items():
+        lines = plantuml_header(f"Generated Architecture of Podman: {shard}")
+        lines.append("skinparam component<<stub>> {")
+        lines.append("  BackgroundColor #EEEEEE")
+        lines.append("  FontColor #777777")
+        lines.append("}")
+        lines.append("")
+        for alias in aliases:
+            color = f" #{alias_colors[alias]}" if alias in alias_colors else ""
+            lines.append(f'component "{components[alias]}" as {alias}{color}')
+        stubs = dict.fromkeys(a for edge in shard_edges[shard] for a in edge[:2] if shards[a] != shard)
+        for alias in stubs:
+            lines.append(f'component "{components[alias]}" as {alias} <<stub>> [[{shard_link(shards[alias])}]]')
+        lines.append("")
+        for src_alias, dst_alias, edge_comment, arrow in shard_edges[shard]:
+            lines.append(f"{src_alias} {arrow} {dst_alias}{edge_comment}")
+        lines.append("")
+        lines.append("@enduml")
+        write_plantuml(shard_file(shard), lines)
+
+    lines = plantuml_header("Generated Architecture of Podman: index")
+    lines.append("")
+    for shard, aliases in members.items():
+        lines.append(f'component "{shard}\\n({len(aliases)} modules)" as {shard_ids[shard]}_ [[{shard_link(shard)}]]')
+    lines.append("")
+    for (src_shard, dst_shard), count in sorted(between.items()):
+        lines.append(f"{shard_ids[src_shard]}_ --> {shard_ids[dst_shard]}_ : {count}")
+    lines.append("")
+    lines.append("@enduml")
+    write_plantuml(output_filename, lines)
 
 def main():
     parser = argparse.ArgumentParser(
         description="Filter a go-mod dependency graph and output a PlantUML component diagram."
     )
-    parser.add_argument("input", help="Input file containing go mod graph output")
+    parser.add_argument("input", help="Input file containing go mod graph output ('-' to read it from stdin)")
     parser.add_argument("output", help="Output PlantUML filename (.puml or .txt)")
     parser.add_argument(
         "--packages",
         nargs="*",
         default=[],
-        help="Allowed package prefixes (e.g., 'github.com/containers'). Use '*' to allow all."
+        help="Allowed package prefixes (e.g., 'github.com/containers'), matched per path segment; globs ('golang.org/x/*') and 're:' regexes are supported. Use '*' to allow all."
     )
     parser.add_argument(
         "--hide-packages",
         nargs="*",
         default=[],
-        help="Package prefixes to hide (e.g., 'github.com/containers/vendor')."
+        help="Package prefixes to hide (e.g., 'github.com/containers/vendor'). Same syntax as --packages."
     )
     parser.add_argument("--remove-isolated", action="store_true", help="Remove nodes with no edges")
     parser.add_argument("--max-depth", type=int, default=None, help="Maximum dependency depth to include")
     parser.add_argument("--show-version", action="store_true", help="Display version text with nodes/edges")
+    parser.add_argument("--mvs", action="store_true", help="Keep only the version of each module selected by Go's Minimal Version Selection")
+    parser.add_argument("--mvs-report", action="store_true", help="With --mvs, print how many versions were pruned per module")
+    parser.add_argument("--condense", action="store_true", help="Collapse every dependency cycle (strongly connected component) into one node")
+    parser.add_argument("--transitive-reduction", action="store_true", help="Drop edges implied by longer dependency paths (reachability is unchanged)")
+    parser.add_argument("--cluster", action="store_true", help="Collapse each community of the filtered graph (Louvain) into one super-node")
+    parser.add_argument("--cluster-resolution", type=float, default=1.0, help="With --cluster, higher values give more, smaller clusters (default: 1.0)")
+    parser.add_argument("--expand-cluster", nargs="*", default=[], help="With --cluster, keep the clusters containing these modules expanded (same syntax as --packages)")
+    parser.add_argument("--shard", choices=["org", "cluster"], default=None,
+                        help="Split the diagram into one .puml file per organisation or cluster, with an index diagram in the output file")
+    parser.add_argument("--no-cache", action="store_true", help="Re-parse the input instead of using the binary graph cache next to it")
+    parser.add_argument("--from-command", metavar="CMD", default=None, help="Stream the graph from the output of CMD (e.g. 'go mod graph') instead of the input file; pass '-' as input")
     args = parser.parse_args()
 
     package_list = args.packages if args.packages else ["*"]
     allow_all = ("*" in package_list)
     allowed_package_prefix = package_list[0] if not allow_all else ""
-    allowed_safe_prefixes = [] if allow_all else [safe_prefix(pkg) for pkg in package_list]
-    hidden_safe_prefixes = [safe_prefix(h) for h in args.hide_packages] if args.hide_packages else []
 
     # Build the dependency graph.
-    G, nodes_defined = build_graph(args.input)
+    try:
+        graph = load_graph(args.input, use_cache=not args.no_cache, from_command=args.from_command)
+    except Exception as e:
+        sys.stderr.write(f"Error reading file {args.input}: {e}\n")
+        sys.exit(1)
+
+    # Optionally, collapse the graph to the versions selected by Go.
+    if args.mvs:
+        graph, pruned = minimal_version_selection(graph)
+        if args.mvs_report:
+            print_version_report(pruned)
 
     # Filter the graph by allowed and hidden package prefixes.
-    G_filtered = filter_graph_by_packages(G, nodes_defined, allowed_safe_prefixes, hidden_safe_prefixes, allow_all=allow_all)
+    pipeline = FilterPipeline(graph).packages(package_list, args.hide_packages, allow_all=allow_all)
 
     # Optionally, apply maximum depth filtering.
     if args.max_depth is not None:
-        G_filtered = filter_graph_by_max_depth(G_filtered, args.max_depth)
+        pipeline.max_depth(args.max_depth)
 
     # Optionally, remove isolated nodes (nodes with no edges).
     if args.remove_isolated:
-        isolates = list(nx.isolates(G_filtered))
-        if isolates:
-            G_filtered.remove_nodes_from(isolates)
+        pipeline.remove_isolated()
+    if args.transitive_reduction:
+        pipeline.transitive_reduction()
+    if args.condense:
+        pipeline.condense()
+    if args.cluster:
+        pipeline.cluster(args.cluster_resolution, args.expand_cluster)
 
     # Write out the graph as a PlantUML file.
-    draw_and_save_graph_plantuml(G_filtered, nodes_defined, allowed_package_prefix, args.output, args.show_version)
+    G_filtered = pipeline.materialize()
+    try:
+        if args.shard:
+            draw_and_save_graph_plantuml_sharded(G_filtered, allowed_package_prefix, args.output, args.show_version,
+                                                 shard_by=args.shard)
+        else:
+            draw_and_save_graph_plantuml(G_filtered, allowed_package_prefix, args.output, args.show_version)
+    except OSError as e:
+        sys.stderr.write(f"Error writing PlantUML file {e.filename or args.output}: {e}\n")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
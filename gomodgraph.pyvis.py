@@ -14,122 +14,18 @@ Example:
 For more details on pyvis, see [1] and [2].
 """
 
+import os
 import re
 import sys
+import json
+import shutil
 import argparse
-import hashlib
-import collections
-import networkx as nx
+import webbrowser
+import numpy as np
 from pyvis.network import Network
-
-
-# Utility: Create a safe identifier by replacing non-alphanumerics with underscores.
-def safe_id(modname):
-    return re.sub(r'[^A-Za-z0-9]', '_', modname)
-
-
-# Utility: Convert a package prefix to its safe version.
-def safe_prefix(prefix):
-    return re.sub(r'[^A-Za-z0-9]', '_', prefix.rstrip("/"))
-
-
-# Deterministically assign a color to a package using MD5 hash.
-def assign_color(prefix, palette):
-    h = hashlib.md5(prefix.encode("utf-8")).hexdigest()
-    index = int(h[:8], 16) % len(palette)
-    return palette[index]
-
-
-# Build the full dependency graph from file.
-def build_graph(input_file):
-    """
-    Reads the go mod graph data from a file and builds a directed NetworkX graph.
-    Returns:
-        G (nx.DiGraph): A directed graph with nodes as original module names.
-        nodes_defined (dict): Mapping of original module names to their safe IDs.
-    """
-    G = nx.DiGraph()
-    nodes_defined = {}
-    with open(input_file, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue  # Skip empty lines or comments.
-            parts = line.split()
-            if len(parts) != 2:
-                continue  # Skip lines that do not have exactly two modules.
-            modA, modB = parts
-            # Record nodes (if not already added).
-            if modA not in nodes_defined:
-                nodes_defined[modA] = safe_id(modA)
-                G.add_node(modA, safe_id=nodes_defined[modA])
-            if modB not in nodes_defined:
-                nodes_defined[modB] = safe_id(modB)
-                G.add_node(modB, safe_id=nodes_defined[modB])
-            # Add directed edge.
-            G.add_edge(modA, modB)
-    return G, nodes_defined
-
-
-def filter_graph_by_packages(G, nodes_defined, allowed_safe_prefixes, hidden_safe_prefixes, allow_all=False):
-    """
-    Produces a new graph that retains only nodes whose safe IDs begin with one of the allowed_safe_prefixes,
-    unless allowed is "*" (i.e., allow_all=True). Then, it removes any nodes whose safe IDs begin with any
-    of the hidden_safe_prefixes. Only edges where both endpoints are retained are added.
-    
-    Returns:
-        G_filtered (nx.DiGraph): The filtered graph.
-    """
-    if allow_all:
-        allowed_nodes = set(G.nodes())
-    else:
-        allowed_nodes = {node for node, safe in nodes_defined.items()
-                         if any(safe.startswith(prefix) for prefix in allowed_safe_prefixes)}
-    # Remove nodes that should be hidden.
-    if hidden_safe_prefixes:
-        allowed_nodes = {node for node in allowed_nodes
-                         if not any(nodes_defined[node].startswith(prefix) for prefix in hidden_safe_prefixes)}
-    
-    G_filtered = nx.DiGraph()
-    for node in allowed_nodes:
-        G_filtered.add_node(node, safe_id=nodes_defined[node])
-    for u, v in G.edges():
-        if u in allowed_nodes and v in allowed_nodes:
-            G_filtered.add_edge(u, v)
-    return G_filtered
-
-
-def compute_depths(G):
-    """
-    Compute the minimum depth for every node in graph G starting from roots.
-    Roots are defined as nodes with no incoming edges.
-    Returns:
-        depths (dict): Mapping node -> depth.
-    """
-    depths = {}
-    roots = [node for node in G.nodes() if G.in_degree(node) == 0]
-    if not roots:
-        roots = list(G.nodes())
-    queue = collections.deque()
-    for r in roots:
-        depths[r] = 0
-        queue.append(r)
-    while queue:
-        node = queue.popleft()
-        for neighbor in G.successors(node):
-            if neighbor not in depths or depths[node] + 1 < depths[neighbor]:
-                depths[neighbor] = depths[node] + 1
-                queue.append(neighbor)
-    return depths
-
-
-def filter_graph_by_max_depth(G, max_depth):
-    """
-    Returns a subgraph of G containing only nodes with depth <= max_depth.
-    """
-    depths = compute_depths(G)
-    nodes_in_range = {node for node, depth in depths.items() if depth <= max_depth}
-    return G.subgraph(nodes_in_range).copy()
+from gomodgraph_layout import compute_layout
+from gomodgraph_metrics import read_node_sizes
+from gomodgraph_core import assign_color, load_graph, minimal_version_selection, print_version_report, FilterPipeline
 
 
 def simplify_label(module_name, package_prefix):
@@ -149,7 +45,8 @@ def simplify_label(module_name, package_prefix):
     return simplified
 
 
-def draw_and_save_graph_pyvis(G, nodes_defined, allowed_package_prefix, palette, output_filename:str, show_version):
+def draw_and_save_graph_pyvis(G, allowed_package_prefix, palette, output_filename:str, show_version, open_browser=True,
+                              node_colors=None, edge_colors=None, node_sizes=None):
     """
     Draws the graph using pyvis, creates an interactive HTML file.
     Each node is assigned a unique color.
@@ -157,11 +54,16 @@ def draw_and_save_graph_pyvis(G, nodes_defined, allowed_package_prefix, palette,
     
     Parameters:
         G: The filtered NetworkX graph.
-        nodes_defined: Mapping of original module names to safe IDs.
         allowed_package_prefix: The primary allowed package prefix (used for label simplification).
         palette: List of color names.
         output_filename: Path to the output HTML file.
         show_version: Boolean flag to include version text as tooltip for edges.
+        open_browser: Open the written file in a web browser. Pass False for batch jobs.
+        node_colors, edge_colors: Optional node -> color and (u, v) -> color mappings that
+                                  override the palette colors (e.g. to highlight a diff).
+        node_sizes: Optional node -> relative size in [0, 1] (see read_node_sizes in
+                    gomodgraph_metrics.py); nodes are then drawn as dots of radius 10 to 50
+                    with the label below.
     """
     # Set custom sizes to fill viewport.
     # SIZE_W= "500px" 
@@ -176,6 +78,8 @@ def draw_and_save_graph_pyvis(G, nodes_defined, allowed_package_prefix, palette,
     node_color_mapping = {}
     for node in G.nodes():
         node_color_mapping[node] = assign_color(node, palette)
+    if node_colors:
+        node_color_mapping.update(node_colors)
     
     # Add nodes to pyvis graph.
     for node in G.nodes():
@@ -185,14 +89,26 @@ def draw_and_save_graph_pyvis(G, nodes_defined, allowed_package_prefix, palette,
             # print(version_text)
             version = f"{version_text[:min(len(version_text), 10)]}\n"
         label = f"{version}{simplify_label(node, allowed_package_prefix)}"
-        net.add_node(node, label=label, title=label, color=node_color_mapping[node])
+        if node_sizes is not None:
+            net.add_node(node, label=label, title=label, color=node_color_mapping[node],
+                         shape="dot", size=10 + 40 * node_sizes.get(node, 0.0))
+        else:
+            net.add_node(node, label=label, title=label, color=node_color_mapping[node])
     # Add edges to pyvis graph.
-    for u, v in G.edges():
+    for u, v, data in G.edges(data=True):
         version = ""
         if show_version and "@" in v:
             version_text = v.split("@", 1)[1]
             version = version_text[:min(len(version_text), 10)]
-        net.add_edge(u, v, title=version, color=node_color_mapping.get(u, "black"))
+        edge_color = (edge_colors or {}).get((u, v)) or node_color_mapping.get(u, "black")
+        if "weight" in data:
+            # Aggregated edge of a --cluster summary: scale the width by the number of requirements.
+            net.add_edge(u, v, title=f"{data['weight']} requirements", color=edge_color, value=data["weight"])
+        elif data.get("indirect"):
+            # "// indirect" requirement (known when the graph was read from go.mod files).
+            net.add_edge(u, v, title=f"{version} (indirect)".strip(), color=edge_color, dashes=True)
+        else:
+            net.add_edge(u, v, title=version, color=edge_color)
     
     # Optionally, configure physics/layout options.
     net.toggle_physics(True)
@@ -216,8 +132,307 @@ def draw_and_save_graph_pyvis(G, nodes_defined, allowed_package_prefix, palette,
     }
     """)
     # Force use of the default HTML template by disabling notebook mode.
-    net.show(output_filename, notebook=False)
+    net.write_html(output_filename, notebook=False, open_browser=open_browser)
+    print(f"Graph saved as interactive HTML: {output_filename}")
+
+
+# Standalone page for --static-layout: the graph is embedded as compact arrays and expanded
+# into vis-network DataSets in the browser. Positions are fixed and physics is disabled.
+STATIC_HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<script src="__VIS_SCRIPT__"></script>
+<style>html, body { margin: 0; } #graph { width: 100dvw; height: 90dvh; }</style>
+</head>
+<body>
+<div id="graph"></div>
+<script>
+const D = __DATA__;
+const nodes = D.names.map((name, i) => {
+  const node = { id: i, label: D.labels[i], title: name, x: D.x[i], y: D.y[i], color: D.palette[D.colors[i]] };
+  if (D.sizes) { node.shape = "dot"; node.size = D.sizes[i]; }
+  return node;
+});
+const edges = [];
+for (let i = 0; i < D.edges.length; i += 2) {
+  const from = D.edges[i], to = D.edges[i + 1], k = i / 2;
+  const color = D.edgeColors ? D.edgeColors[k] : D.colors[from];
+  const edge = { from: from, to: to, arrows: "to", color: D.palette[color], title: D.versions ? D.versions[to] : undefined };
+  if (D.weights && D.weights[k] !== null) { edge.value = D.weights[k]; edge.title = D.weights[k] + " requirements"; }
+  else if (D.indirect && D.indirect[k]) { edge.dashes = true; edge.title = ((edge.title || "") + " (indirect)").trim(); }
+  edges.push(edge);
+}
+new vis.Network(document.getElementById("graph"),
+  { nodes: new vis.DataSet(nodes), edges: new vis.DataSet(edges) },
+  { physics: false, edges: { smooth: false }, interaction: { dragNodes: true, hideEdgesOnDrag: true } });
+</script>
+</body>
+</html>
+"""
+
+
+def draw_and_save_graph_pyvis_static(G, allowed_package_prefix, palette, output_filename:str, show_version, open_browser=True, layout_cache=True,
+                                     node_colors=None, edge_colors=None, node_sizes=None, layout_jobs=None):
+    """
+    Writes the graph as an interactive HTML file with a layout computed in Python.
+    Node positions come from Graphviz (or the spring layout fallback, see gomodgraph_layout.py)
+    and are embedded as fixed x/y coordinates with physics disabled, so the page opens without
+    any stabilization. Nodes and edges are emitted as compact arrays instead of one JSON
+    object per element, which keeps the file small for the full module graph.
+
+    Parameters are the same as for draw_and_save_graph_pyvis, plus:
+        layout_cache: Reuse (or warm start from) cached node positions.
+        layout_jobs: Number of processes for the per-component layout.
+    As in draw_and_save_graph_pyvis, node_colors/edge_colors override the palette colors,
+    node_sizes draws the nodes as sized dots, "// indirect" requirements are dashed and the
+    "weight" of aggregated --cluster edges sets their width.
+    """
+    nodes = list(G.nodes())
+    node_ids = {node: i for i, node in enumerate(nodes)}
+    pos = compute_layout(G, prog="dot", args="-Grankdir=LR",
+                         slot=output_filename.rsplit("/", 1)[-1].split(".html")[0], use_cache=layout_cache,
+                         jobs=layout_jobs)
+
+    # Scale the layout to pixel coordinates, about 150px per node along each axis.
+    coords = np.array([pos[node] for node in nodes], dtype=float).reshape(-1, 2)
+    if len(coords):
+        coords -= coords.min(axis=0)
+        span = float(coords.max()) or 1.0
+        coords *= 150.0 * np.sqrt(len(nodes)) / span
+        # Graphviz has y pointing up, the browser canvas has it pointing down.
+        coords[:, 1] = coords[:, 1].max() - coords[:, 1]
+
+    labels = []
+    versions = []
+    for node in nodes:
+        version_text = node.split("@", 1)[1][:10] if "@" in node else ""
+        versions.append(version_text)
+        version = f"{version_text}\n" if show_version and version_text else ""
+        labels.append(f"{version}{simplify_label(node, allowed_package_prefix)}")
+
+    # Colors are indices into the palette, which is extended by the override colors.
+    colors = list(palette)
+    color_ids = {color: i for i, color in enumerate(colors)}
+
+    def color_id(color):
+        if color not in color_ids:
+            color_ids[color] = len(colors)
+            colors.append(color)
+        return color_ids[color]
+
+    node_color_ids = [color_id((node_colors or {}).get(node) or assign_color(node, palette)) for node in nodes]
+    edge_list = list(G.edges(data=True))
+    data = {
+        "names": nodes,
+        "labels": labels,
+        "x": np.round(coords[:, 0]).astype(int).tolist(),
+        "y": np.round(coords[:, 1]).astype(int).tolist(),
+        "palette": colors,
+        "colors": node_color_ids,
+        "edges": [node_ids[n] for u, v, _ in edge_list for n in (u, v)],
+    }
+    if show_version:
+        data["versions"] = versions
+    if node_sizes is not None:
+        data["sizes"] = [round(10 + 40 * node_sizes.get(node, 0.0), 1) for node in nodes]
+    if edge_colors:
+        data["edgeColors"] = [color_id(edge_colors[(u, v)]) if (u, v) in edge_colors else node_color_ids[node_ids[u]]
+                              for u, v, _ in edge_list]
+    weights = [attrs.get("weight") for _, _, attrs in edge_list]
+    if any(weight is not None for weight in weights):
+        data["weights"] = weights
+    indirect = [1 if attrs.get("indirect") and "weight" not in attrs else 0 for _, _, attrs in edge_list]
+    if any(indirect):
+        data["indirect"] = indirect
+
+    heading = output_filename.rsplit("/", 1)[-1].split(".html")[0]
+    html = STATIC_HTML_TEMPLATE.replace("__TITLE__", heading).replace("__VIS_SCRIPT__", copy_vis_network(output_filename)).replace(
+        "__DATA__", json.dumps(data, separators=(",", ":")).replace("</", "<\\/"))
+    with open(output_filename, "w", encoding="utf-8") as f:
+        f.write(html)
     print(f"Graph saved as interactive HTML: {output_filename}")
+    if open_browser:
+        webbrowser.open(output_filename)
+
+
+# vis-network script bundled with pyvis, in the layout pyvis uses for cdn_resources="local".
+VIS_NETWORK_SCRIPT = "lib/vis-9.1.2/vis-network.min.js"
+
+
+def copy_vis_network(output_filename):
+    """
+    Copies pyvis' bundled vis-network script next to output_filename (unless it is already
+    there), so the page works offline like the default pyvis output.
+
+    Returns:
+        The script path relative to the HTML file, for the <script src>.
+    """
+    import pyvis
+
+    target = os.path.join(os.path.dirname(output_filename), *VIS_NETWORK_SCRIPT.split("/"))
+    if not os.path.exists(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(os.path.join(os.path.dirname(pyvis.__file__), "templates", *VIS_NETWORK_SCRIPT.split("/")), target)
+    return VIS_NETWORK_SCRIPT
+
+
+# Page for --progressive: only the roots and their direct dependencies are embedded. The
+# full graph lives in a sidecar index ("<output>.index.js", JSON wrapped in a callback so it
+# also loads from file:// without a server) that is loaded on the first click; clicking a
+# node then adds its dependencies to the view.
+PROGRESSIVE_HTML_TEMPLATE = r"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<script src="__VIS_SCRIPT__"></script>
+<style>html, body { margin: 0; } #graph { width: 100dvw; height: 90dvh; } #status { font: 12px sans-serif; padding: 4px; }</style>
+</head>
+<body>
+<div id="status">Click a module to show its dependencies.</div>
+<div id="graph"></div>
+<script>
+const START = __START__;
+const INDEX_FILE = __INDEX_FILE__;
+const SHOW_VERSION = __SHOW_VERSION__;
+const PALETTE = __PALETTE__;
+let index = null;
+let pending = [];
+
+function label(name) {
+  let [path, version] = name.split("@");
+  let simplified = path.replace(/^github\.com\//, "").replace(/^\/+|\/+$/g, "");
+  const slash = simplified.indexOf("/");
+  if (slash >= 0) simplified = simplified.slice(0, slash) + "\n" + simplified.slice(slash + 1);
+  return SHOW_VERSION && version ? version.slice(0, 10) + "\n" + simplified : simplified;
+}
+function nodeName(id) {
+  const path = index.paths[index.nodes[2 * id]], version = index.versions[index.nodes[2 * id + 1]];
+  return version ? path + "@" + version : path;
+}
+function makeNode(id, name, color) {
+  return { id: id, label: label(name), title: name, color: PALETTE[color] };
+}
+
+const nodes = new vis.DataSet(START.nodes.map(([id, name, color]) => makeNode(id, name, color)));
+const edges = new vis.DataSet();
+const colorOf = new Map(START.nodes.map(([id, name, color]) => [id, color]));
+for (let i = 0; i < START.edges.length; i += 2) {
+  edges.add({ id: START.edges[i] + ">" + START.edges[i + 1], from: START.edges[i], to: START.edges[i + 1], arrows: "to", color: PALETTE[colorOf.get(START.edges[i])] });
+}
+const network = new vis.Network(document.getElementById("graph"), { nodes: nodes, edges: edges },
+  { physics: { solver: "forceAtlas2Based", stabilization: { iterations: 100 } } });
+
+function expand(id) {
+  const status = document.getElementById("status");
+  let added = 0;
+  let target = 0;
+  for (let k = index.offsets[id]; k < index.offsets[id + 1]; k++) {
+    // Targets are delta-encoded per node.
+    target = k === index.offsets[id] ? index.targets[k] : target + index.targets[k];
+    if (!nodes.get(target)) {
+      nodes.add(makeNode(target, nodeName(target), Number(index.colors[target])));
+      added++;
+    }
+    const edgeId = id + ">" + target;
+    if (!edges.get(edgeId)) {
+      edges.add({ id: edgeId, from: id, to: target, arrows: "to", color: PALETTE[Number(index.colors[id])] });
+    }
+  }
+  status.textContent = nodeName(id) + ": " + (index.offsets[id + 1] - index.offsets[id]) +
+    " dependencies, " + added + " new (" + nodes.length + " of " + (index.offsets.length - 1) + " modules shown)";
+}
+function gomodgraphIndex(data) {
+  index = data;
+  pending.forEach(expand);
+  pending = [];
+}
+network.on("click", (params) => {
+  if (!params.nodes.length) return;
+  if (index) { expand(params.nodes[0]); return; }
+  pending.push(params.nodes[0]);
+  if (pending.length === 1) {
+    document.getElementById("status").textContent = "Loading index...";
+    const script = document.createElement("script");
+    script.src = INDEX_FILE;
+    document.body.appendChild(script);
+  }
+});
+</script>
+</body>
+</html>
+"""
+
+
+def draw_and_save_graph_pyvis_progressive(G, allowed_package_prefix, palette, output_filename:str, show_version, open_browser=True):
+    """
+    Writes an interactive HTML page that starts with only the root modules (no incoming edges)
+    and their direct dependencies, plus a sidecar index holding the whole graph as a
+    compressed adjacency list (interned path/version tables and delta-encoded CSR targets).
+    Clicking a node loads the index once and expands that node's dependencies, entirely
+    offline (vis-network is copied next to the page, see copy_vis_network), so the page loads immediately regardless of the total graph size.
+    allowed_package_prefix is unused: labels are simplified in the browser.
+    """
+    nodes = list(G.nodes())
+    node_ids = {node: i for i, node in enumerate(nodes)}
+    paths = {}
+    versions = {"": 0}
+    flat_nodes = []
+    for node in nodes:
+        path, _, version = node.partition("@")
+        flat_nodes.append(paths.setdefault(path, len(paths)))
+        flat_nodes.append(versions.setdefault(version, len(versions)))
+
+    offsets = [0]
+    targets = []
+    for node in nodes:
+        successors = sorted(node_ids[v] for v in G.successors(node))
+        # Delta-encode the sorted successors: small numbers compress far better in JSON.
+        targets.extend(b - a if i else b for i, (a, b) in enumerate(zip([0] + successors, successors)))
+        offsets.append(len(targets))
+
+    colors = [palette.index(assign_color(node, palette)) for node in nodes]
+    index = {
+        "paths": list(paths),
+        "versions": list(versions),
+        "nodes": flat_nodes,
+        "colors": "".join(str(c) for c in colors) if len(palette) <= 10 else colors,
+        "offsets": offsets,
+        "targets": targets,
+    }
+
+    roots = [node for node in nodes if G.in_degree(node) == 0] or nodes[:1]
+    start_nodes = dict.fromkeys(roots)
+    start_edges = []
+    for root in roots:
+        for v in G.successors(root):
+            start_nodes.setdefault(v)
+            start_edges.extend((node_ids[root], node_ids[v]))
+    start = {
+        "nodes": [[node_ids[node], node, colors[node_ids[node]]] for node in start_nodes],
+        "edges": start_edges,
+    }
+
+    base = output_filename[:-len(".html")] if output_filename.endswith(".html") else output_filename
+    index_filename = f"{base}.index.js"
+    with open(index_filename, "w", encoding="utf-8") as f:
+        f.write("gomodgraphIndex(" + json.dumps(index, separators=(",", ":")) + ");\n")
+
+    heading = output_filename.rsplit("/", 1)[-1].split(".html")[0]
+    html = (PROGRESSIVE_HTML_TEMPLATE
+            .replace("__TITLE__", heading)
+            .replace("__VIS_SCRIPT__", copy_vis_network(output_filename))
+            .replace("__START__", json.dumps(start, separators=(",", ":")).replace("</", "<\\/"))
+            .replace("__INDEX_FILE__", json.dumps(index_filename.rsplit("/", 1)[-1]))
+            .replace("__SHOW_VERSION__", "true" if show_version else "false")
+            .replace("__PALETTE__", json.dumps(list(palette))))
+    with open(output_filename, "w", encoding="utf-8") as f:
+        f.write(html)
+    print(f"Graph saved as interactive HTML: {output_filename} (index: {index_filename})")
+    if open_browser:
+        webbrowser.open(output_filename)
 
 
 def main():
@@ -225,23 +440,39 @@ def main():
         description="Filter a go-mod dependency graph by allowed package prefixes, hide certain packages, "
                     "optionally restrict maximum depth, remove isolated nodes, and output an interactive HTML visualization using pyvis."
     )
-    parser.add_argument("input", help="Input file containing go mod graph output")
+    parser.add_argument("input", help="Input file containing go mod graph output ('-' to read it from stdin)")
     parser.add_argument("output", help="Output HTML filename")
     parser.add_argument(
         "--packages",
         nargs="*",
         default=[],
-        help="Allowed package prefixes (e.g., 'github.com/containers'). Use '*' to allow all. If not provided, no filtering by package is applied."
+        help="Allowed package prefixes (e.g., 'github.com/containers'), matched per path segment; globs ('golang.org/x/*') and 're:' regexes are supported. Use '*' to allow all. If not provided, no filtering by package is applied."
     )
     parser.add_argument(
         "--hide-packages",
         nargs="*",
         default=[],
-        help="Package prefixes to hide (e.g., 'github.com/containers/vendor')."
+        help="Package prefixes to hide (e.g., 'github.com/containers/vendor'). Same syntax as --packages."
     )
     parser.add_argument("--remove-isolated", action="store_true", help="Remove nodes with no edges")
     parser.add_argument("--max-depth", type=int, default=None, help="Maximum dependency depth to include (default: include all depths)")
     parser.add_argument("--show-version", action="store_true", help="Display version text on edges")
+    parser.add_argument("--mvs", action="store_true", help="Keep only the version of each module selected by Go's Minimal Version Selection")
+    parser.add_argument("--mvs-report", action="store_true", help="With --mvs, print how many versions were pruned per module")
+    html_mode = parser.add_mutually_exclusive_group()
+    html_mode.add_argument("--static-layout", action="store_true", help="Compute the layout in Python, embed fixed positions and disable physics (opens instantly, smaller file)")
+    html_mode.add_argument("--progressive", action="store_true", help="Start with the root module and its direct dependencies and expand neighbours on click from a sidecar index")
+    parser.add_argument("--no-layout-cache", action="store_true", help="With --static-layout, always compute the layout from scratch")
+    parser.add_argument("--headless", action="store_true", help="Only write the HTML file, do not open a browser")
+    parser.add_argument("--condense", action="store_true", help="Collapse every dependency cycle (strongly connected component) into one node")
+    parser.add_argument("--transitive-reduction", action="store_true", help="Drop edges implied by longer dependency paths (reachability is unchanged)")
+    parser.add_argument("--cluster", action="store_true", help="Collapse each community of the filtered graph (Louvain) into one super-node")
+    parser.add_argument("--cluster-resolution", type=float, default=1.0, help="With --cluster, higher values give more, smaller clusters (default: 1.0)")
+    parser.add_argument("--expand-cluster", nargs="*", default=[], help="With --cluster, keep the clusters containing these modules expanded (same syntax as --packages)")
+    parser.add_argument("--node-sizes", metavar="METRICS_CSV", default=None, help="Size the nodes by a column of a gomodgraph.metrics.py --output file")
+    parser.add_argument("--size-column", default="betweenness", help="Metrics column used by --node-sizes (default: betweenness)")
+    parser.add_argument("--no-cache", action="store_true", help="Re-parse the input instead of using the binary graph cache next to it")
+    parser.add_argument("--from-command", metavar="CMD", default=None, help="Stream the graph from the output of CMD (e.g. 'go mod graph') instead of the input file; pass '-' as input")
     args = parser.parse_args()
 
     # Allowed packages: if not provided, default to ["*"] to allow all.
@@ -249,26 +480,48 @@ def main():
     allow_all = ("*" in package_list)
     # Use the first package prefix for label simplification.
     allowed_package_prefix = package_list[0] if not allow_all else ""
-    allowed_safe_prefixes = [] if allow_all else [safe_prefix(pkg) for pkg in package_list]
-
-    # Process hidden package prefixes.
-    hidden_safe_prefixes = [safe_prefix(h) for h in args.hide_packages] if args.hide_packages else []
 
     palette = ["green", "red", "orange", "purple", "brown", "olive", "teal", "maroon"]
 
     # Build and filter the dependency graph.
-    G, nodes_defined = build_graph(args.input)
-    G_filtered = filter_graph_by_packages(G, nodes_defined, allowed_safe_prefixes, hidden_safe_prefixes, allow_all=allow_all)
+    graph = load_graph(args.input, use_cache=not args.no_cache, from_command=args.from_command)
+    if args.mvs:
+        graph, pruned = minimal_version_selection(graph)
+        if args.mvs_report:
+            print_version_report(pruned)
+    pipeline = FilterPipeline(graph).packages(package_list, args.hide_packages, allow_all=allow_all)
     
     if args.max_depth is not None:
-        G_filtered = filter_graph_by_max_depth(G_filtered, args.max_depth)
+        pipeline.max_depth(args.max_depth)
     if args.remove_isolated:
-        isolates = list(nx.isolates(G_filtered))
-        if isolates:
-            G_filtered.remove_nodes_from(isolates)
+        pipeline.remove_isolated()
+    if args.transitive_reduction:
+        pipeline.transitive_reduction()
+    if args.condense:
+        pipeline.condense()
+    if args.cluster:
+        pipeline.cluster(args.cluster_resolution, args.expand_cluster)
+    G_filtered = pipeline.materialize()
     
     # Visualize and save the graph with pyvis.
-    draw_and_save_graph_pyvis(G_filtered, nodes_defined, allowed_package_prefix, palette, args.output, args.show_version)
+    node_sizes = None
+    if args.node_sizes:
+        try:
+            node_sizes = read_node_sizes(args.node_sizes, args.size_column)
+        except (OSError, KeyError) as e:
+            sys.stderr.write(f"Error reading metrics file {args.node_sizes}: {e}\n")
+            sys.exit(1)
+    if args.progressive:
+        draw_and_save_graph_pyvis_progressive(G_filtered, allowed_package_prefix, palette, args.output, args.show_version,
+                                              open_browser=not args.headless)
+        return
+    if args.static_layout:
+        draw_and_save_graph_pyvis_static(G_filtered, allowed_package_prefix, palette, args.output, args.show_version,
+                                         open_browser=not args.headless, layout_cache=not args.no_layout_cache,
+                                         node_sizes=node_sizes)
+        return
+    draw_and_save_graph_pyvis(G_filtered, allowed_package_prefix, palette, args.output, args.show_version,
+                              open_browser=not args.headless, node_sizes=node_sizes)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+This script answers dependency questions about a go-mod dependency graph file:
+  - dependents:   every module that (transitively) requires the given module,
+  - dependencies: every module the given module (transitively) requires,
+  - why:          the shortest requirement chain from the main module to the given module.
+
+Modules can be given as "module@version" or as a bare module path, which matches all of its
+versions. The graph is preprocessed once into a condensation DAG with reachability bitsets
+(see gomodgraph_index.py), so every query after that is answered from the index.
+
+Usage:
+    python3 gomodgraph.query.py go_mod_graph.txt {dependents,dependencies,why} MODULE [MODULE ...] [--from MODULE] [--json]
+Example:
+    python3 gomodgraph.query.py go_mod_graph.txt why golang.org/x/sys
+    python3 gomodgraph.query.py go_mod_graph.txt dependents github.com/containers/storage --json
+"""
+
+import sys
+import json
+import argparse
+import numpy as np
+from gomodgraph_core import load_graph
+from gomodgraph_index import ReachabilityIndex
+
+
+def run_query(graph, index, query, module, root):
+    """
+    Runs a single query and returns a JSON-serialisable result dictionary.
+    """
+    nodes = graph.find(module)
+    result = {"query": query, "module": module, "matches": [graph.names[n] for n in nodes]}
+    if not nodes:
+        result["error"] = f"module not found: {module}"
+        return result
+    if query == "dependents":
+        result["result"] = sorted(graph.names[n] for n in np.flatnonzero(index.dependents(nodes)))
+    elif query == "dependencies":
+        result["result"] = sorted(graph.names[n] for n in np.flatnonzero(index.dependencies(nodes)))
+    elif query == "why":
+        result["from"] = graph.names[root]
+        chain = index.shortest_chain(root, nodes)
+        result["result"] = [graph.names[n] for n in chain] if chain is not None else None
+    return result
+
+
+def format_result(result):
+    """Formats a query result as plain text."""
+    if "error" in result:
+        return f"{result['query']} {result['module']}: {result['error']}"
+    lines = []
+    if result["query"] == "why":
+        if result["result"] is None:
+            lines.append(f"{result['module']} is not required by {result['from']}")
+        else:
+            lines.append(f"why {result['module']}:")
+            lines.append(f"  {result['result'][0]}")
+            lines.extend(f"  -> {name}" for name in result["result"][1:])
+    else:
+        lines.append(f"{result['query']} of {result['module']} ({len(result['result'])}):")
+        lines.extend(f"  {name}" for name in result["result"])
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Query dependents, dependencies and requirement chains of modules in a go-mod dependency graph."
+    )
+    parser.add_argument("input", help="Input file containing go mod graph output ('-' to read it from stdin)")
+    parser.add_argument("query", choices=["dependents", "dependencies", "why"], help="Query to run")
+    parser.add_argument("modules", nargs="+", help="Modules to query ('module@version' or a module path for all versions)")
+    parser.add_argument("--from", dest="root", default=None,
+                        help="Start module for 'why' (default: the main module, i.e. the first module in the input)")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    parser.add_argument("--no-cache", action="store_true", help="Re-parse the input instead of using the binary graph cache next to it")
+    parser.add_argument("--from-command", metavar="CMD", default=None, help="Stream the graph from the output of CMD (e.g. 'go mod graph') instead of the input file; pass '-' as input")
+    args = parser.parse_args()
+
+    try:
+        graph = load_graph(args.input, use_cache=not args.no_cache, from_command=args.from_command)
+    except Exception as e:
+        sys.stderr.write(f"Error reading file {args.input}: {e}\n")
+        sys.exit(1)
+    if graph.num_nodes == 0:
+        sys.stderr.write(f"No modules found in {args.input}\n")
+        sys.exit(1)
+
+    root = 0
+    if args.root is not None:
+        roots = graph.find(args.root)
+        if not roots:
+            sys.stderr.write(f"Start module not found: {args.root}\n")
+            sys.exit(1)
+        root = roots[0]
+
+    index = ReachabilityIndex(graph)
+    results = [run_query(graph, index, args.query, module, root) for module in args.modules]
+
+    if args.json:
+        print(json.dumps(results if len(results) > 1 else results[0], indent=2))
+    else:
+        print("\n\n".join(format_result(result) for result in results))
+    if any("error" in result for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
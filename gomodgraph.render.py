@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+This script parses and filters a go-mod dependency graph file once and writes the same
+filtered view in any combination of output formats:
+  --png / --svg   matplotlib drawing (gomodgraph.networkx.py), laid out once for both files
+  --html          interactive pyvis HTML (gomodgraph.pyvis.py), --static-layout for fixed positions,
+                  --progressive to expand neighbours on click
+  --puml          PlantUML component diagram (gomodgraph.plantuml.py)
+  --mermaid       Mermaid flowchart (gomodgraph.mermaid.py)
+
+Rendering is strictly headless (matplotlib's Agg backend, no browser or plot window), so it
+is safe for batch jobs. The emitters run concurrently in a process pool; use --jobs 1 to run
+them one after another.
+
+With --per-org (every organisation of the graph, e.g. github.com/containers or golang.org/x)
+or --org-set ORG ... the run fans out to one set of output files per organisation: the input
+is parsed, the --packages/--hide-packages masks and the organisation index are computed once,
+and the organisations are rendered in a process pool that receives the graph once per worker.
+The largest organisations are started first, so the run takes about as long as the largest
+single render. Output names get the organisation inserted ("gomod.png" ->
+"gomod_github_com_containers.png"), or replace an "{org}" placeholder.
+
+Usage:
+    python3 gomodgraph.render.py go_mod_graph.txt --packages github.com/containers [--hide-packages ...] [--remove-isolated] [--max-depth=N] [--show-version] [--png out.png] [--svg out.svg] [--html out.html] [--puml out.puml] [--mermaid out.mmd]
+Example:
+    python3 gomodgraph.render.py go_mod_graph.txt --packages github.com/containers --remove-isolated --max-depth=3 --png gomod.png --html gomod.html --puml gomod.puml
+    go mod graph | python3 gomodgraph.render.py - --packages github.com/containers --mermaid gomod.md
+    python3 gomodgraph.render.py - --from-command "go mod graph" --packages github.com/containers --png gomod.png
+    python3 gomodgraph.render.py ../podman --mvs --direct-only --packages github.com/containers --puml gomod.puml
+    python3 gomodgraph.render.py go_mod_graph.txt --per-org --remove-isolated --png out/{org}.png --puml out/{org}.puml
+    python3 gomodgraph.render.py go_mod_graph.txt --org-set github.com/containers github.com/opencontainers golang.org/x --svg gomod.svg
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+# Never open a plot window, also not in the worker processes.
+os.environ["MPLBACKEND"] = "Agg"
+
+from gomodgraph_core import (import_script, load_graph, minimal_version_selection, print_version_report, FilterPipeline,
+                             filter_graph_by_packages, org_index, safe_prefix)
+
+PALETTE = ["green", "red", "orange", "purple", "brown", "olive", "teal", "maroon"]
+
+# Shared read-only data of the --per-org worker processes, set once per process by _init_worker.
+_worker_data = None
+
+
+def emit_image(G, output_filenames, package_prefix, show_version, layout_jobs=None):
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+    module = import_script("gomodgraph.networkx.py")
+    module.draw_and_save_graph(G, package_prefix, PALETTE, output_filenames, show_version, show=False,
+                               layout_jobs=layout_jobs)
+
+
+def emit_html(G, output_filename, package_prefix, show_version, static_layout=False, progressive=False,
+              layout_jobs=None):
+    module = import_script("gomodgraph.pyvis.py")
+    if progressive:
+        module.draw_and_save_graph_pyvis_progressive(G, package_prefix, PALETTE, output_filename, show_version, open_browser=False)
+    elif static_layout:
+        module.draw_and_save_graph_pyvis_static(G, package_prefix, PALETTE, output_filename, show_version, open_browser=False,
+                                                layout_jobs=layout_jobs)
+    else:
+        module.draw_and_save_graph_pyvis(G, package_prefix, PALETTE, output_filename, show_version, open_browser=False)
+
+
+def emit_plantuml(G, output_filename, package_prefix, show_version):
+    module = import_script("gomodgraph.plantuml.py")
+    module.draw_and_save_graph_plantuml(G, package_prefix, output_filename, show_version)
+
+
+def emit_mermaid(G, output_filename, package_prefix, show_version):
+    module = import_script("gomodgraph.mermaid.py")
+    module.draw_and_save_graph_mermaid(G, output_filename, show_version)
+
+
+def run_emitters(tasks, jobs):
+    """
+    Runs (emitter, G, output, package_prefix, show_version) tasks, concurrently in separate
+    processes if jobs > 1. Each emitter only touches its own output file.
+    """
+    if jobs <= 1 or len(tasks) <= 1:
+        for emitter, *task_args in tasks:
+            emitter(*task_args)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(emitter, *task_args) for emitter, *task_args in tasks]
+        for future in futures:
+            future.result()
+
+
+def add_filter_stages(pipeline, args):
+    """Appends the stages selected on the command line after the package filter."""
+    if args.max_depth is not None:
+        pipeline.max_depth(args.max_depth)
+    if args.direct_only:
+        pipeline.direct_only()
+    if args.remove_isolated:
+        pipeline.remove_isolated()
+    if args.transitive_reduction:
+        pipeline.transitive_reduction()
+    if args.condense:
+        pipeline.condense()
+    if args.cluster:
+        pipeline.cluster(args.cluster_resolution, args.expand_cluster)
+    return pipeline
+
+
+def emitter_tasks(G, outputs, package_prefix, args, layout_jobs=None):
+    """
+    Returns the run_emitters tasks for outputs, a dict of output option -> filename(s).
+    layout_jobs is the number of processes each layout may use (default: see full_layout in
+    gomodgraph_layout.py).
+    """
+    tasks = []
+    if outputs.get("images"):
+        tasks.append((partial(emit_image, layout_jobs=layout_jobs), G, outputs["images"], package_prefix, args.show_version))
+    if outputs.get("html"):
+        tasks.append((partial(emit_html, static_layout=args.static_layout, progressive=args.progressive,
+                              layout_jobs=layout_jobs), G, outputs["html"], package_prefix, args.show_version))
+    if outputs.get("puml"):
+        tasks.append((emit_plantuml, G, outputs["puml"], package_prefix, args.show_version))
+    if outputs.get("mermaid"):
+        tasks.append((emit_mermaid, G, outputs["mermaid"], package_prefix, args.show_version))
+    return tasks
+
+
+def org_filename(filename, org):
+    """Inserts the organisation into an output filename ("{org}" placeholder or before the extension)."""
+    name = safe_prefix(org)
+    if "{org}" in filename:
+        return filename.replace("{org}", name)
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}_{name}{ext}"
+
+
+def _init_worker(graph, base_mask, org_of, args, layout_jobs):
+    global _worker_data
+    _worker_data = (graph, base_mask, org_of, args, layout_jobs)
+
+
+def render_org(org_id, org, outputs):
+    """
+    Worker: filters and renders the subgraph of one organisation (nothing is written if the
+    filters leave it empty). The emitters run one after another, the organisations are what
+    runs in parallel. A failing organisation is reported instead of stopping the others.
+
+    Returns:
+        (org, number of nodes, number of edges, error message or None)
+    """
+    graph, base_mask, org_of, args, layout_jobs = _worker_data
+    pipeline = FilterPipeline(graph).restrict(base_mask & (org_of == org_id), f"org={org}")
+    try:
+        G = add_filter_stages(pipeline, args).materialize()
+    except Exception as e:
+        return org, 0, 0, f"{type(e).__name__}: {e}"
+    try:
+        if G.number_of_nodes():
+            run_emitters(emitter_tasks(G, outputs, org, args, layout_jobs), 1)
+    except Exception as e:
+        return org, G.number_of_nodes(), G.number_of_edges(), f"{type(e).__name__}: {e}"
+    return org, G.number_of_nodes(), G.number_of_edges(), None
+
+
+def render_per_org(graph, base_mask, args, outputs, jobs):
+    """
+    Renders every organisation (args.org_set, or all of the graph) with nodes in base_mask,
+    largest first, in a process pool sharing the graph.
+    """
+    orgs, org_of = org_index(graph, args.org_set)
+    sizes = np.bincount(org_of[base_mask & (org_of >= 0)], minlength=len(orgs))
+    order = [org_id for org_id in np.argsort(-sizes, kind="stable").tolist() if sizes[org_id] > 0]
+    for org_id, org in enumerate(orgs):
+        if not sizes[org_id]:
+            sys.stderr.write(f"No modules of organisation {org}, skipped\n")
+    tasks = []
+    for org_id in order:
+        org_outputs = {key: [org_filename(f, orgs[org_id]) for f in value] if key == "images"
+                       else org_filename(value, orgs[org_id]) for key, value in outputs.items() if value}
+        tasks.append((org_id, orgs[org_id], org_outputs))
+        for value in org_outputs.values():
+            for filename in value if isinstance(value, list) else [value]:
+                os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+
+    start = time.perf_counter()
+    jobs = max(1, min(jobs, len(tasks)))
+    # The organisations share the CPUs, their layouts must not start a pool of all CPUs each.
+    initargs = (graph, base_mask, org_of, args, max(1, (os.cpu_count() or 1) // jobs))
+    if jobs == 1:
+        _init_worker(*initargs)
+        results = [render_org(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=initargs) as pool:
+            futures = [pool.submit(render_org, *task) for task in tasks]
+            results = [future.result() for future in futures]
+    rendered = failed = 0
+    for (org, nodes, edges, error), (_, _, org_outputs) in zip(results, tasks):
+        if error is not None:
+            sys.stderr.write(f"Error rendering organisation {org}: {error}\n")
+            failed += 1
+            continue
+        if not nodes:
+            continue
+        rendered += 1
+        files = [f for value in org_outputs.values() for f in (value if isinstance(value, list) else [value])]
+        print(f"{org} ({nodes} nodes, {edges} edges) saved: {', '.join(files)}")
+    print(f"{rendered} organisations rendered ({len(results) - rendered - failed} empty after filtering, {failed} failed) "
+          f"in {time.perf_counter() - start:.2f}s with {jobs} processes")
+    if failed:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Filter a go-mod dependency graph once and render it to several output formats headlessly."
+    )
+    parser.add_argument("input", help="Input file containing go mod graph output ('-' to read it from stdin), or a Go module directory / go.mod to read natively")
+    parser.add_argument(
+        "--packages",
+        nargs="*",
+        default=[],
+        help="Allowed package prefixes (e.g., 'github.com/containers'), matched per path segment; globs ('golang.org/x/*') and 're:' regexes are supported. Use '*' to allow all."
+    )
+    parser.add_argument(
+        "--hide-packages",
+        nargs="*",
+        default=[],
+        help="Package prefixes to hide (e.g., 'github.com/containers/vendor'). Same syntax as --packages."
+    )
+    parser.add_argument("--remove-isolated", action="store_true", help="Remove nodes with no edges")
+    parser.add_argument("--max-depth", type=int, default=None, help="Maximum dependency depth to include")
+    parser.add_argument("--show-version", action="store_true", help="Display version text on nodes/edges")
+    parser.add_argument("--mvs", action="store_true", help="Keep only the version of each module selected by Go's Minimal Version Selection")
+    parser.add_argument("--mvs-report", action="store_true", help="With --mvs, print how many versions were pruned per module")
+    parser.add_argument("--direct-only", action="store_true", help="Drop '// indirect' requirements (only known when reading a Go module directory natively)")
+    parser.add_argument("--condense", action="store_true", help="Collapse every dependency cycle (strongly connected component) into one node")
+    parser.add_argument("--transitive-reduction", action="store_true", help="Drop edges implied by longer dependency paths (reachability is unchanged)")
+    parser.add_argument("--cluster", action="store_true", help="Collapse each community of the filtered graph (Louvain) into one super-node")
+    parser.add_argument("--cluster-resolution", type=float, default=1.0, help="With --cluster, higher values give more, smaller clusters (default: 1.0)")
+    parser.add_argument("--expand-cluster", nargs="*", default=[], help="With --cluster, keep the clusters containing these modules expanded (same syntax as --packages)")
+    parser.add_argument("--no-cache", action="store_true", help="Re-parse the input instead of using the binary graph cache next to it")
+    parser.add_argument("--from-command", metavar="CMD", default=None, help="Stream the graph from the output of CMD (e.g. 'go mod graph') instead of the input file; pass '-' as input")
+    parser.add_argument("--png", help="Output PNG filename")
+    parser.add_argument("--svg", help="Output SVG filename")
+    parser.add_argument("--html", help="Output pyvis HTML filename")
+    html_mode = parser.add_mutually_exclusive_group()
+    html_mode.add_argument("--static-layout", action="store_true", help="For --html, embed a layout computed in Python and disable physics")
+    html_mode.add_argument("--progressive", action="store_true", help="For --html, start with the root module and load neighbours on click from a sidecar index")
+    parser.add_argument("--puml", help="Output PlantUML filename")
+    parser.add_argument("--mermaid", help="Output Mermaid filename (.mmd, or .md for a fenced block)")
+    parser.add_argument("--per-org", action="store_true", help="Write one set of output files per organisation of the graph (see --org-set)")
+    parser.add_argument("--org-set", nargs="+", default=None, metavar="ORG", help="Write one set of output files per given organisation prefix (e.g. github.com/containers golang.org/x)")
+    parser.add_argument("--jobs", type=int, default=None, help="Number of emitter processes (default: one per output format; with --per-org/--org-set: number of CPUs)")
+    args = parser.parse_args()
+
+    images = [f for f in (args.png, args.svg) if f]
+    if not (images or args.html or args.puml or args.mermaid):
+        parser.error("no output requested (use --png, --svg, --html, --puml and/or --mermaid)")
+
+    package_list = args.packages if args.packages else ["*"]
+    allow_all = ("*" in package_list)
+    package_prefix = package_list[0] if not allow_all else ""
+
+    try:
+        graph = load_graph(args.input, use_cache=not args.no_cache, from_command=args.from_command)
+    except Exception as e:
+        sys.stderr.write(f"Error reading file {args.input}: {e}\n")
+        sys.exit(1)
+    if args.mvs:
+        graph, pruned = minimal_version_selection(graph)
+        if args.mvs_report:
+            print_version_report(pruned)
+
+    outputs = {"images": images, "html": args.html, "puml": args.puml, "mermaid": args.mermaid}
+    if args.per_org or args.org_set:
+        # Computed once here; the workers only intersect it with their organisation.
+        base_mask = filter_graph_by_packages(graph, package_list, args.hide_packages, allow_all=allow_all)
+        render_per_org(graph, base_mask, args, outputs, args.jobs or os.cpu_count() or 1)
+        return
+
+    pipeline = FilterPipeline(graph).packages(package_list, args.hide_packages, allow_all=allow_all)
+    G_filtered = add_filter_stages(pipeline, args).materialize()
+
+    formats = sum(1 for value in outputs.values() if value)
+    jobs = args.jobs if args.jobs is not None else min(formats, os.cpu_count() or 1)
+    # Concurrent emitters share the CPUs between their layouts.
+    layout_jobs = max(1, (os.cpu_count() or 1) // min(jobs, formats)) if jobs > 1 and formats > 1 else None
+    tasks = emitter_tasks(G_filtered, outputs, package_prefix, args, layout_jobs)
+    try:
+        run_emitters(tasks, jobs)
+    except OSError as e:
+        sys.stderr.write(f"Error writing {e.filename}: {e}\n")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+This script renders a (filtered) go-mod dependency graph as a deep-zoom tile pyramid with a
+small offline HTML viewer, for graphs too large to read as a single image (podman_full.png).
+
+The layout is computed once (see gomodgraph_layout.py) and rasterized into square tiles of
+256 pixels: level 0 shows the whole graph in one tile, every further level doubles the
+resolution. Only tiles that contain a node, an edge or a label are rendered, in parallel
+worker processes. Module labels are only drawn from the level on where nodes are large
+enough to read them (--label-level).
+
+The output directory contains tiles/<level>/<x>/<y>.png and index.html. The viewer needs no
+server or network access; it loads only the tiles in view, so it stays fast at any size.
+Drag to pan, use the mouse wheel (or + and -) to zoom.
+
+Usage:
+    python3 gomodgraph.tiles.py go_mod_graph.txt output_dir [--packages ...] [--hide-packages ...] [--remove-isolated] [--max-depth=N] [--mvs] [--max-level N] [--label-level N] [--jobs N]
+Example:
+    python3 gomodgraph.tiles.py go_mod_graph.txt podman_full_tiles --mvs --remove-isolated
+"""
+
+import os
+import sys
+import json
+import math
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+# Never open a plot window, also not in the worker processes.
+os.environ["MPLBACKEND"] = "Agg"
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import EllipseCollection, LineCollection, PolyCollection
+from matplotlib.colors import to_rgba
+from gomodgraph_layout import compute_layout
+from gomodgraph_core import assign_color, import_script, load_graph, minimal_version_selection, FilterPipeline
+
+PALETTE = ["green", "red", "orange", "purple", "brown", "olive", "teal", "maroon"]
+
+TILE_SIZE = 256
+
+# Node radius in layout units (Graphviz points).
+NODE_RADIUS = 18.0
+
+# Node radius in pixels from which labels are drawn, and at the deepest level by default.
+LABEL_MIN_RADIUS_PX = 12.0
+MAX_LEVEL_RADIUS_PX = 32.0
+
+# Tile geometry and drawing data of the worker processes, set by _init_worker.
+_scene = None
+_figure = None
+
+
+def build_scene(G, pos, package_prefix, labels_from):
+    """
+    Returns the drawing data of the graph in layout coordinates: node positions, colors and
+    labels, and edges trimmed to the node borders with an arrowhead polygon each.
+    """
+    networkx_script = import_script("gomodgraph.networkx.py")
+    nodes = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    xy = np.array([pos[node] for node in nodes], dtype=float).reshape(-1, 2)
+    colors = np.array([to_rgba(assign_color(node, PALETTE)) for node in nodes]).reshape(-1, 4)
+    labels = [networkx_script.simplify_label(node, package_prefix) for node in nodes]
+
+    pairs = np.array([(index[u], index[v]) for u, v in G.edges() if u != v], dtype=np.int64).reshape(-1, 2)
+    src, tgt = xy[pairs[:, 0]], xy[pairs[:, 1]]
+    vec = tgt - src
+    length = np.linalg.norm(vec, axis=1)
+    keep = length > 2 * NODE_RADIUS
+    pairs, src, tgt, vec, length = pairs[keep], src[keep], tgt[keep], vec[keep], length[keep]
+    unit = vec / length[:, None]
+    start = src + unit * NODE_RADIUS
+    end = tgt - unit * NODE_RADIUS
+    # Arrowhead: a triangle with its tip on the target's border.
+    normal = np.stack([-unit[:, 1], unit[:, 0]], axis=1)
+    base = end - unit * NODE_RADIUS * 0.6
+    heads = np.stack([end, base + normal * NODE_RADIUS * 0.3, base - normal * NODE_RADIUS * 0.3], axis=1)
+    return {
+        "xy": xy,
+        "colors": colors,
+        "labels": labels,
+        "segments": np.stack([start, end], axis=1),
+        "heads": heads,
+        "edge_colors": colors[pairs[:, 0]],
+        "labels_from": labels_from,
+    }
+
+
+def pyramid_geometry(xy, tile_size=TILE_SIZE):
+    """Returns (left, top, span): the square of layout coordinates covered by level 0."""
+    margin = NODE_RADIUS * 4
+    if len(xy) == 0:
+        return 0.0, 0.0, 1.0
+    lo = xy.min(axis=0) - margin
+    hi = xy.max(axis=0) + margin
+    span = float(max(hi - lo))
+    # Center the graph in the square.
+    left = float((lo[0] + hi[0]) / 2 - span / 2)
+    top = float((lo[1] + hi[1]) / 2 + span / 2)
+    return left, top, span
+
+
+def default_levels(span, tile_size=TILE_SIZE):
+    """Returns (max_level, label_level) from the node radius in pixels per level."""
+    def level_for(radius_px):
+        return max(0, math.ceil(math.log2(radius_px * span / (NODE_RADIUS * tile_size))))
+    return min(level_for(MAX_LEVEL_RADIUS_PX), 12), level_for(LABEL_MIN_RADIUS_PX)
+
+
+def needed_tiles(scene, geometry, level, tile_size=TILE_SIZE):
+    """Returns the sorted (x, y) indices of the tiles of a level with something to draw."""
+    left, top, span = geometry
+    n = 2 ** level
+    tile_world = span / n
+    reach = NODE_RADIUS * (4 if level >= scene["labels_from"] else 1)
+    tiles = set()
+
+    def add_boxes(x0, y0, x1, y1):
+        # Tile ranges of the boxes [x0, x1] x [y0, y1] (y upwards in layout coordinates).
+        cx0 = np.clip(((x0 - left) // tile_world).astype(np.int64), 0, n - 1)
+        cx1 = np.clip(((x1 - left) // tile_world).astype(np.int64), 0, n - 1)
+        cy0 = np.clip(((top - y1) // tile_world).astype(np.int64), 0, n - 1)
+        cy1 = np.clip(((top - y0) // tile_world).astype(np.int64), 0, n - 1)
+        for a, b, c, d in zip(cx0.tolist(), cx1.tolist(), cy0.tolist(), cy1.tolist()):
+            for x in range(a, b + 1):
+                for y in range(c, d + 1):
+                    tiles.add((x, y))
+
+    xy = scene["xy"]
+    if len(xy):
+        add_boxes(xy[:, 0] - reach, xy[:, 1] - reach, xy[:, 0] + reach, xy[:, 1] + reach)
+    segments = scene["segments"]
+    if len(segments):
+        # Sample every edge at a quarter of the tile size so no crossed tile is missed.
+        length = np.linalg.norm(segments[:, 1] - segments[:, 0], axis=1)
+        steps = np.ceil(length / (tile_world / 4)).astype(np.int64) + 1
+        which = np.repeat(np.arange(len(segments)), steps)
+        offsets = np.arange(len(which)) - np.repeat(np.cumsum(steps) - steps, steps)
+        t = (offsets / np.maximum(steps[which] - 1, 1))[:, None]
+        points = segments[which, 0] + (segments[which, 1] - segments[which, 0]) * t
+        cells = np.stack([np.clip(((points[:, 0] - left) // tile_world).astype(np.int64), 0, n - 1),
+                          np.clip(((top - points[:, 1]) // tile_world).astype(np.int64), 0, n - 1)], axis=1)
+        tiles.update(map(tuple, np.unique(cells, axis=0).tolist()))
+    return sorted(tiles)
+
+
+def _init_worker(scene, geometry, output_dir, tile_size):
+    global _scene
+    _scene = (scene, geometry, output_dir, tile_size)
+
+
+def render_tiles(tiles):
+    """Renders a list of (level, x, y) tiles with the worker's scene. Returns the count."""
+    global _figure
+    scene, (left, top, span), output_dir, tile_size = _scene
+    if _figure is None:
+        figure = Figure(figsize=(tile_size / 72.0, tile_size / 72.0), dpi=72)
+        FigureCanvasAgg(figure)
+        _figure = (figure, figure.add_axes([0, 0, 1, 1]))
+    figure, ax = _figure
+
+    xy, segments, heads = scene["xy"], scene["segments"], scene["heads"]
+    for level, x, y in tiles:
+        tile_world = span / 2 ** level
+        x0, x1 = left + x * tile_world, left + (x + 1) * tile_world
+        y1, y0 = top - y * tile_world, top - (y + 1) * tile_world
+        scale = tile_size / tile_world
+        show_labels = level >= scene["labels_from"]
+        reach = NODE_RADIUS * (4 if show_labels else 1)
+
+        ax.clear()
+        ax.set_axis_off()
+        ax.set_xlim(x0, x1)
+        ax.set_ylim(y0, y1)
+
+        if len(segments):
+            lo = segments.min(axis=1)
+            hi = segments.max(axis=1)
+            visible = (hi[:, 0] >= x0) & (lo[:, 0] <= x1) & (hi[:, 1] >= y0) & (lo[:, 1] <= y1)
+            if visible.any():
+                width = float(np.clip(NODE_RADIUS * scale * 0.08, 0.3, 2.0))
+                edge_colors = scene["edge_colors"][visible].copy()
+                edge_colors[:, 3] = 0.6
+                ax.add_collection(LineCollection(segments[visible], colors=edge_colors, linewidths=width, zorder=1),
+                                  autolim=False)
+                ax.add_collection(PolyCollection(heads[visible], facecolors=edge_colors, edgecolors="none", zorder=1),
+                                  autolim=False)
+
+        near = ((xy[:, 0] >= x0 - reach) & (xy[:, 0] <= x1 + reach) &
+                (xy[:, 1] >= y0 - reach) & (xy[:, 1] <= y1 + reach))
+        if near.any():
+            diameter = np.full(int(near.sum()), 2 * NODE_RADIUS)
+            ax.add_collection(EllipseCollection(diameter, diameter, np.zeros_like(diameter), units="xy",
+                                                offsets=xy[near], offset_transform=ax.transData,
+                                                facecolors=scene["colors"][near], edgecolors="white",
+                                                linewidths=0.5, zorder=2), autolim=False)
+            if show_labels:
+                font_size = min(14.0, NODE_RADIUS * scale * 0.45)
+                for i in np.flatnonzero(near).tolist():
+                    ax.text(xy[i, 0], xy[i, 1] - NODE_RADIUS * 1.15, scene["labels"][i], fontsize=font_size,
+                            ha="center", va="top", clip_on=True, zorder=3)
+
+        path = os.path.join(output_dir, "tiles", str(level), str(x), f"{y}.png")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        figure.savefig(path, dpi=72, facecolor="white")
+    return len(tiles)
+
+
+VIEWER_TEMPLATE = r"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+  html, body { margin: 0; height: 100%; overflow: hidden; font-family: sans-serif; background: #fff; }
+  #view { position: absolute; inset: 0; cursor: grab; touch-action: none; }
+  #view.dragging { cursor: grabbing; }
+  #view img { position: absolute; image-rendering: auto; user-select: none; -webkit-user-drag: none; }
+  #bar { position: absolute; top: 8px; left: 8px; background: rgba(255,255,255,0.9); border: 1px solid #ccc;
+         border-radius: 4px; padding: 4px 8px; font-size: 13px; }
+  #bar button { width: 28px; }
+</style>
+</head>
+<body>
+<div id="view"></div>
+<div id="bar">
+  <button id="zoom-in" title="Zoom in">+</button>
+  <button id="zoom-out" title="Zoom out">&minus;</button>
+  <button id="fit" title="Show the whole graph">&#9633;</button>
+  <span id="status"></span>
+</div>
+<script>
+const M = __MANIFEST__;
+const have = M.tiles.map(level => new Set(level));
+const view = document.getElementById("view");
+const statusLine = document.getElementById("status");
+const images = new Map();
+// Continuous zoom (level 0 = whole graph in one tile) and the view center in level-0 tile units.
+let zoom = 0, cx = 0.5, cy = 0.5;
+
+function fit() {
+  zoom = Math.log2(Math.min(view.clientWidth, view.clientHeight) / M.tileSize);
+  cx = 0.5; cy = 0.5;
+  render();
+}
+
+function render() {
+  zoom = Math.max(Math.log2(64 / M.tileSize), Math.min(M.maxLevel + 2, zoom));
+  const level = Math.max(0, Math.min(M.maxLevel, Math.ceil(zoom - 0.2)));
+  const worldPx = M.tileSize * Math.pow(2, zoom);
+  const n = Math.pow(2, level);
+  const tilePx = worldPx / n;
+  const W = view.clientWidth, H = view.clientHeight;
+  const left = W / 2 - cx * worldPx, top = H / 2 - cy * worldPx;
+  const x0 = Math.max(0, Math.floor(-left / tilePx)), x1 = Math.min(n - 1, Math.floor((W - left) / tilePx));
+  const y0 = Math.max(0, Math.floor(-top / tilePx)), y1 = Math.min(n - 1, Math.floor((H - top) / tilePx));
+  const used = new Set();
+  for (let x = x0; x <= x1; x++) {
+    for (let y = y0; y <= y1; y++) {
+      if (!have[level].has(x + "/" + y)) continue;
+      const key = level + "/" + x + "/" + y;
+      let img = images.get(key);
+      if (!img) {
+        img = new Image();
+        img.src = "tiles/" + key + ".png";
+        img.draggable = false;
+        images.set(key, img);
+      }
+      img.style.left = (left + x * tilePx) + "px";
+      img.style.top = (top + y * tilePx) + "px";
+      img.style.width = img.style.height = (tilePx + 0.5) + "px";
+      if (img.parentNode !== view) view.appendChild(img);
+      used.add(key);
+    }
+  }
+  for (const [key, img] of images) {
+    if (!used.has(key) && img.parentNode === view) view.removeChild(img);
+  }
+  statusLine.textContent = "level " + level + " / " + M.maxLevel + (level >= M.labelLevel ? "" : " (zoom in for labels)");
+}
+
+function zoomAt(factor, px, py) {
+  const worldPx = M.tileSize * Math.pow(2, zoom);
+  const wx = cx + (px - view.clientWidth / 2) / worldPx, wy = cy + (py - view.clientHeight / 2) / worldPx;
+  zoom += Math.log2(factor);
+  const scaled = M.tileSize * Math.pow(2, Math.max(Math.log2(64 / M.tileSize), Math.min(M.maxLevel + 2, zoom)));
+  cx = wx - (px - view.clientWidth / 2) / scaled;
+  cy = wy - (py - view.clientHeight / 2) / scaled;
+  render();
+}
+
+let drag = null;
+view.addEventListener("pointerdown", e => {
+  drag = {x: e.clientX, y: e.clientY};
+  view.setPointerCapture(e.pointerId);
+  view.classList.add("dragging");
+});
+view.addEventListener("pointermove", e => {
+  if (!drag) return;
+  const worldPx = M.tileSize * Math.pow(2, zoom);
+  cx -= (e.clientX - drag.x) / worldPx;
+  cy -= (e.clientY - drag.y) / worldPx;
+  drag = {x: e.clientX, y: e.clientY};
+  render();
+});
+view.addEventListener("pointerup", () => { drag = null; view.classList.remove("dragging"); });
+view.addEventListener("wheel", e => {
+  e.preventDefault();
+  zoomAt(Math.pow(2, -e.deltaY / 300), e.clientX, e.clientY);
+}, {passive: false});
+view.addEventListener("dblclick", e => zoomAt(2, e.clientX, e.clientY));
+document.getElementById("zoom-in").onclick = () => zoomAt(2, view.clientWidth / 2, view.clientHeight / 2);
+document.getElementById("zoom-out").onclick = () => zoomAt(0.5, view.clientWidth / 2, view.clientHeight / 2);
+document.getElementById("fit").onclick = fit;
+document.addEventListener("keydown", e => {
+  if (e.key === "+" || e.key === "=") zoomAt(2, view.clientWidth / 2, view.clientHeight / 2);
+  if (e.key === "-") zoomAt(0.5, view.clientWidth / 2, view.clientHeight / 2);
+});
+window.addEventListener("resize", render);
+fit();
+</script>
+</body>
+</html>
+"""
+
+
+def write_viewer(output_dir, title, tile_size, max_level, label_level, tiles_per_level):
+    manifest = {
+        "tileSize": tile_size,
+        "maxLevel": max_level,
+        "labelLevel": label_level,
+        "tiles": [[f"{x}/{y}" for x, y in tiles] for tiles in tiles_per_level],
+    }
+    html = (VIEWER_TEMPLATE.replace("__TITLE__", title)
+            .replace("__MANIFEST__", json.dumps(manifest, separators=(",", ":"))))
+    with open(os.path.join(output_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(html)
+
+
+def render_pyramid(G, output_dir, package_prefix="", max_level=None, label_level=None, tile_size=TILE_SIZE,
+                   jobs=None, layout_cache=True):
+    """
+    Lays out G once and writes the tile pyramid and the viewer to output_dir.
+
+    Parameters:
+        max_level: Deepest zoom level (default: nodes about 32 pixels wide there).
+        label_level: First level with module labels (default: nodes about 12 pixels wide).
+        jobs: Number of worker processes (default: number of CPUs).
+
+    Returns:
+        tiles_per_level (list): The rendered (x, y) tiles of every level.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    slot = os.path.basename(os.path.normpath(output_dir))
+    pos = compute_layout(G, prog="dot", args="-Grankdir=LR", slot=slot, use_cache=layout_cache, jobs=jobs)
+    xy = np.array([pos[node] for node in G.nodes()], dtype=float).reshape(-1, 2)
+    geometry = pyramid_geometry(xy, tile_size)
+    default_max, default_labels = default_levels(geometry[2], tile_size)
+    max_level = default_max if max_level is None else max_level
+    label_level = default_labels if label_level is None else label_level
+
+    scene = build_scene(G, pos, package_prefix, label_level)
+    tiles_per_level = [needed_tiles(scene, geometry, level, tile_size) for level in range(max_level + 1)]
+    tasks = [(level, x, y) for level, tiles in enumerate(tiles_per_level) for x, y in tiles]
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tasks)))
+    chunks = [tasks[i:i + 32] for i in range(0, len(tasks), 32)]
+    initargs = (scene, geometry, output_dir, tile_size)
+    if jobs == 1:
+        _init_worker(*initargs)
+        for chunk in chunks:
+            render_tiles(chunk)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=initargs) as pool:
+            list(pool.map(render_tiles, chunks))
+
+    write_viewer(output_dir, f"{slot} ({G.number_of_nodes()} modules)", tile_size, max_level, label_level,
+                 tiles_per_level)
+    return tiles_per_level
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Render a go-mod dependency graph as a deep-zoom tile pyramid with an offline HTML viewer."
+    )
+    parser.add_argument("input", help="Input file containing go mod graph output ('-' to read it from stdin)")
+    parser.add_argument("output_dir", help="Directory for the tiles and index.html")
+    parser.add_argument(
+        "--packages",
+        nargs="*",
+        default=[],
+        help="Allowed package prefixes (e.g., 'github.com/containers'), matched per path segment; globs ('golang.org/x/*') and 're:' regexes are supported. Use '*' to allow all."
+    )
+    parser.add_argument(
+        "--hide-packages",
+        nargs="*",
+        default=[],
+        help="Package prefixes to hide (e.g., 'github.com/containers/vendor'). Same syntax as --packages."
+    )
+    parser.add_argument("--remove-isolated", action="store_true", help="Remove nodes with no edges")
+    parser.add_argument("--max-depth", type=int, default=None, help="Maximum dependency depth to include")
+    parser.add_argument("--mvs", action="store_true", help="Keep only the version of each module selected by Go's Minimal Version Selection")
+    parser.add_argument("--condense", action="store_true", help="Collapse every dependency cycle (strongly connected component) into one node")
+    parser.add_argument("--transitive-reduction", action="store_true", help="Drop edges implied by longer dependency paths (reachability is unchanged)")
+    parser.add_argument("--max-level", type=int, default=None, help="Deepest zoom level (default: chosen from the graph size)")
+    parser.add_argument("--label-level", type=int, default=None, help="First zoom level with module labels (default: chosen from the graph size)")
+    parser.add_argument("--tile-size", type=int, default=TILE_SIZE, help=f"Tile width and height in pixels (default: {TILE_SIZE})")
+    parser.add_argument("--jobs", type=int, default=None, help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument("--no-layout-cache", action="store_true", help="Always compute the layout from scratch instead of reusing cached positions")
+    parser.add_argument("--no-cache", action="store_true", help="Re-parse the input instead of using the binary graph cache next to it")
+    parser.add_argument("--from-command", metavar="CMD", default=None, help="Stream the graph from the output of CMD (e.g. 'go mod graph') instead of the input file; pass '-' as input")
+    args = parser.parse_args()
+
+    package_list = args.packages if args.packages else ["*"]
+    allow_all = ("*" in package_list)
+    package_prefix = package_list[0] if not allow_all else ""
+
+    try:
+        graph = load_graph(args.input, use_cache=not args.no_cache, from_command=args.from_command)
+    except Exception as e:
+        sys.stderr.write(f"Error reading file {args.input}: {e}\n")
+        sys.exit(1)
+    if args.mvs:
+        graph, _ = minimal_version_selection(graph)
+
+    pipeline = FilterPipeline(graph).packages(package_list, args.hide_packages, allow_all=allow_all)
+    if args.max_depth is not None:
+        pipeline.max_depth(args.max_depth)
+    if args.remove_isolated:
+        pipeline.remove_isolated()
+    if args.transitive_reduction:
+        pipeline.transitive_reduction()
+    if args.condense:
+        pipeline.condense()
+    G_filtered = pipeline.materialize()
+
+    tiles_per_level = render_pyramid(G_filtered, args.output_dir, package_prefix, max_level=args.max_level,
+                                     label_level=args.label_level, tile_size=args.tile_size, jobs=args.jobs,
+                                     layout_cache=not args.no_layout_cache)
+    total = sum(len(tiles) for tiles in tiles_per_level)
+    print(f"{total} tiles over {len(tiles_per_level)} levels ({sum(4 ** level for level in range(len(tiles_per_level)))} possible)")
+    print(f"Tile viewer saved: {os.path.join(args.output_dir, 'index.html')}")
+
+
+if __name__ == "__main__":
+    main()
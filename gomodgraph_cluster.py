@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Community-detection summary graphs over the gomodgraph core representation (see
+gomodgraph_core.py), for --cluster.
+
+The (filtered) module graph is treated as undirected and partitioned with the Louvain method:
+nodes are moved greedily to the neighbouring community with the highest modularity gain, then
+every community is collapsed into a single node and the process repeats on the smaller graph
+until nothing moves any more. Each final community becomes one super-node named after its
+best-connected module ("github.com/containers/storage +41"), and the requirement edges
+between communities are aggregated into one edge with a "weight" attribute holding their
+count. Clusters can be kept expanded, showing their modules individually.
+
+Usage:
+    pipeline = FilterPipeline(graph).packages(["*"])
+    G = cluster_summary(graph, *pipeline.masks(), expand_patterns=["github.com/containers/storage"])
+"""
+
+import numpy as np
+from gomodgraph_core import PackageMatcher, module_path
+
+
+def _undirected_csr(num_nodes, sources, targets, weights):
+    """
+    Symmetrizes weighted edges into CSR arrays, merging parallel edges.
+
+    Returns:
+        offsets (np.ndarray), neighbors (np.ndarray), weights (np.ndarray)
+    """
+    src = np.concatenate((sources, targets)).astype(np.int64)
+    dst = np.concatenate((targets, sources)).astype(np.int64)
+    keys, inverse = np.unique(src * num_nodes + dst, return_inverse=True)
+    merged = np.bincount(inverse, weights=np.concatenate((weights, weights)))
+    rows = keys // num_nodes
+    offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_nodes), out=offsets[1:])
+    return offsets, keys % num_nodes, merged
+
+
+def _move_nodes(offsets, neighbors, weights, degree, total_weight, resolution, rng):
+    """
+    Local moving phase of Louvain: visits the nodes in random order and moves each one to the
+    neighbouring community with the largest modularity gain, until a full pass moves nothing.
+
+    Returns:
+        community (np.ndarray): Node -> community id (not contiguous).
+        moved (bool): Whether any node changed its community.
+    """
+    n = len(degree)
+    community = list(range(n))
+    community_degree = degree.tolist()
+    degree = degree.tolist()
+    offsets = offsets.tolist()
+    neighbors = neighbors.tolist()
+    weights = weights.tolist()
+    scale = resolution / total_weight
+    moved = False
+    improved = True
+    order = rng.permutation(n).tolist()
+    while improved:
+        improved = False
+        for u in order:
+            current = community[u]
+            links = {}
+            for k in range(offsets[u], offsets[u + 1]):
+                v = neighbors[k]
+                if v != u:
+                    links[community[v]] = links.get(community[v], 0.0) + weights[k]
+            community_degree[current] -= degree[u]
+            best = current
+            best_gain = links.get(current, 0.0) - community_degree[current] * degree[u] * scale
+            for c, weight in links.items():
+                gain = weight - community_degree[c] * degree[u] * scale
+                if gain > best_gain + 1e-12:
+                    best, best_gain = c, gain
+            community_degree[best] += degree[u]
+            if best != current:
+                community[u] = best
+                improved = moved = True
+    return np.array(community, dtype=np.int64), moved
+
+
+def louvain_communities(graph, node_mask=None, edge_mask=None, resolution=1.0, seed=1):
+    """
+    Partitions the masked graph (edges taken as undirected, weight 1 per requirement) into
+    communities with the Louvain method.
+
+    Parameters:
+        resolution: Higher values give more, smaller communities.
+        seed: Seed of the node visiting order, for reproducible clusters.
+
+    Returns:
+        community (np.ndarray): int64 array, node -> community id (0..k-1, largest community
+            first), -1 for nodes outside node_mask.
+    """
+    if node_mask is None:
+        node_mask = np.ones(graph.num_nodes, dtype=bool)
+    keep = graph.edge_mask(node_mask, edge_mask)
+    nodes = np.flatnonzero(node_mask)
+    local = np.full(graph.num_nodes, -1, dtype=np.int64)
+    local[nodes] = np.arange(len(nodes))
+
+    n = len(nodes)
+    membership = np.arange(n)
+    sources = local[graph.sources[keep]]
+    targets = local[graph.targets[keep]]
+    weights = np.ones(len(sources), dtype=float)
+    rng = np.random.default_rng(seed)
+    while n > 1 and len(sources):
+        offsets, neighbors, adjacency_weights = _undirected_csr(n, sources, targets, weights)
+        degree = np.bincount(np.repeat(np.arange(n), np.diff(offsets)), weights=adjacency_weights, minlength=n)
+        community, moved = _move_nodes(offsets, neighbors, adjacency_weights, degree,
+                                       float(adjacency_weights.sum()), resolution, rng)
+        if not moved:
+            break
+        # Aggregate: every community becomes a node, edges between them keep their total weight.
+        _, community = np.unique(community, return_inverse=True)
+        membership = community[membership]
+        n = int(community.max()) + 1
+        sources, targets = community[sources], community[targets]
+
+    # Relabel so that community 0 is the largest.
+    sizes = np.bincount(membership, minlength=n)
+    rank = np.empty(len(sizes), dtype=np.int64)
+    rank[np.argsort(-sizes, kind="stable")] = np.arange(len(sizes))
+    community = np.full(graph.num_nodes, -1, dtype=np.int64)
+    community[nodes] = rank[membership]
+    return community
+
+
+def cluster_summary(graph, node_mask=None, edge_mask=None, resolution=1.0, expand_patterns=(), seed=1):
+    """
+    Collapses every community of the masked graph into a super-node and returns the summary as
+    an nx.DiGraph. Super-nodes are named after the module path of the member with the most
+    edges inside the mask, followed by the number of other members (single-module communities
+    keep the module's name), and carry a "members" attribute (list of
+    module names). Edges carry a "weight" attribute with the number of requirement edges
+    they stand for. Communities containing a module that matches one of expand_patterns (see
+    PackageMatcher) are not collapsed; their modules are kept as individual nodes.
+    """
+    if node_mask is None:
+        node_mask = np.ones(graph.num_nodes, dtype=bool)
+    keep = graph.edge_mask(node_mask, edge_mask)
+    community = louvain_communities(graph, node_mask, keep, resolution=resolution, seed=seed)
+    num_communities = int(community.max()) + 1 if graph.num_nodes else 0
+
+    expanded = np.zeros(num_communities, dtype=bool)
+    if expand_patterns:
+        flags = PackageMatcher(expand_patterns).node_flags(graph)
+        matched = node_mask & ((flags & PackageMatcher.ALLOW) != 0)
+        expanded[community[matched]] = True
+
+    src = graph.sources[keep]
+    dst = graph.targets[keep]
+    degree = np.bincount(src, minlength=graph.num_nodes) + np.bincount(dst, minlength=graph.num_nodes)
+
+    # Name every collapsed community after its best-connected member.
+    members = [[] for _ in range(num_communities)]
+    for node in np.flatnonzero(node_mask).tolist():
+        members[community[node]].append(node)
+    names = {}
+    super_id = np.full(graph.num_nodes, -1, dtype=np.int64)
+    node_names = []
+    node_members = []
+    for c, nodes in enumerate(members):
+        if expanded[c]:
+            for node in nodes:
+                super_id[node] = len(node_names)
+                node_names.append(graph.names[node])
+                node_members.append([graph.names[node]])
+            continue
+        representative = max(nodes, key=lambda node: (degree[node], -node))
+        name = graph.names[representative]
+        if len(nodes) > 1:
+            name = f"{module_path(name)} +{len(nodes) - 1}"
+        if name in names:
+            name = f"{name} #{c}"
+        names[name] = c
+        super_id[nodes] = len(node_names)
+        node_names.append(name)
+        node_members.append([graph.names[node] for node in nodes])
+
+    # Aggregate the requirement edges between super-nodes.
+    super_src = super_id[src]
+    super_dst = super_id[dst]
+    between = super_src != super_dst
+    num_super = max(len(node_names), 1)
+    keys, counts = np.unique(super_src[between] * num_super + super_dst[between], return_counts=True)
+
+    import networkx as nx
+
+    G = nx.DiGraph()
+    for i, name in enumerate(node_names):
+        G.add_node(name, members=node_members[i])
+    G.add_edges_from((node_names[u], node_names[v], {"weight": int(w)})
+                     for u, v, w in zip((keys // num_super).tolist(), (keys % num_super).tolist(), counts.tolist()))
+    return G
@@ -0,0 +1,878 @@
+#!/usr/bin/env python3
+"""
+Shared core for the gomodgraph scripts (gomodgraph.networkx.py, gomodgraph.pyvis.py and
+gomodgraph.plantuml.py).
+
+The go mod graph is loaded into a compact, integer-indexed representation instead of a full
+NetworkX graph:
+  - every "module@version" string is interned once into a string table (index -> name),
+  - edges are stored in CSR form: offsets[i]:offsets[i + 1] is the slice of targets holding
+    the successors of node i.
+
+All filters work on boolean node masks over that representation, and only the final filtered
+subgraph is converted to NetworkX for rendering (see ModuleGraph.to_networkx).
+
+The parsed graph is cached in a binary file next to the input ("go_mod_graph.txt.graphcache")
+that is memory-mapped on later runs, see load_graph and gomodgraph.compile.py. The graph can
+also be streamed from stdin ("-") or straight from a running `go mod graph` (from_command),
+in which case it is parsed while the producer is still writing and no cache is used.
+A Go module directory (or its go.mod) is read natively and offline instead, see
+gomodgraph_gomod.py.
+
+Usage (from one of the gomodgraph scripts):
+    graph = load_graph("go_mod_graph.txt")
+    pipeline = FilterPipeline(graph).packages(["github.com/containers"]).max_depth(3)
+    G = pipeline.materialize()
+"""
+
+import os
+import re
+import sys
+import mmap
+import shlex
+import struct
+import subprocess
+import fnmatch
+import hashlib
+import numpy as np
+
+_UNSAFE_CHARS = re.compile(r'[^A-Za-z0-9]')
+
+
+# Utility: Create a safe identifier by replacing non-alphanumerics with underscores.
+def safe_id(modname):
+    return _UNSAFE_CHARS.sub('_', modname)
+
+
+# Utility: Convert a package prefix to its safe version.
+def safe_prefix(prefix):
+    return _UNSAFE_CHARS.sub('_', prefix.rstrip("/"))
+
+
+def import_script(filename):
+    """
+    Imports one of the gomodgraph scripts (e.g. "gomodgraph.pyvis.py") as a module, so its
+    draw functions can be reused. The dotted file names cannot be imported the normal way.
+    """
+    import importlib.util
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    name = filename[:-3].replace(".", "_")
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# Deterministically assign a color to a module or prefix using MD5 hash.
+def assign_color(prefix, palette):
+    h = hashlib.md5(prefix.encode("utf-8")).hexdigest()
+    index = int(h[:8], 16) % len(palette)
+    return palette[index]
+
+
+class ModuleGraph:
+    """
+    A directed module graph with interned node names and CSR adjacency.
+
+    Attributes:
+        names (list): Node index -> original module name ("module@version").
+        index (dict): Original module name -> node index.
+        offsets (np.ndarray): int64 array of length num_nodes + 1 into targets.
+        targets (np.ndarray): int32 array of successor indices, grouped by source node.
+        indirect (np.ndarray): Boolean array over targets marking "// indirect" requirements,
+                               or None if the source does not say (go mod graph output).
+    """
+
+    def __init__(self, names, offsets, targets, index=None, safe_ids=None, indirect=None):
+        self.names = names
+        self.offsets = offsets
+        self.targets = targets
+        self.indirect = indirect
+        self._index = index
+        self._safe_ids = safe_ids
+        self._by_path = None
+        self._sources = None
+        self._reverse = None
+
+    @classmethod
+    def from_edges(cls, index, sources, targets, indirect=None):
+        """
+        Builds a ModuleGraph from an interning dict (name -> index, in insertion order) and
+        parallel source/target index sequences (and optionally a parallel sequence of
+        indirect flags). Duplicate edges are dropped, and the successors of each node keep
+        the order in which they were first seen.
+        """
+        names = list(index)
+        num_nodes = len(names)
+        src = np.asarray(sources, dtype=np.int64)
+        dst = np.asarray(targets, dtype=np.int64)
+        flags = np.asarray(indirect, dtype=bool) if indirect is not None else None
+
+        # Drop duplicate edges, keeping the first occurrence.
+        if len(src):
+            _, first = np.unique(src * num_nodes + dst, return_index=True)
+            first.sort()
+            src = src[first]
+            dst = dst[first]
+            if flags is not None:
+                flags = flags[first]
+
+        # A stable sort by source groups the edges without reordering successors.
+        order = np.argsort(src, kind="stable")
+        offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=num_nodes), out=offsets[1:])
+        return cls(names, offsets, dst[order].astype(np.int32), index=index,
+                   indirect=flags[order] if flags is not None else None)
+
+    @property
+    def num_nodes(self):
+        return len(self.names)
+
+    @property
+    def num_edges(self):
+        return len(self.targets)
+
+    @property
+    def index(self):
+        """Original module name -> node index, built on first use."""
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.names)}
+        return self._index
+
+    @property
+    def by_path(self):
+        """Module path (without version) -> list of node indices, built on first use."""
+        if self._by_path is None:
+            self._by_path = {}
+            for i, name in enumerate(self.names):
+                self._by_path.setdefault(module_path(name), []).append(i)
+        return self._by_path
+
+    def find(self, spec):
+        """
+        Resolves a module given as "module@version" or as a bare module path (matching all of
+        its versions) to a list of node indices. Returns an empty list if nothing matches.
+        """
+        node = self.index.get(spec)
+        if node is not None:
+            return [node]
+        return list(self.by_path.get(spec, []))
+
+    @property
+    def safe_ids(self):
+        """Safe identifiers for every node, computed on first use."""
+        if self._safe_ids is None:
+            self._safe_ids = [safe_id(name) for name in self.names]
+        return self._safe_ids
+
+    @property
+    def sources(self):
+        """int32 array with the source node of every entry in targets."""
+        if self._sources is None:
+            self._sources = np.repeat(np.arange(self.num_nodes, dtype=np.int32), np.diff(self.offsets))
+        return self._sources
+
+    def successors(self, node):
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def reverse(self):
+        """Returns the transposed graph (edges point from dependency to dependent)."""
+        if self._reverse is None:
+            order = np.argsort(self.targets, kind="stable")
+            offsets = np.zeros(self.num_nodes + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.targets, minlength=self.num_nodes), out=offsets[1:])
+            self._reverse = ModuleGraph(self.names, offsets, self.sources[order],
+                                        index=self._index, safe_ids=self._safe_ids)
+            self._reverse._reverse = self
+        return self._reverse
+
+    def edge_mask(self, node_mask, edge_mask=None):
+        """
+        Boolean mask over edges whose endpoints are both kept by node_mask and which are
+        kept by edge_mask (if given).
+        """
+        keep = node_mask[self.sources] & node_mask[self.targets]
+        if edge_mask is not None:
+            keep &= edge_mask
+        return keep
+
+    def expand(self, frontier, node_mask=None, edge_mask=None):
+        """
+        Returns the successors of all nodes in the frontier array in one vectorised step,
+        optionally restricted to nodes kept by node_mask and edges kept by edge_mask.
+        May contain duplicates.
+        """
+        starts = self.offsets[frontier]
+        counts = self.offsets[frontier + 1] - starts
+        nonempty = counts > 0
+        starts = starts[nonempty]
+        counts = counts[nonempty]
+        total = int(counts.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int32)
+        # Positions into targets: each frontier node contributes starts[i] .. starts[i] + counts[i].
+        steps = np.ones(total, dtype=np.int64)
+        group_starts = np.cumsum(counts)[:-1]
+        steps[0] = starts[0]
+        steps[group_starts] = starts[1:] - (starts[:-1] + counts[:-1]) + 1
+        positions = np.cumsum(steps)
+        if edge_mask is not None:
+            positions = positions[edge_mask[positions]]
+        neighbors = self.targets[positions]
+        if node_mask is not None:
+            neighbors = neighbors[node_mask[neighbors]]
+        return neighbors
+
+    def to_networkx(self, node_mask=None, edge_mask=None):
+        """
+        Materializes the subgraph selected by node_mask (all nodes if None) and edge_mask
+        (all edges between kept nodes if None) as an nx.DiGraph with original module names
+        as nodes and a safe_id attribute. Edges get an indirect attribute if the graph
+        knows which requirements are indirect.
+        """
+        import networkx as nx
+
+        if node_mask is None:
+            node_mask = np.ones(self.num_nodes, dtype=bool)
+        G = nx.DiGraph()
+        names = self.names
+        safe_ids = self.safe_ids
+        G.add_nodes_from((names[i], {"safe_id": safe_ids[i]}) for i in np.flatnonzero(node_mask).tolist())
+        keep = self.edge_mask(node_mask, edge_mask)
+        if self.indirect is not None:
+            G.add_edges_from((names[u], names[v], {"indirect": flag})
+                             for u, v, flag in zip(self.sources[keep].tolist(), self.targets[keep].tolist(),
+                                                   self.indirect[keep].tolist()))
+            return G
+        G.add_edges_from((names[u], names[v]) for u, v in zip(self.sources[keep].tolist(),
+                                                              self.targets[keep].tolist()))
+        return G
+
+
+def parse_edges(lines):
+    """
+    Interns the "modA modB" pairs of go mod graph output.
+
+    Empty lines, comment lines and lines that do not have exactly two modules are skipped.
+
+    Returns:
+        index (dict): Module name -> node index, in order of first appearance.
+        sources (list), targets (list): Parallel lists of node indices, one entry per edge.
+    """
+    index = {}
+    sources = []
+    targets = []
+    intern = index.setdefault
+    for line in lines:
+        parts = line.split()
+        if len(parts) != 2 or parts[0].startswith("#"):
+            continue  # Skip empty lines, comments and malformed lines.
+        modA, modB = parts
+        sources.append(intern(modA, len(index)))
+        targets.append(intern(modB, len(index)))
+    return index, sources, targets
+
+
+# Build the full dependency graph from file.
+def build_graph(input_file):
+    """
+    Reads the go mod graph data from a file and builds the integer-indexed module graph.
+
+    Returns:
+        graph (ModuleGraph): The interned graph with CSR adjacency.
+    """
+    with open(input_file, "r", encoding="utf-8") as f:
+        index, sources, targets = parse_edges(f)
+    return ModuleGraph.from_edges(index, sources, targets)
+
+
+def stream_graph(stream):
+    """
+    Builds the module graph from a text stream (e.g. sys.stdin or a pipe), line by line as
+    the producer writes it, so parsing overlaps with `go mod graph` instead of waiting for
+    a finished file.
+
+    Returns:
+        graph (ModuleGraph): The interned graph with CSR adjacency.
+    """
+    index, sources, targets = parse_edges(stream)
+    return ModuleGraph.from_edges(index, sources, targets)
+
+
+def graph_from_command(command):
+    """
+    Runs command (a string, split like a shell would, or an argument list) and streams its
+    standard output into the module graph, e.g. graph_from_command("go mod graph").
+    The command's stderr is passed through.
+
+    Raises:
+        subprocess.CalledProcessError: If the command exits with a non-zero status.
+    """
+    args = shlex.split(command) if isinstance(command, str) else list(command)
+    with subprocess.Popen(args, stdout=subprocess.PIPE, text=True, encoding="utf-8", bufsize=1 << 16) as proc:
+        graph = stream_graph(proc.stdout)
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, args)
+    return graph
+
+
+# Binary graph cache, written next to the input file as "<input>.graphcache".
+# Layout (little endian):
+#   header   magic, format version, SHA-256 of the input file, node/edge counts, blob sizes
+#   offsets  int64[num_nodes + 1]
+#   targets  int32[num_edges]
+#   names    UTF-8 module names joined by "\n"
+#   safe ids ASCII safe IDs joined by "\n"
+CACHE_SUFFIX = ".graphcache"
+_CACHE_MAGIC = b"GMGC"
+_CACHE_VERSION = 1
+_CACHE_HEADER = struct.Struct("<4sI32sQQQQ")
+
+
+def cache_path(input_file):
+    return input_file + CACHE_SUFFIX
+
+
+def file_digest(input_file):
+    """Returns the SHA-256 digest of a file, read in chunks."""
+    h = hashlib.sha256()
+    with open(input_file, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+def write_graph_cache(graph, output_file, digest):
+    """
+    Writes the graph (string table, CSR arrays and precomputed safe IDs) to a binary cache.
+    The file is written to a temporary name first and then moved into place.
+    """
+    names_blob = "\n".join(graph.names).encode("utf-8")
+    safe_blob = "\n".join(graph.safe_ids).encode("ascii")
+    header = _CACHE_HEADER.pack(_CACHE_MAGIC, _CACHE_VERSION, digest, graph.num_nodes,
+                                graph.num_edges, len(names_blob), len(safe_blob))
+    tmp_file = f"{output_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(header)
+        f.write(np.ascontiguousarray(graph.offsets, dtype="<i8").tobytes())
+        f.write(np.ascontiguousarray(graph.targets, dtype="<i4").tobytes())
+        f.write(names_blob)
+        f.write(safe_blob)
+    os.replace(tmp_file, output_file)
+
+
+def read_graph_cache(cache_file, digest=None):
+    """
+    Memory-maps a binary graph cache. The CSR arrays are views into the mapping, so nothing
+    but the string tables is copied.
+
+    Returns:
+        graph (ModuleGraph) or None if the file is not a valid cache for the given digest.
+    """
+    try:
+        with open(cache_file, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(mm) < _CACHE_HEADER.size:
+        return None
+    magic, version, cached_digest, num_nodes, num_edges, names_len, safe_len = \
+        _CACHE_HEADER.unpack_from(mm, 0)
+    if magic != _CACHE_MAGIC or version != _CACHE_VERSION:
+        return None
+    if digest is not None and cached_digest != digest:
+        return None
+    pos = _CACHE_HEADER.size
+    expected = pos + 8 * (num_nodes + 1) + 4 * num_edges + names_len + safe_len
+    if len(mm) != expected:
+        return None
+
+    offsets = np.frombuffer(mm, dtype="<i8", count=num_nodes + 1, offset=pos)
+    pos += offsets.nbytes
+    targets = np.frombuffer(mm, dtype="<i4", count=num_edges, offset=pos)
+    pos += targets.nbytes
+    names = mm[pos:pos + names_len].decode("utf-8").split("\n") if num_nodes else []
+    pos += names_len
+    safe_ids = mm[pos:pos + safe_len].decode("ascii").split("\n") if num_nodes else []
+    return ModuleGraph(names, offsets, targets, safe_ids=safe_ids)
+
+
+def load_graph(input_file, use_cache=True, from_command=None):
+    """
+    Loads the module graph for input_file. If use_cache is True, a binary cache next to the
+    input is reused when its stored hash matches the input file, and (re)written otherwise.
+    An input_file of "-" streams the graph from stdin, and from_command streams it from the
+    output of a command instead of input_file; neither uses the cache. A Go module
+    directory, go.mod or vendor/modules.txt is read with gomodgraph_gomod.py (no cache).
+
+    Returns:
+        graph (ModuleGraph): The interned graph with CSR adjacency.
+    """
+    if from_command:
+        return graph_from_command(from_command)
+    if input_file == "-":
+        return stream_graph(sys.stdin)
+    from gomodgraph_gomod import is_go_module_source, build_go_module_graph
+    if is_go_module_source(input_file):
+        graph, report = build_go_module_graph(input_file)
+        if report["missing"]:
+            sys.stderr.write(f"Warning: no go.mod found for {len(report['missing'])} module versions "
+                             f"(module cache not populated?), their requirements are missing\n")
+        return graph
+    if not use_cache:
+        return build_graph(input_file)
+    digest = file_digest(input_file)
+    graph = read_graph_cache(cache_path(input_file), digest)
+    if graph is None:
+        graph = build_graph(input_file)
+        try:
+            write_graph_cache(graph, cache_path(input_file), digest)
+        except OSError as e:
+            sys.stderr.write(f"Warning: could not write graph cache {cache_path(input_file)}: {e}\n")
+    return graph
+
+
+def module_version(modname):
+    """Returns the version of a "module@version" name ("" for the unversioned main module)."""
+    return modname.split("@", 1)[1] if "@" in modname else ""
+
+
+_SEMVER = re.compile(r'^v?(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$')
+
+
+def version_key(version):
+    """
+    Sort key ordering versions the way Go's semver package does:
+    release > pre-release (pseudo-versions are pre-releases), numeric pre-release identifiers
+    compare numerically and sort before alphanumeric ones, build metadata ("+incompatible")
+    is ignored. Toolchain versions ("go1.22.8") compare numerically, the unversioned main
+    module sorts above everything and unparseable versions below.
+    """
+    if version == "":
+        return (1, ())
+    match = _SEMVER.match(version[2:] if version.startswith("go") else version)
+    if not match:
+        return (-1, (version,))
+    major, minor, patch, pre = match.groups()
+    numbers = tuple(int(part) for part in (major, minor, patch) if part is not None)
+    if pre is None:
+        return (0, numbers, 1, ())
+    identifiers = tuple((0, int(part), "") if part.isdigit() else (1, 0, part) for part in pre.split("."))
+    return (0, numbers, 0, identifiers)
+
+
+def minimal_version_selection(graph, root=0):
+    """
+    Runs Go's Minimal Version Selection over the parsed graph: every module@version reachable
+    from the root (the main module) is visited and, per module path, only the highest required
+    version is kept. Requirements of the selected versions are redirected to the selected
+    version of their target module; everything else is dropped.
+
+    Returns:
+        selected (ModuleGraph): The collapsed graph, one node per module path.
+        pruned (dict): Module path -> list of versions that were not selected.
+    """
+    reachable = np.zeros(graph.num_nodes, dtype=bool)
+    reachable[root] = True
+    frontier = np.array([root], dtype=np.int64)
+    while len(frontier):
+        neighbors = graph.expand(frontier)
+        frontier = np.unique(neighbors[~reachable[neighbors]])
+        reachable[frontier] = True
+
+    # Pick the highest version per module path among the reachable nodes.
+    selected_node = {}
+    best_key = {}
+    for node in np.flatnonzero(reachable).tolist():
+        name = graph.names[node]
+        path = module_path(name)
+        key = version_key(module_version(name))
+        if path not in best_key or key > best_key[path]:
+            best_key[path] = key
+            selected_node[path] = node
+
+    redirect = np.full(graph.num_nodes, -1, dtype=np.int64)
+    pruned = {}
+    for node, name in enumerate(graph.names):
+        path = module_path(name)
+        chosen = selected_node.get(path)
+        if chosen is not None and reachable[node]:
+            redirect[node] = chosen
+        if chosen != node:
+            pruned.setdefault(path, []).append(module_version(name))
+
+    is_selected = np.zeros(graph.num_nodes, dtype=bool)
+    is_selected[list(selected_node.values())] = True
+    keep = is_selected[graph.sources] & (redirect[graph.targets] >= 0)
+    src = graph.sources[keep]
+    dst = redirect[graph.targets[keep]]
+    no_loops = src != dst
+    src, dst = src[no_loops], dst[no_loops]
+    indirect = graph.indirect[keep][no_loops] if graph.indirect is not None else None
+
+    # Re-intern the selected nodes, keeping their original order.
+    kept = np.flatnonzero(is_selected)
+    new_id = np.full(graph.num_nodes, -1, dtype=np.int64)
+    new_id[kept] = np.arange(len(kept))
+    index = {graph.names[node]: i for i, node in enumerate(kept.tolist())}
+    selected = ModuleGraph.from_edges(index, new_id[src], new_id[dst], indirect=indirect)
+    for versions in pruned.values():
+        versions.sort(key=version_key)
+    return selected, pruned
+
+
+def print_version_report(pruned):
+    """Prints how many versions Minimal Version Selection pruned per module, most first."""
+    rows = sorted(pruned.items(), key=lambda item: (-len(item[1]), item[0]))
+    total = sum(len(versions) for versions in pruned.values())
+    print(f"Minimal Version Selection pruned {total} module versions:")
+    for path, versions in rows:
+        print(f"  {len(versions):4d}  {path}")
+
+
+def all_nodes(graph):
+    """Returns a node mask that keeps every node of the graph."""
+    return np.ones(graph.num_nodes, dtype=bool)
+
+
+def module_path(modname):
+    """Returns the module path of a "module@version" name (the name itself if unversioned)."""
+    return modname.split("@", 1)[0]
+
+
+def module_org(path):
+    """
+    Returns the organisation of a module path, its host and first path segment
+    ("github.com/containers/image/v5" -> "github.com/containers", "golang.org/x/sys" -> "golang.org/x").
+    """
+    return "/".join(path.split("/", 2)[:2])
+
+
+def org_index(graph, org_set=None):
+    """
+    Assigns every node to an organisation, in one pass over the distinct module paths.
+
+    Parameters:
+        org_set: Organisation prefixes to use instead of module_org, matched per path segment
+                 (the longest match wins, e.g. "k8s.io" or "github.com/containers/image").
+                 Nodes outside all of them are not assigned.
+
+    Returns:
+        orgs (list): Organisation names (org_set order, or order of first appearance).
+        org_of (np.ndarray): int32 array, node -> index into orgs (-1 if not assigned).
+    """
+    org_ids = {}
+    for org in org_set or ():
+        org_ids.setdefault(org.strip("/"), len(org_ids))
+    org_of = np.full(graph.num_nodes, -1, dtype=np.int32)
+    for path, nodes in graph.by_path.items():
+        if org_set is None:
+            org = org_ids.setdefault(module_org(path), len(org_ids))
+        else:
+            segments = path.split("/")
+            org = next((org_ids["/".join(segments[:n])] for n in range(len(segments), 0, -1)
+                        if "/".join(segments[:n]) in org_ids), -1)
+        org_of[nodes] = org
+    return list(org_ids), org_of
+
+
+class PackageMatcher:
+    """
+    Compiled allow/hide pattern lists for --packages and --hide-packages.
+
+    Patterns are matched against module paths (the part before "@") segment by segment:
+      - "github.com/containers/image" matches that module and everything below it
+        (e.g. "github.com/containers/image/v5"), but not "github.com/containers/imagebuildah".
+      - Segments may be globs ("golang.org/x/*", "github.com/*/storage", "k8s.io/**/v2");
+        "**" matches any number of segments.
+      - Patterns starting with "re:" are regular expressions searched in the module path.
+
+    All patterns are compiled into one trie, so classifying a module is a single walk over
+    its path segments regardless of how many patterns there are.
+    """
+
+    ALLOW = 1
+    HIDE = 2
+
+    class _Node:
+        __slots__ = ("children", "globs", "globstar", "star", "flags")
+
+        def __init__(self, star=False):
+            self.children = {}    # literal segment -> _Node
+            self.globs = []       # (compiled segment glob, _Node)
+            self.globstar = None  # "**" child, matching zero or more segments
+            self.star = star      # True if this node is itself a "**"
+            self.flags = 0        # ALLOW / HIDE of the patterns ending here
+
+    def __init__(self, allowed_patterns=(), hidden_patterns=()):
+        self._root = self._Node()
+        self._regexes = []
+        for flag, patterns in ((self.ALLOW, allowed_patterns), (self.HIDE, hidden_patterns)):
+            regexes = []
+            for pattern in patterns:
+                if pattern.startswith("re:"):
+                    regexes.append(f"(?:{pattern[3:]})")
+                else:
+                    self._insert(pattern, flag)
+            if regexes:
+                self._regexes.append((re.compile("|".join(regexes)), flag))
+        self._memo = {}
+
+    def _insert(self, pattern, flag):
+        node = self._root
+        for segment in pattern.strip("/").split("/"):
+            if segment == "**":
+                if node.globstar is None:
+                    node.globstar = self._Node(star=True)
+                node = node.globstar
+            elif any(c in segment for c in "*?["):
+                glob = re.compile(fnmatch.translate(segment))
+                for existing, child in node.globs:
+                    if existing.pattern == glob.pattern:
+                        node = child
+                        break
+                else:
+                    child = self._Node()
+                    node.globs.append((glob, child))
+                    node = child
+            else:
+                node = node.children.setdefault(segment, self._Node())
+        node.flags |= flag
+
+    @staticmethod
+    def _with_globstars(states):
+        # A "**" child is active wherever its parent is, since it may match zero segments.
+        pending = list(states)
+        while pending:
+            node = pending.pop()
+            if node.globstar is not None and node.globstar not in states:
+                states.add(node.globstar)
+                pending.append(node.globstar)
+        return states
+
+    def classify(self, path):
+        """
+        Returns the ALLOW/HIDE flags of all patterns matching the module path.
+        Results are memoized per path, so the many versions of a module share one walk.
+        """
+        flags = self._memo.get(path)
+        if flags is not None:
+            return flags
+        flags = 0
+        states = self._with_globstars({self._root})
+        for segment in path.split("/"):
+            next_states = set()
+            for node in states:
+                flags |= node.flags
+                child = node.children.get(segment)
+                if child is not None:
+                    next_states.add(child)
+                for glob, child in node.globs:
+                    if glob.match(segment):
+                        next_states.add(child)
+                if node.star:
+                    next_states.add(node)
+            states = self._with_globstars(next_states)
+            if not states:
+                break
+        for node in states:
+            flags |= node.flags
+        for regex, flag in self._regexes:
+            if not flags & flag and regex.search(path):
+                flags |= flag
+        self._memo[path] = flags
+        return flags
+
+    def node_flags(self, graph):
+        """Returns a uint8 array with the ALLOW/HIDE flags of every node of the graph."""
+        classify = self.classify
+        return np.fromiter((classify(module_path(name)) for name in graph.names),
+                           dtype=np.uint8, count=graph.num_nodes)
+
+
+def filter_graph_by_packages(graph, allowed_patterns, hidden_patterns=(), allow_all=False, node_mask=None):
+    """
+    Retains only nodes whose module path matches one of the allowed_patterns, unless
+    allow_all is True. Then removes any nodes matching one of the hidden_patterns.
+    See PackageMatcher for the pattern syntax.
+
+    Returns:
+        node_mask (np.ndarray): Boolean mask of retained nodes.
+    """
+    mask = all_nodes(graph) if node_mask is None else node_mask.copy()
+    if allow_all and not hidden_patterns:
+        return mask
+    flags = PackageMatcher([] if allow_all else allowed_patterns, hidden_patterns).node_flags(graph)
+    if not allow_all:
+        mask &= (flags & PackageMatcher.ALLOW) != 0
+    if hidden_patterns:
+        mask &= (flags & PackageMatcher.HIDE) == 0
+    return mask
+
+
+def compute_depths(graph, node_mask=None, edge_mask=None):
+    """
+    Compute the minimum depth for every node in the masked graph starting from roots.
+    Roots are defined as nodes with no incoming edges (within the mask). If there are none,
+    every node is a root.
+
+    Returns:
+        depths (np.ndarray): int32 array of depths, -1 for nodes that are not reached.
+    """
+    if node_mask is None:
+        node_mask = all_nodes(graph)
+    keep = graph.edge_mask(node_mask, edge_mask)
+    has_parent = np.zeros(graph.num_nodes, dtype=bool)
+    has_parent[graph.targets[keep]] = True
+    roots = np.flatnonzero(node_mask & ~has_parent)
+    if not len(roots):
+        roots = np.flatnonzero(node_mask)
+
+    depths = np.full(graph.num_nodes, -1, dtype=np.int32)
+    depths[roots] = 0
+    frontier = roots
+    depth = 0
+    # Level-synchronous BFS: every level is expanded with one vectorised CSR gather.
+    while len(frontier):
+        depth += 1
+        neighbors = graph.expand(frontier, node_mask, edge_mask)
+        frontier = np.unique(neighbors[depths[neighbors] < 0])
+        depths[frontier] = depth
+    return depths
+
+
+def filter_graph_by_max_depth(graph, max_depth, node_mask=None, edge_mask=None):
+    """
+    Returns a node mask containing only nodes with depth <= max_depth.
+    """
+    depths = compute_depths(graph, node_mask, edge_mask)
+    return (depths >= 0) & (depths <= max_depth)
+
+
+def remove_isolated(graph, node_mask, edge_mask=None):
+    """
+    Returns a node mask without the nodes that have no edges inside node_mask (and edge_mask).
+    """
+    keep = graph.edge_mask(node_mask, edge_mask)
+    connected = np.zeros(graph.num_nodes, dtype=bool)
+    connected[graph.sources[keep]] = True
+    connected[graph.targets[keep]] = True
+    return node_mask & connected
+
+
+class FilterPipeline:
+    """
+    A lazy chain of filter stages over one base graph.
+
+    Each stage is a function stage(graph, node_mask, edge_mask) -> (node_mask, edge_mask)
+    working on boolean masks, so adding stages never copies the graph. The stages run only
+    when a mask is requested, and the filtered graph is materialized once, at render time.
+
+    Usage:
+        pipeline = FilterPipeline(graph).packages(["github.com/containers"]).max_depth(3).remove_isolated()
+        G = pipeline.materialize()
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.stages = []
+        self.condensed = False
+        self.summary = None
+        self._masks = None
+
+    def add_stage(self, name, stage):
+        """Appends a stage; name is only used to describe the pipeline."""
+        self.stages.append((name, stage))
+        self._masks = None
+        return self
+
+    def packages(self, allowed_patterns, hidden_patterns=(), allow_all=False):
+        def stage(graph, node_mask, edge_mask):
+            return filter_graph_by_packages(graph, allowed_patterns, hidden_patterns, allow_all, node_mask), edge_mask
+        return self.add_stage("packages", stage)
+
+    def restrict(self, node_mask, name="restrict"):
+        """Keeps only the nodes of a precomputed node mask (e.g. one organisation, see org_index)."""
+        def stage(graph, current_mask, edge_mask):
+            return current_mask & node_mask, edge_mask
+        return self.add_stage(name, stage)
+
+    def max_depth(self, max_depth):
+        def stage(graph, node_mask, edge_mask):
+            return filter_graph_by_max_depth(graph, max_depth, node_mask, edge_mask), edge_mask
+        return self.add_stage(f"max-depth={max_depth}", stage)
+
+    def remove_isolated(self):
+        def stage(graph, node_mask, edge_mask):
+            return remove_isolated(graph, node_mask, edge_mask), edge_mask
+        return self.add_stage("remove-isolated", stage)
+
+    def direct_only(self):
+        """Drops "// indirect" requirements (no-op if the graph does not mark them)."""
+        def stage(graph, node_mask, edge_mask):
+            if graph.indirect is None:
+                return node_mask, edge_mask
+            return node_mask, edge_mask & ~graph.indirect
+        return self.add_stage("direct-only", stage)
+
+    def transitive_reduction(self):
+        def stage(graph, node_mask, edge_mask):
+            from gomodgraph_index import transitive_reduction
+            return node_mask, transitive_reduction(graph, node_mask, edge_mask)
+        return self.add_stage("transitive-reduction", stage)
+
+    def condense(self):
+        """
+        Materializes the condensation of the filtered graph: every strongly connected
+        component becomes one node, see gomodgraph_index.condense_graph.
+        """
+        self.condensed = True
+        return self
+
+    def cluster(self, resolution=1.0, expand_patterns=()):
+        """
+        Materializes a community summary instead of the filtered graph: every community of the
+        filtered graph becomes one super-node, see gomodgraph_cluster.py.
+        """
+        self.summary = (resolution, tuple(expand_patterns))
+        return self
+
+    def masks(self):
+        """Evaluates the stages (once) and returns the final (node_mask, edge_mask)."""
+        if self._masks is None:
+            node_mask = all_nodes(self.graph)
+            edge_mask = np.ones(self.graph.num_edges, dtype=bool)
+            for _, stage in self.stages:
+                node_mask, edge_mask = stage(self.graph, node_mask, edge_mask)
+            self._masks = (node_mask, self.graph.edge_mask(node_mask, edge_mask))
+        return self._masks
+
+    def node_mask(self):
+        return self.masks()[0]
+
+    def edge_mask(self):
+        return self.masks()[1]
+
+    def materialize(self):
+        """Returns the filtered graph (or its community summary, see cluster) as an nx.DiGraph."""
+        graph = self.graph
+        node_mask, edge_mask = self.masks()
+        if self.condensed:
+            from gomodgraph_index import condense_graph
+            graph = condense_graph(graph, node_mask, edge_mask)
+            node_mask = edge_mask = None
+        if self.summary is not None:
+            from gomodgraph_cluster import cluster_summary
+            resolution, expand_patterns = self.summary
+            return cluster_summary(graph, node_mask, edge_mask, resolution=resolution,
+                                   expand_patterns=expand_patterns)
+        return graph.to_networkx(node_mask, edge_mask)
+
+    def __repr__(self):
+        names = [name for name, _ in self.stages] + (["condense"] if self.condensed else [])
+        names += ["cluster"] if self.summary is not None else []
+        return "FilterPipeline(" + " | ".join(names) + ")"
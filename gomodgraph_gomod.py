@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Native go.mod / go.sum / vendor/modules.txt reader for the gomodgraph scripts, so the module
+graph can be built offline without a Go toolchain (see gomodgraph_core.load_graph, which uses
+it for a module directory or a go.mod file as input, and gomodgraph.gomod.py).
+
+The graph mirrors `go mod graph`: the main module is the only unversioned node and every
+module@version has an edge to each module@version its go.mod requires. The go.mod files of
+dependencies are read from the module cache ($GOMODCACHE, $GOPATH/pkg/mod or ~/go/pkg/mod)
+when present and checked against the main module's go.sum; without them only the main
+module's requirements (and the modules listed in vendor/modules.txt) are known.
+
+Directives of the main module are applied like the go command does:
+  - replace: the go.mod of the replacement (a module version or a local directory) is read,
+    but the node keeps the original module path and version,
+  - exclude: requirements of an excluded module version are dropped,
+  - "// indirect": edges are marked indirect (ModuleGraph.indirect).
+Replace and exclude directives of dependencies are ignored, as in Go. Unlike `go mod graph`
+for go >= 1.17 modules, the graph is not pruned to the requirements Go would load lazily.
+
+Usage:
+    graph, report = build_go_module_graph("path/to/podman")
+    print(report["missing"])  # module versions whose go.mod was not found
+"""
+
+import os
+import base64
+import hashlib
+from collections import deque
+from gomodgraph_core import ModuleGraph
+
+
+def _split_comment(line):
+    """Splits a go.mod line into (code, comment), ignoring "//" inside quoted strings."""
+    quote = None
+    for i, char in enumerate(line):
+        if quote:
+            if char == quote and (quote == "`" or line[i - 1] != "\\"):
+                quote = None
+        elif char in "\"`":
+            quote = char
+        elif line.startswith("//", i):
+            return line[:i], line[i + 2:].strip()
+    return line, ""
+
+
+def _tokens(code):
+    """Splits the code part of a go.mod line into tokens, unquoting quoted strings."""
+    tokens = []
+    i = 0
+    while i < len(code):
+        char = code[i]
+        if char.isspace():
+            i += 1
+        elif char in "\"`":
+            end = code.find(char, i + 1)
+            if end < 0:
+                raise ValueError(f"unterminated string in go.mod line: {code.strip()!r}")
+            tokens.append(code[i + 1:end].replace("\\\"", "\""))
+            i = end + 1
+        else:
+            end = i
+            while end < len(code) and not code[end].isspace():
+                end += 1
+            tokens.append(code[i:end])
+            i = end
+    return tokens
+
+
+def _is_indirect(comment):
+    return comment == "indirect" or comment.startswith("indirect;")
+
+
+def parse_go_mod(text):
+    """
+    Parses the directives of a go.mod file.
+
+    Returns:
+        dict with "module" (path or None), "go" (version or None), "require" (list of
+        (path, version, indirect)), "replace" (list of (old_path, old_version or None,
+        new_path, new_version or None)) and "exclude" (list of (path, version)).
+
+    Raises:
+        ValueError: A quoted string is not terminated, or a module path is replaced by another
+            module without a version (the go command rejects the file too).
+    """
+    result = {"module": None, "go": None, "require": [], "replace": [], "exclude": []}
+    block = None
+    for number, raw in enumerate(text.splitlines(), 1):
+        code, comment = _split_comment(raw)
+        try:
+            tokens = _tokens(code)
+        except ValueError as e:
+            raise ValueError(f"line {number}: {e}") from None
+        if not tokens:
+            continue
+        if block is not None:
+            if tokens == [")"]:
+                block = None
+                continue
+            verb, args = block, tokens
+        elif len(tokens) == 2 and tokens[1] == "(":
+            block = tokens[0]
+            continue
+        else:
+            verb, args = tokens[0], tokens[1:]
+
+        if verb == "module" and args:
+            result["module"] = args[0]
+        elif verb == "go" and args:
+            result["go"] = args[0]
+        elif verb == "require" and len(args) >= 2:
+            result["require"].append((args[0], args[1], _is_indirect(comment)))
+        elif verb == "exclude" and len(args) >= 2:
+            result["exclude"].append((args[0], args[1]))
+        elif verb == "replace" and "=>" in args:
+            arrow = args.index("=>")
+            old, new = args[:arrow], args[arrow + 1:]
+            if old and new:
+                if len(new) == 1 and not _is_local(new[0]):
+                    raise ValueError(f"line {number}: replacement module {new[0]} needs a version")
+                result["replace"].append((old[0], old[1] if len(old) > 1 else None,
+                                          new[0], new[1] if len(new) > 1 else None))
+    return result
+
+
+def parse_go_sum(text):
+    """Returns {(path, version): hash} for the lines of a go.sum file ("v1.2.3/go.mod" versions included)."""
+    sums = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) == 3:
+            sums[(parts[0], parts[1])] = parts[2]
+    return sums
+
+
+def parse_modules_txt(text):
+    """
+    Parses vendor/modules.txt.
+
+    Returns:
+        list of dicts with "path", "version" (None for a module replaced as a whole),
+        "replacement" ((path, version or None) or None), "explicit" (required directly by
+        the main module) and "packages" (vendored package import paths).
+    """
+    modules = []
+    for line in text.splitlines():
+        if line.startswith("## "):
+            if modules:
+                annotations = [part.strip() for part in line[3:].split(";")]
+                modules[-1]["explicit"] = "explicit" in annotations
+        elif line.startswith("# "):
+            tokens = line[2:].split()
+            replacement = None
+            if "=>" in tokens:
+                arrow = tokens.index("=>")
+                new = tokens[arrow + 1:]
+                replacement = (new[0], new[1] if len(new) > 1 else None) if new else None
+                tokens = tokens[:arrow]
+            if tokens:
+                modules.append({"path": tokens[0], "version": tokens[1] if len(tokens) > 1 else None,
+                                "replacement": replacement, "explicit": False, "packages": []})
+        elif line.strip() and modules:
+            modules[-1]["packages"].append(line.strip())
+    return modules
+
+
+def default_mod_cache():
+    """Returns the module cache directory the go command would use (without running it)."""
+    if os.environ.get("GOMODCACHE"):
+        return os.environ["GOMODCACHE"]
+    gopath = os.environ.get("GOPATH", "").split(os.pathsep)[0] or os.path.join(os.path.expanduser("~"), "go")
+    return os.path.join(gopath, "pkg", "mod")
+
+
+def escape_path(path):
+    """Escapes a module path or version for the module cache ("Azure" -> "!azure")."""
+    return "".join(f"!{char.lower()}" if char.isupper() else char for char in path)
+
+
+def go_mod_hash(data):
+    """Returns the go.sum hash ("h1:...") of a go.mod file's content."""
+    summary = f"{hashlib.sha256(data).hexdigest()}  go.mod\n".encode("utf-8")
+    return "h1:" + base64.b64encode(hashlib.sha256(summary).digest()).decode("ascii")
+
+
+def _is_local(path):
+    return path.startswith(("./", "../", "/")) or path in (".", "..")
+
+
+def _read(filename):
+    try:
+        with open(filename, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def find_module_root(path):
+    """Returns the module directory for a module directory, a go.mod file or a vendor/modules.txt file."""
+    path = os.path.abspath(path)
+    if os.path.isdir(path):
+        return path
+    if os.path.basename(path) == "modules.txt":
+        return os.path.dirname(os.path.dirname(path))
+    return os.path.dirname(path)
+
+
+def is_go_module_source(path):
+    """True if path is a module directory (with a go.mod), a go.mod file or a vendor/modules.txt file."""
+    if os.path.isdir(path):
+        return os.path.isfile(os.path.join(path, "go.mod"))
+    return os.path.basename(path) in ("go.mod", "modules.txt") and os.path.isfile(path)
+
+
+def build_go_module_graph(path, mod_cache=None, verify=True):
+    """
+    Builds the module graph of the Go module at path (a directory, its go.mod or its
+    vendor/modules.txt) from go.mod files only.
+
+    Parameters:
+        mod_cache: Module cache directory (default: see default_mod_cache).
+        verify: Ignore cached go.mod files whose hash does not match the main go.sum.
+
+    Returns:
+        graph (ModuleGraph): The interned graph; graph.indirect marks "// indirect" edges.
+        report (dict): "main" (main module path), "missing" (module versions without a go.mod),
+                       "mismatched" (go.mod files failing the go.sum check), "invalid"
+                       (dependency go.mod files that do not parse), "replaced" and
+                       "excluded" (directives applied), "vendored" (modules in modules.txt).
+    """
+    root = find_module_root(path)
+    main_data = _read(os.path.join(root, "go.mod"))
+    if main_data is None:
+        raise FileNotFoundError(f"no go.mod in {root}")
+    sum_data = _read(os.path.join(root, "go.sum"))
+    vendor_data = _read(os.path.join(root, "vendor", "modules.txt"))
+    return graph_from_go_mod(main_data.decode("utf-8"),
+                             go_sum=sum_data.decode("utf-8") if sum_data else None,
+                             modules_txt=vendor_data.decode("utf-8") if vendor_data else None,
+                             root=root, mod_cache=mod_cache, verify=verify)
+
+
+def graph_from_go_mod(go_mod, go_sum=None, modules_txt=None, root=None, mod_cache=None, verify=True,
+                      requirements_cache=None, use_mod_cache=True):
+    """
+    Builds the module graph from the contents of a main module's go.mod (and optionally its
+    go.sum and vendor/modules.txt), e.g. read from git objects. See build_go_module_graph.
+
+    Parameters:
+        root: Module directory for replacements with a local path (skipped if None).
+        requirements_cache: Optional dict reused across calls, (module, version) ->
+                            (status, requirements) of dependency go.mod files from the
+                            module cache (module versions are immutable).
+        use_mod_cache: If False, only the main module's requirements are used.
+    """
+    main = parse_go_mod(go_mod)
+    main_path = main["module"] or (os.path.basename(root) if root else "main")
+    mod_cache = mod_cache or default_mod_cache()
+    sums = parse_go_sum(go_sum) if go_sum else {}
+    replacements = {(old_path, old_version): (new_path, new_version)
+                    for old_path, old_version, new_path, new_version in main["replace"]}
+    excluded = set(main["exclude"])
+    report = {"main": main_path, "missing": [], "mismatched": [], "invalid": [], "replaced": [], "excluded": [],
+              "vendored": 0}
+    if requirements_cache is None:
+        requirements_cache = {}
+
+    def cached_requirements(module, version):
+        key = (module, version)
+        if key not in requirements_cache:
+            data = _read(os.path.join(mod_cache, "cache", "download", escape_path(module), "@v",
+                                      f"{escape_path(version)}.mod"))
+            expected = sums.get((module, f"{version}/go.mod"))
+            if data is None:
+                requirements_cache[key] = ("missing", None)
+            elif verify and expected is not None and go_mod_hash(data) != expected:
+                requirements_cache[key] = ("mismatched", None)
+            else:
+                try:
+                    requirements_cache[key] = ("ok", parse_go_mod(data.decode("utf-8", "replace"))["require"])
+                except ValueError:
+                    requirements_cache[key] = ("invalid", None)
+        return requirements_cache[key]
+
+    def dependency_requirements(module, version):
+        """Returns the requirements of a module version, or None if its go.mod is unavailable."""
+        name = f"{module}@{version}"
+        replacement = replacements.get((module, version)) or replacements.get((module, None))
+        if replacement is not None:
+            report["replaced"].append(name)
+            module, version = replacement
+            if version is None and _is_local(module):
+                data = _read(os.path.join(root, module, "go.mod")) if root else None
+                if data is None:
+                    report["missing"].append(name)
+                    return None
+                try:
+                    return parse_go_mod(data.decode("utf-8", "replace"))["require"]
+                except ValueError:
+                    report["invalid"].append(name)
+                    return None
+        status, requirements = cached_requirements(module, version)
+        if status != "ok":
+            report[status].append(name)
+        return requirements
+
+    index = {main_path: 0}
+    sources, targets, indirect = [], [], []
+    intern = index.setdefault
+
+    def add_requirements(source, requirements):
+        found = []
+        for module, version, is_indirect in requirements:
+            if (module, version) in excluded:
+                report["excluded"].append(f"{module}@{version}")
+                continue
+            name = f"{module}@{version}"
+            seen = name in index
+            sources.append(source)
+            targets.append(intern(name, len(index)))
+            indirect.append(is_indirect)
+            if not seen:
+                found.append((module, version))
+        return found
+
+    queue = deque(add_requirements(0, main["require"]))
+    while queue and use_mod_cache:
+        module, version = queue.popleft()
+        requirements = dependency_requirements(module, version)
+        if requirements is not None:
+            queue.extend(add_requirements(index[f"{module}@{version}"], requirements))
+
+    # Vendored modules the main go.mod does not list (go < 1.17 modules only list direct ones).
+    if modules_txt is not None:
+        vendored = [module for module in parse_modules_txt(modules_txt) if module["version"]]
+        report["vendored"] = len(vendored)
+        required = {module for module, _, _ in main["require"]}
+        add_requirements(0, [(module["path"], module["version"], not module["explicit"])
+                             for module in vendored if module["path"] not in required])
+
+    graph = ModuleGraph.from_edges(index, sources, targets, indirect=indirect)
+    return graph, report
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Dependency graph history of a Go module across git revisions (see gomodgraph.history.py).
+
+The go.mod and vendor/modules.txt of every commit that changed them are read straight from
+the git object store (`git log --raw` for the blob ids, one `git cat-file --batch` process for
+the contents), so nothing is checked out. Each version is turned into a module graph with
+gomodgraph_gomod.py; by default only the main module's requirements and the vendored
+modules are used, the go.mod files in the local module cache can add the deeper levels.
+
+Consecutive graphs are stored as deltas in one compressed file ("<name>.graphhist"): module
+names are interned once for the whole history, and every revision records the nodes and
+edges added and removed since the previous one. Every KEYFRAME_INTERVAL revisions a full
+snapshot is stored instead, so rebuilding the graph at any commit replays at most that
+many deltas. Node and edge counts and the depth are stored per revision, and the first
+appearance of every module is computed from the added-node deltas in one pass.
+
+Usage:
+    history = build_history("path/to/podman", rev="main")
+    history.save("podman.graphhist")
+    history = GraphHistory.load("podman.graphhist")
+    graph = history.graph_at(history.find("1a2b3c"))
+"""
+
+import os
+import sys
+import zlib
+import zipfile
+import subprocess
+import numpy as np
+from gomodgraph_core import ModuleGraph, compute_depths, module_path
+from gomodgraph_gomod import graph_from_go_mod
+
+HISTORY_VERSION = 1
+
+# A full snapshot is stored every this many revisions.
+KEYFRAME_INTERVAL = 64
+
+
+class GitObjects:
+    """Reads blobs through one long-running `git cat-file --batch` process."""
+
+    def __init__(self, repo):
+        self.proc = subprocess.Popen(["git", "-C", repo, "cat-file", "--batch"],
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def read(self, oid):
+        self.proc.stdin.write(oid.encode("ascii") + b"\n")
+        self.proc.stdin.flush()
+        header = self.proc.stdout.readline().split()
+        if len(header) < 3 or header[1] == b"missing":
+            return None
+        data = self.proc.stdout.read(int(header[2]))
+        self.proc.stdout.read(1)  # Trailing newline.
+        return data
+
+    def close(self):
+        self.proc.stdin.close()
+        self.proc.wait()
+
+
+def git(repo, *args):
+    return subprocess.run(["git", "-C", repo, *args], check=True, capture_output=True, text=True).stdout
+
+
+def changed_commits(repo, rev_range, paths):
+    """
+    Yields (commit, timestamp, {path: blob id or None}) for the first-parent commits in
+    rev_range that changed any of paths, oldest first.
+    """
+    out = subprocess.Popen(["git", "-C", repo, "log", "--first-parent", "--diff-merges=first-parent", "--reverse",
+                            "--raw", "--no-abbrev", "--no-renames", "--format=commit %H %ct", rev_range, "--", *paths],
+                           stdout=subprocess.PIPE, text=True)
+    commit = None
+    for line in out.stdout:
+        if line.startswith("commit "):
+            if commit is not None:
+                yield commit
+            _, sha, timestamp = line.split()
+            commit = (sha, int(timestamp), {})
+        elif line.startswith(":") and commit is not None:
+            meta, path = line.rstrip("\n").split("\t", 1)
+            new_oid = meta.split()[3]
+            commit[2][path] = None if set(new_oid) == {"0"} else new_oid
+    if commit is not None:
+        yield commit
+    if out.wait() != 0:
+        raise subprocess.CalledProcessError(out.returncode, "git log")
+
+
+def _offsets(chunks):
+    offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+    np.cumsum([len(chunk) for chunk in chunks], out=offsets[1:])
+    return offsets
+
+
+class GraphHistory:
+    """
+    Module graphs of a sequence of revisions, stored as deltas over one interned name table.
+
+    Attributes:
+        names (list): Global node id -> module name.
+        commits (list), times (list): Commit hash and commit time of every revision.
+        roots (list): Global node id of the main module per revision.
+        stats (list): (nodes, edges, depth) per revision.
+        last_commit (str): Last commit scanned (for incremental updates).
+    """
+
+    def __init__(self, rev="HEAD", subdir=""):
+        self.rev = rev
+        self.subdir = subdir
+        self.names = []
+        self.index = {}
+        self.commits = []
+        self.times = []
+        self.roots = []
+        self.stats = []
+        self.keyframe = []
+        self.node_added, self.node_removed = [], []
+        self.edge_added, self.edge_removed = [], []
+        self.last_commit = None
+        self._state = None
+
+    def __len__(self):
+        return len(self.commits)
+
+    def _intern(self, name):
+        node = self.index.get(name)
+        if node is None:
+            node = self.index[name] = len(self.names)
+            self.names.append(name)
+        return node
+
+    def append(self, commit, timestamp, graph):
+        """Adds the graph of a revision, stored as a delta against the previous revision."""
+        ids = np.array([self._intern(name) for name in graph.names], dtype=np.int64)
+        nodes = set(ids.tolist())
+        edges = set(zip(ids[graph.sources].tolist(), ids[graph.targets].tolist()))
+        previous_nodes, previous_edges = self._state if self._state is not None else self._replay(len(self) - 1)
+        if len(self) and nodes == previous_nodes and edges == previous_edges:
+            return False
+
+        keyframe = len(self) % KEYFRAME_INTERVAL == 0
+        if keyframe:
+            self.node_added.append(np.array(sorted(nodes), dtype=np.int32))
+            self.node_removed.append(np.empty(0, dtype=np.int32))
+            self.edge_added.append(np.array(sorted(edges), dtype=np.int32).reshape(-1, 2))
+            self.edge_removed.append(np.empty((0, 2), dtype=np.int32))
+        else:
+            self.node_added.append(np.array(sorted(nodes - previous_nodes), dtype=np.int32))
+            self.node_removed.append(np.array(sorted(previous_nodes - nodes), dtype=np.int32))
+            self.edge_added.append(np.array(sorted(edges - previous_edges), dtype=np.int32).reshape(-1, 2))
+            self.edge_removed.append(np.array(sorted(previous_edges - edges), dtype=np.int32).reshape(-1, 2))
+        depths = compute_depths(graph)
+        self.keyframe.append(keyframe)
+        self.commits.append(commit)
+        self.times.append(timestamp)
+        self.roots.append(int(ids[0]) if len(ids) else -1)
+        self.stats.append((graph.num_nodes, graph.num_edges, int(depths.max()) if len(depths) else 0))
+        self._state = (nodes, edges)
+        return True
+
+    def _replay(self, revision):
+        """Returns the (node set, edge set) of a revision, replaying from the last keyframe."""
+        if revision < 0:
+            return set(), set()
+        start = revision
+        while not self.keyframe[start]:
+            start -= 1
+        nodes, edges = set(), set()
+        for i in range(start, revision + 1):
+            nodes.difference_update(self.node_removed[i].tolist())
+            nodes.update(self.node_added[i].tolist())
+            edges.difference_update(map(tuple, self.edge_removed[i].tolist()))
+            edges.update(map(tuple, self.edge_added[i].tolist()))
+        return nodes, edges
+
+    def graph_at(self, revision):
+        """Returns the ModuleGraph of a revision (main module first)."""
+        nodes, edges = self._replay(revision)
+        root = self.roots[revision]
+        order = [root] + sorted(node for node in nodes if node != root)
+        index = {self.names[node]: i for i, node in enumerate(order)}
+        local = {node: i for i, node in enumerate(order)}
+        pairs = sorted(edges, key=lambda edge: (local[edge[0]], local[edge[1]]))
+        return ModuleGraph.from_edges(index, [local[u] for u, _ in pairs], [local[v] for _, v in pairs])
+
+    def node_changes(self, revision):
+        """Returns the (added, removed) global node ids of a revision against the previous one."""
+        if not self.keyframe[revision] or revision == 0:
+            return self.node_added[revision], self.node_removed[revision]
+        previous, _ = self._replay(revision - 1)
+        current = set(self.node_added[revision].tolist())
+        return (np.array(sorted(current - previous), dtype=np.int32),
+                np.array(sorted(previous - current), dtype=np.int32))
+
+    def find(self, commit):
+        """Returns the revision of a commit (hash or unique prefix), or None."""
+        matches = [i for i, sha in enumerate(self.commits) if sha.startswith(commit)]
+        return matches[0] if len(matches) == 1 else None
+
+    def first_appearances(self):
+        """Returns an int array: global node id -> first revision containing it (-1 if never)."""
+        if not len(self):
+            return np.full(len(self.names), -1, dtype=np.int64)
+        added = np.concatenate(self.node_added)
+        revision = np.repeat(np.arange(len(self)), [len(chunk) for chunk in self.node_added])
+        first = np.full(len(self.names), -1, dtype=np.int64)
+        nodes, position = np.unique(added, return_index=True)
+        first[nodes] = revision[position]
+        return first
+
+    def appeared(self, spec):
+        """
+        Returns [(name, revision)] for a module path (all versions, oldest revision first) or
+        an exact module@version name, with the revision in which each first appeared.
+        """
+        first = self.first_appearances()
+        matches = [node for node, name in enumerate(self.names) if name == spec or module_path(name) == spec]
+        return sorted(((self.names[node], int(first[node])) for node in matches if first[node] >= 0),
+                      key=lambda item: item[1])
+
+    def save(self, filename):
+        names_blob = "\n".join(self.names).encode("utf-8")
+        arrays = {
+            "version": np.array([HISTORY_VERSION]),
+            "meta": np.array([self.rev, self.subdir, self.last_commit or ""]),
+            "names": np.frombuffer(names_blob, dtype=np.uint8),
+            "commits": np.array(self.commits, dtype="S40").reshape(-1),
+            "times": np.array(self.times, dtype=np.int64),
+            "roots": np.array(self.roots, dtype=np.int32),
+            "stats": np.array(self.stats, dtype=np.int32).reshape(-1, 3),
+            "keyframe": np.array(self.keyframe, dtype=bool),
+        }
+        for key in ("node_added", "node_removed", "edge_added", "edge_removed"):
+            chunks = getattr(self, key)
+            arrays[f"{key}_offsets"] = _offsets(chunks)
+            shape = (0,) if key.startswith("node") else (0, 2)
+            arrays[key] = np.concatenate(chunks) if chunks else np.empty(shape, dtype=np.int32)
+        tmp_file = f"{filename}.{os.getpid()}.tmp"
+        with open(tmp_file, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_file, filename)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Reads a history file written by save.
+
+        Raises:
+            OSError: The file cannot be read.
+            ValueError: The file is truncated, not a history file or of another version.
+        """
+        try:
+            data = np.load(filename)
+        except (ValueError, zipfile.BadZipFile, EOFError) as e:
+            raise ValueError(f"not a valid history file: {e}") from None
+        if not isinstance(data, np.lib.npyio.NpzFile):
+            raise ValueError("not a valid history file: not an .npz archive")
+        with data:
+            try:
+                return cls._from_arrays(data)
+            except (AttributeError, zipfile.BadZipFile, zlib.error, KeyError, EOFError) as e:
+                raise ValueError(f"not a valid history file: {e}") from None
+
+    @classmethod
+    def _from_arrays(cls, data):
+        if int(data["version"][0]) != HISTORY_VERSION:
+            raise ValueError(f"unsupported history file version {int(data['version'][0])}")
+        rev, subdir, last_commit = data["meta"].tolist()
+        history = cls(rev, subdir)
+        history.last_commit = last_commit or None
+        blob = data["names"].tobytes().decode("utf-8")
+        history.names = blob.split("\n") if blob else []
+        history.index = {name: i for i, name in enumerate(history.names)}
+        history.commits = [sha.decode("ascii") for sha in data["commits"].tolist()]
+        history.times = data["times"].tolist()
+        history.roots = data["roots"].tolist()
+        history.stats = [tuple(row) for row in data["stats"].tolist()]
+        history.keyframe = data["keyframe"].tolist()
+        for key in ("node_added", "node_removed", "edge_added", "edge_removed"):
+            offsets = data[f"{key}_offsets"]
+            values = data[key]
+            setattr(history, key, [values[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)])
+        return history
+
+
+def build_history(repo, rev="HEAD", subdir="", history=None, mod_cache=None, use_mod_cache=False):
+    """
+    Scans the first-parent history of rev and appends a revision for every commit that
+    changed the dependency graph. An existing history is updated incrementally if its last
+    scanned commit is an ancestor of rev (and rebuilt otherwise). Commits whose go.mod does
+    not parse are skipped with a warning.
+
+    Parameters:
+        subdir: Directory of the go.mod inside the repository ("" for the top level).
+        use_mod_cache: Also follow the go.mod files of dependencies in the module cache.
+
+    Returns:
+        history (GraphHistory)
+    """
+    head = git(repo, "rev-parse", rev).strip()
+    rev_range = head
+    if history is not None and history.last_commit:
+        is_ancestor = subprocess.run(["git", "-C", repo, "merge-base", "--is-ancestor", history.last_commit, head],
+                                     capture_output=True).returncode == 0
+        if is_ancestor and history.subdir == subdir:
+            rev_range = f"{history.last_commit}..{head}"
+        else:
+            history = None
+    if history is None:
+        history = GraphHistory(rev, subdir)
+
+    prefix = f"{subdir.strip('/')}/" if subdir.strip("/") else ""
+    go_mod_path, vendor_path = f"{prefix}go.mod", f"{prefix}vendor/modules.txt"
+    # Blob ids as of the last scanned commit, for the file that did not change in a commit.
+    blobs = {}
+    if rev_range != head:
+        for path in (go_mod_path, vendor_path):
+            listing = git(repo, "ls-tree", history.last_commit, "--", path).split()
+            blobs[path] = listing[2] if len(listing) >= 3 else None
+
+    objects = GitObjects(repo)
+    # The decoded text of the current blob of each path; older blobs are never needed again.
+    contents = {}
+    requirements_cache = {}
+
+    def text(path):
+        oid = blobs.get(path)
+        if oid is None:
+            return None
+        cached = contents.get(path)
+        if cached is None or cached[0] != oid:
+            data = objects.read(oid)
+            cached = contents[path] = (oid, data.decode("utf-8", "replace") if data is not None else None)
+        return cached[1]
+
+    try:
+        for sha, timestamp, changes in changed_commits(repo, rev_range, [go_mod_path, vendor_path]):
+            blobs.update(changes)
+            go_mod = text(go_mod_path)
+            if go_mod is None:
+                continue
+            try:
+                graph, _ = graph_from_go_mod(go_mod, modules_txt=text(vendor_path), mod_cache=mod_cache,
+                                             verify=False, requirements_cache=requirements_cache,
+                                             use_mod_cache=use_mod_cache)
+            except ValueError as e:
+                # A broken go.mod in one commit must not abort a scan of thousands of commits.
+                sys.stderr.write(f"Warning: skipping {sha[:10]}, cannot parse {go_mod_path}: {e}\n")
+                continue
+            history.append(sha, timestamp, graph)
+    finally:
+        objects.close()
+    history.last_commit = head
+    return history
+
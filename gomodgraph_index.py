@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Reachability indexes over the gomodgraph core representation (see gomodgraph_core.py).
+
+The module graph is condensed into its strongly connected components, which form a DAG.
+For every component the set of reachable components (and, for the reversed DAG, the set of
+components that reach it) is stored as a packed bitset row. After this one preprocessing
+pass, "all dependencies of X", "all dependents of X" and "can A reach B" are answered with a
+few array operations, and shortest chains only search the part of the graph that can
+actually reach the target.
+
+The same bitsets drive the --condense and --transitive-reduction pipeline stages: every
+strongly connected component can be collapsed into one node, and an edge is redundant when
+its target is already reachable through another successor of its source.
+
+Usage:
+    index = ReachabilityIndex(load_graph("go_mod_graph.txt"))
+    index.dependents([node])        # node mask of everything that (transitively) requires node
+    index.shortest_chain(root, [node])
+"""
+
+import collections
+import numpy as np
+from gomodgraph_core import ModuleGraph, module_path
+
+
+def strongly_connected_components(graph):
+    """
+    Iterative Tarjan over the CSR adjacency of the graph.
+
+    Component ids are assigned in reverse topological order: every component only has edges
+    to components with a smaller id.
+
+    Returns:
+        num_components (int): Number of strongly connected components.
+        component (np.ndarray): int32 array mapping node -> component id.
+    """
+    n = graph.num_nodes
+    offsets = graph.offsets.tolist()
+    targets = graph.targets.tolist()
+    order = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    component = [-1] * n
+    stack = []
+    counter = 0
+    num_components = 0
+
+    for root in range(n):
+        if order[root] != -1:
+            continue
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, offsets[root])]
+        while work:
+            v, pos = work[-1]
+            if pos < offsets[v + 1]:
+                work[-1] = (v, pos + 1)
+                w = targets[pos]
+                if order[w] == -1:
+                    order[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, offsets[w]))
+                elif on_stack[w] and order[w] < low[v]:
+                    low[v] = order[w]
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low[v] < low[parent]:
+                    low[parent] = low[v]
+            if low[v] == order[v]:
+                # v is the root of a component: pop its members.
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component[w] = num_components
+                    if w == v:
+                        break
+                num_components += 1
+    return num_components, np.array(component, dtype=np.int32)
+
+
+def csr_from_pairs(num_nodes, sources, targets):
+    """
+    Builds deduplicated CSR arrays (offsets, targets) from parallel source/target arrays.
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    if len(sources):
+        keys = np.unique(sources * num_nodes + targets)
+        sources = keys // num_nodes
+        targets = keys % num_nodes
+    offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=num_nodes), out=offsets[1:])
+    return offsets, targets.astype(np.int32)
+
+
+def _closure_bitsets(num_components, offsets, targets):
+    """
+    Computes packed reachability bitsets for a DAG whose edges only point to smaller ids.
+    Row c has bit d set if d is reachable from c (c itself is not included).
+    """
+    width = (num_components + 7) // 8
+    rows = np.zeros((num_components, width), dtype=np.uint8)
+    for c in range(num_components):
+        children = targets[offsets[c]:offsets[c + 1]]
+        if not len(children):
+            continue
+        row = rows[c]
+        # Children are processed before their parents, so their rows are already complete.
+        np.bitwise_or.reduce(rows[children], axis=0, out=row)
+        np.bitwise_or.at(row, children >> 3, (128 >> (children & 7)).astype(np.uint8))
+    return rows
+
+
+class ReachabilityIndex:
+    """
+    Condensation DAG of a ModuleGraph with per-component descendant/ancestor bitsets.
+
+    Attributes:
+        graph (ModuleGraph): The indexed graph.
+        num_components (int): Number of strongly connected components.
+        component (np.ndarray): Node -> component id (reverse topological order).
+        dag_offsets, dag_targets (np.ndarray): CSR adjacency of the condensation DAG.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.num_components, self.component = strongly_connected_components(graph)
+        comp_src = self.component[graph.sources]
+        comp_dst = self.component[graph.targets]
+        between = comp_src != comp_dst
+        self.dag_offsets, self.dag_targets = csr_from_pairs(self.num_components,
+                                                            comp_src[between], comp_dst[between])
+        self._descendants = _closure_bitsets(self.num_components, self.dag_offsets, self.dag_targets)
+        self._ancestors = None
+        # Members of each component, for turning component bitsets back into node masks.
+        self._size = np.bincount(self.component, minlength=self.num_components)
+
+    @property
+    def ancestors_bitsets(self):
+        """Packed ancestor bitsets, computed on first use from the reversed DAG."""
+        if self._ancestors is None:
+            n = self.num_components
+            sources = np.repeat(np.arange(n, dtype=np.int32), np.diff(self.dag_offsets))
+            # Reversing the DAG flips the topological order, so relabel c -> n - 1 - c.
+            offsets, targets = csr_from_pairs(n, n - 1 - self.dag_targets, n - 1 - sources)
+            flipped = _closure_bitsets(n, offsets, targets)
+            rows = np.unpackbits(flipped, axis=1, count=n)[::-1, ::-1]
+            self._ancestors = np.packbits(rows, axis=1)
+        return self._ancestors
+
+    def _components_mask(self, rows, nodes):
+        comps = np.unique(self.component[np.asarray(nodes, dtype=np.int64)])
+        merged = np.bitwise_or.reduce(rows[comps], axis=0)
+        comp_mask = np.unpackbits(merged, count=self.num_components).astype(bool)
+        # Other members of a cyclic component reach (and are reached by) the node itself.
+        comp_mask[comps[self._size[comps] > 1]] = True
+        node_mask = comp_mask[self.component]
+        node_mask[np.asarray(nodes, dtype=np.int64)] = False
+        return node_mask
+
+    def dependencies(self, nodes):
+        """Node mask of every module transitively required by any of the given nodes."""
+        return self._components_mask(self._descendants, nodes)
+
+    def dependents(self, nodes):
+        """Node mask of every module that transitively requires any of the given nodes."""
+        return self._components_mask(self.ancestors_bitsets, nodes)
+
+    def reaches(self, source, target):
+        """True if there is a path from source to target."""
+        cs = self.component[source]
+        ct = self.component[target]
+        if cs == ct:
+            return source == target or self._size[cs] > 1
+        return bool(self._descendants[cs, ct >> 3] & (128 >> (ct & 7)))
+
+    def shortest_chain(self, source, targets):
+        """
+        Returns the shortest path (list of node indices) from source to any of the targets,
+        or None if none of them is reachable. The BFS only visits nodes that can reach a target.
+        """
+        targets = [t for t in targets if t == source or self.reaches(source, t)]
+        if not targets:
+            return None
+        if source in targets:
+            return [source]
+        allowed = self.dependents(targets)
+        allowed[targets] = True
+        is_target = np.zeros(self.graph.num_nodes, dtype=bool)
+        is_target[targets] = True
+
+        parent = {source: -1}
+        queue = collections.deque([source])
+        while queue:
+            node = queue.popleft()
+            for neighbor in self.graph.successors(node).tolist():
+                if neighbor in parent or not allowed[neighbor]:
+                    continue
+                parent[neighbor] = node
+                if is_target[neighbor]:
+                    chain = [neighbor]
+                    while parent[chain[-1]] != -1:
+                        chain.append(parent[chain[-1]])
+                    return chain[::-1]
+                queue.append(neighbor)
+        return None
+
+
+def masked_graph(graph, node_mask, edge_mask=None):
+    """
+    Returns a ModuleGraph with the same nodes (and node indices) as graph but only the edges
+    kept by node_mask and edge_mask. Masked-out nodes stay in the graph without edges.
+    """
+    keep = graph.edge_mask(node_mask, edge_mask)
+    offsets = np.zeros(graph.num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(graph.sources[keep], minlength=graph.num_nodes), out=offsets[1:])
+    # Masking keeps the CSR grouping by source, so no sort is needed.
+    return ModuleGraph(graph.names, offsets, graph.targets[keep], index=graph._index, safe_ids=graph._safe_ids)
+
+
+def transitive_reduction(graph, node_mask, edge_mask=None):
+    """
+    Removes every edge u -> v whose target is also reachable through another path, using the
+    descendant bitsets of the condensation DAG: a DAG edge c -> d is redundant if d is in the
+    closure of another child of c. Of several edges between the same two components only the
+    first is kept, and edges inside a component (cycles) are kept, so reachability between
+    all kept nodes is unchanged.
+
+    Returns:
+        edge_mask (np.ndarray): Boolean mask of the edges that remain.
+    """
+    keep = graph.edge_mask(node_mask, edge_mask)
+    index = ReachabilityIndex(masked_graph(graph, node_mask, keep))
+    n = index.num_components
+    offsets = index.dag_offsets
+    targets = index.dag_targets.astype(np.int64)
+    rows = index._descendants
+
+    needed = np.ones(len(targets), dtype=bool)
+    for c in np.flatnonzero(np.diff(offsets) > 1).tolist():
+        start, end = offsets[c], offsets[c + 1]
+        children = targets[start:end]
+        via_children = np.bitwise_or.reduce(rows[children], axis=0)
+        needed[start:end] = (via_children[children >> 3] & (128 >> (children & 7))) == 0
+    dag_sources = np.repeat(np.arange(n, dtype=np.int64), np.diff(offsets))
+    needed_keys = dag_sources[needed] * n + targets[needed]
+
+    edges = np.flatnonzero(keep)
+    comp_src = index.component[graph.sources[edges]].astype(np.int64)
+    comp_dst = index.component[graph.targets[edges]].astype(np.int64)
+    between = comp_src != comp_dst
+    keys = comp_src * n + comp_dst
+    # First edge of every needed component pair.
+    _, first = np.unique(keys, return_index=True)
+    is_first = np.zeros(len(edges), dtype=bool)
+    is_first[first] = True
+    kept = ~between | (is_first & np.isin(keys, needed_keys))
+
+    result = np.zeros(graph.num_edges, dtype=bool)
+    result[edges[kept]] = True
+    return result
+
+
+def condense_graph(graph, node_mask=None, edge_mask=None):
+    """
+    Collapses every strongly connected component of the masked graph into one node. A
+    component of several modules is named after the module path of its first member followed
+    by the number of other members ("golang.org/x/net +2"); other nodes keep their name.
+    Components keep the order of their first member, so the main module stays node 0.
+
+    Returns:
+        condensed (ModuleGraph): The condensation DAG of the masked graph.
+    """
+    if node_mask is None:
+        node_mask = np.ones(graph.num_nodes, dtype=bool)
+    sub = masked_graph(graph, node_mask, edge_mask)
+    num_components, component = strongly_connected_components(sub)
+
+    nodes = np.flatnonzero(node_mask)
+    size = np.bincount(component[nodes], minlength=num_components)
+    new_id = np.full(num_components, -1, dtype=np.int64)
+    index = {}
+    for node in nodes.tolist():
+        c = component[node]
+        if new_id[c] != -1:
+            continue
+        name = graph.names[node]
+        if size[c] > 1:
+            name = f"{module_path(name)} +{size[c] - 1}"
+        if name in index:
+            name = f"{name} #{c}"
+        new_id[c] = len(index)
+        index[name] = len(index)
+
+    src = new_id[component[sub.sources]]
+    dst = new_id[component[sub.targets]]
+    between = src != dst
+    return ModuleGraph.from_edges(index, src[between], dst[between])
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Layout computation with a position cache for the gomodgraph renderers.
+
+Computed node positions are stored as JSON under .gomodgraph_cache/layouts/, keyed by a hash
+of the node set, the edge set and the layout parameters, so rendering the same filtered view
+again skips the layout entirely. The last layout of every output ("slot") is kept as well:
+when the graph only changed slightly (e.g. after a dependency bump), the previous positions
+seed the new layout (warm start) and only the new nodes are placed, which is much faster
+than a full Graphviz run and keeps the node placement stable between reports.
+
+A full layout is computed per weakly connected component: the components are laid out in
+parallel on a process pool and their bounding boxes are packed onto one canvas, so the
+isolated fragments of a filtered graph no longer stretch the main component across the
+whole image.
+
+Usage:
+    pos = compute_layout(G, prog="dot", args="-Grankdir=LR", slot="podman_full")
+"""
+
+import os
+import sys
+import json
+import hashlib
+import multiprocessing
+import networkx as nx
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+LAYOUT_CACHE_DIR = os.path.join(".gomodgraph_cache", "layouts")
+
+# Fraction of the new graph's nodes that must have a previous position for a warm start.
+WARM_START_MIN_OVERLAP = 0.8
+
+# Components with fewer nodes are laid out in the main process (not worth the pickling).
+PARALLEL_MIN_NODES = 50
+
+# Space between packed components and width-to-height ratio of the packed canvas.
+PACKING_GAP = 72.0
+PACKING_ASPECT = 4.0 / 3.0
+
+
+def graph_signature(G, params):
+    """Returns a hex digest of the node set, the edge set and the layout parameters."""
+    h = hashlib.sha256()
+    h.update(repr(params).encode("utf-8"))
+    h.update(b"\0nodes\0")
+    h.update("\n".join(sorted(map(str, G.nodes()))).encode("utf-8"))
+    h.update(b"\0edges\0")
+    h.update("\n".join(sorted(f"{u} {v}" for u, v in G.edges())).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _read_positions(filename):
+    try:
+        with open(filename, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {node: tuple(xy) for node, xy in data["positions"].items()}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_positions(filename, pos, signature):
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    tmp_file = f"{filename}.{os.getpid()}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump({"signature": signature,
+                   "positions": {str(node): [float(x), float(y)] for node, (x, y) in pos.items()}}, f)
+    os.replace(tmp_file, filename)
+
+
+def component_layout(G, prog="dot", args="-Grankdir=LR"):
+    """
+    Use graphviz layout (left-to-right for dot), or fall back to spring layout. The spring
+    layout is scaled to roughly Graphviz units (points) so components can be packed together.
+    """
+    if G.number_of_nodes() == 1:
+        return {node: (0.0, 0.0) for node in G.nodes()}
+    try:
+        return nx.nx_agraph.graphviz_layout(G, prog=prog, args=args)
+    except Exception:
+        pos = nx.spring_layout(G, k=5, iterations=50, seed=1)
+        scale = PACKING_GAP * np.sqrt(G.number_of_nodes())
+        return {node: tuple(np.asarray(xy) * scale) for node, xy in pos.items()}
+
+
+def pack_components(layouts, gap=PACKING_GAP, aspect=PACKING_ASPECT):
+    """
+    Packs component layouts onto one canvas with shelf packing: boxes are placed tallest
+    first, left to right in rows of about sqrt(total area * aspect) width.
+
+    Parameters:
+        layouts: List of node -> (x, y) mappings, one per component.
+
+    Returns:
+        dict: node -> (x, y) for all nodes.
+    """
+    boxes = []
+    for pos in layouts:
+        coords = np.array(list(pos.values()), dtype=float).reshape(-1, 2)
+        lo = coords.min(axis=0)
+        size = coords.max(axis=0) - lo + gap
+        boxes.append((pos, lo, size))
+    boxes.sort(key=lambda box: (-box[2][1], -box[2][0]))
+
+    row_width = max(np.sqrt(sum(size[0] * size[1] for _, _, size in boxes) * aspect),
+                    max(size[0] for _, _, size in boxes))
+    packed = {}
+    x = y = row_height = 0.0
+    for pos, lo, size in boxes:
+        if x > 0 and x + size[0] > row_width:
+            x, y = 0.0, y + row_height
+            row_height = 0.0
+        # Rows grow downwards (Graphviz' y axis points up).
+        offset = np.array([x, -y - size[1]]) - lo
+        for node, xy in pos.items():
+            packed[node] = tuple(np.asarray(xy, dtype=float) + offset)
+        x += size[0]
+        row_height = max(row_height, size[1])
+    return packed
+
+
+def full_layout(G, prog="dot", args="-Grankdir=LR", jobs=None):
+    """
+    Lays out every weakly connected component of G separately, the larger ones in parallel
+    on a process pool, and packs the results onto one canvas (see pack_components).
+
+    Parameters:
+        jobs: Number of worker processes (default: number of CPUs, or 1 when already running
+              in a worker process such as a render pool, which would otherwise oversubscribe
+              the CPUs).
+    """
+    undirected = G.to_undirected(as_view=True) if G.is_directed() else G
+    components = sorted(nx.connected_components(undirected), key=len, reverse=True)
+    if len(components) <= 1:
+        return component_layout(G, prog, args)
+
+    subgraphs = [G.subgraph(nodes).copy() for nodes in components]
+    large = [sub for sub in subgraphs if sub.number_of_nodes() >= PARALLEL_MIN_NODES]
+    small = [sub for sub in subgraphs if sub.number_of_nodes() < PARALLEL_MIN_NODES]
+    if jobs is None:
+        jobs = 1 if multiprocessing.parent_process() is not None else os.cpu_count() or 1
+    jobs = min(jobs, len(large))
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(component_layout, sub, prog, args) for sub in large]
+            layouts = [component_layout(sub, prog, args) for sub in small]
+            layouts += [future.result() for future in futures]
+    else:
+        layouts = [component_layout(sub, prog, args) for sub in subgraphs]
+    return pack_components(layouts)
+
+
+def warm_start_layout(G, previous, iterations=10):
+    """
+    Places the graph starting from previous positions. Nodes that already had a position stay
+    fixed; new nodes start at the centroid of their placed neighbours and are relaxed with a
+    short spring layout, kept inside the previous bounding box. Works in normalised
+    coordinates so it fits any previous layout scale.
+    """
+    known = [node for node in G.nodes() if node in previous]
+    coords = np.array([previous[node] for node in known], dtype=float)
+    lo = coords.min(axis=0)
+    span = float(np.ptp(coords, axis=0).max()) or 1.0
+
+    seed = {node: (np.asarray(previous[node], dtype=float) - lo) / span for node in known}
+    rng = np.random.default_rng(1)
+    for node in G.nodes():
+        if node in seed:
+            continue
+        placed = [seed[n] for n in nx.all_neighbors(G, node) if n in seed]
+        base = np.mean(placed, axis=0) if placed else np.full(2, 0.5)
+        seed[node] = base + rng.normal(scale=0.02, size=2)
+
+    if len(known) == G.number_of_nodes():
+        pos = seed
+    else:
+        k = 1.0 / np.sqrt(max(G.number_of_nodes(), 1))
+        pos = nx.spring_layout(G, pos=seed, fixed=known, k=k, iterations=iterations, seed=1)
+        pos = {node: np.clip(xy, 0.0, 1.0) for node, xy in pos.items()}
+    return {node: tuple(np.asarray(xy) * span + lo) for node, xy in pos.items()}
+
+
+def compute_layout(G, prog="dot", args="-Grankdir=LR", slot=None, cache_dir=LAYOUT_CACHE_DIR, use_cache=True,
+                   jobs=None):
+    """
+    Returns node positions for G, using the layout cache when possible.
+
+    Parameters:
+        G: The graph to lay out.
+        prog, args: Graphviz program and arguments (part of the cache key).
+        slot: Name of the output this layout is for (e.g. the output file's stem). The last
+              layout of a slot seeds a warm start when the graph changed only slightly.
+        cache_dir: Directory holding the cached layouts.
+        use_cache: If False, always compute a full layout and do not touch the cache.
+        jobs: Number of worker processes for the per-component layout.
+    """
+    if not use_cache or G.number_of_nodes() == 0:
+        return full_layout(G, prog, args, jobs)
+
+    signature = graph_signature(G, ("packed", prog, args))
+    cached_file = os.path.join(cache_dir, f"{signature}.json")
+    pos = _read_positions(cached_file)
+    if pos is not None and all(node in pos for node in G.nodes()):
+        return pos
+
+    slot_file = os.path.join(cache_dir, f"{slot}.last.json") if slot else None
+    previous = _read_positions(slot_file) if slot_file else None
+    overlap = sum(1 for node in G.nodes() if node in previous) / G.number_of_nodes() if previous else 0.0
+    if overlap >= WARM_START_MIN_OVERLAP:
+        pos = warm_start_layout(G, previous)
+    else:
+        pos = full_layout(G, prog, args, jobs)
+
+    try:
+        _write_positions(cached_file, pos, signature)
+        if slot_file:
+            _write_positions(slot_file, pos, signature)
+    except OSError as e:
+        sys.stderr.write(f"Warning: could not write layout cache {cache_dir}: {e}\n")
+    return pos
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Module metrics over the gomodgraph core representation (see gomodgraph_core.py), for the
+metrics command (gomodgraph.metrics.py) and for sizing nodes in the renderers.
+
+Per module:
+  - in/out degree within the (filtered) graph,
+  - closure sizes: the number of transitive dependencies and dependents, counted from the
+    reachability bitsets of gomodgraph_index.py,
+  - betweenness: the share of shortest dependency chains passing through the module. It is
+    estimated with Brandes' algorithm from k sampled source modules, spread over several
+    processes. With k >= ln(2n / delta) / (2 epsilon^2) samples every estimate is within
+    epsilon of the exact (normalized) betweenness with probability at least 1 - delta
+    (Hoeffding bound over all n modules). If that k is not smaller than n, all modules are
+    used as sources and the result is exact.
+
+Usage:
+    table = module_metrics(graph, node_mask, edge_mask, epsilon=0.05, delta=0.1)
+    write_metrics(table, "metrics.csv")
+    sizes = read_node_sizes("metrics.csv", "betweenness")
+"""
+
+import os
+import csv
+import math
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from gomodgraph_index import ReachabilityIndex, masked_graph
+
+METRIC_COLUMNS = ["in_degree", "out_degree", "dependencies", "dependents", "betweenness"]
+
+# Adjacency of the graph in the worker processes, set once per process by _init_worker.
+_worker_graph = None
+
+
+def sample_size(num_nodes, epsilon, delta):
+    """Number of source samples for an additive error of epsilon with probability 1 - delta."""
+    if num_nodes < 3:
+        return num_nodes
+    return math.ceil(math.log(2 * num_nodes / delta) / (2 * epsilon ** 2))
+
+
+def _init_worker(offsets, targets, num_nodes):
+    global _worker_graph
+    _worker_graph = (offsets, targets, num_nodes)
+
+
+def _brandes_dependencies(sources):
+    """
+    Runs the single-source phase of Brandes' algorithm (unweighted, directed) from each of
+    the sources and returns the summed dependency of every node.
+    """
+    offsets, targets, num_nodes = _worker_graph
+    offsets = offsets.tolist()
+    targets = targets.tolist()
+    total = [0.0] * num_nodes
+    for s in sources:
+        sigma = {s: 1}
+        dist = {s: 0}
+        preds = {s: []}
+        order = [s]
+        i = 0
+        while i < len(order):
+            v = order[i]
+            i += 1
+            dv = dist[v] + 1
+            for k in range(offsets[v], offsets[v + 1]):
+                w = targets[k]
+                if w not in dist:
+                    dist[w] = dv
+                    sigma[w] = 0
+                    preds[w] = []
+                    order.append(w)
+                if dist[w] == dv:
+                    sigma[w] += sigma[v]
+                    preds[w].append(v)
+        delta = dict.fromkeys(order, 0.0)
+        for w in reversed(order):
+            coefficient = (1.0 + delta[w]) / sigma[w]
+            for v in preds[w]:
+                delta[v] += sigma[v] * coefficient
+            if w != s:
+                total[w] += delta[w]
+    return np.array(total)
+
+
+def approximate_betweenness(graph, node_mask=None, edge_mask=None, epsilon=0.05, delta=0.1,
+                            samples=None, jobs=None, seed=1):
+    """
+    Estimates the normalized betweenness (as networkx.betweenness_centrality with
+    normalized=True) of the nodes in the masked graph from sampled sources.
+
+    Parameters:
+        epsilon, delta: Error bound, see sample_size. Ignored if samples is given.
+        samples: Number of source modules to sample.
+        jobs: Number of worker processes (default: number of CPUs).
+
+    Returns:
+        betweenness (np.ndarray): float array over all nodes (0 outside node_mask).
+        num_samples (int): Number of sources used (equal to the number of nodes if exact).
+    """
+    if node_mask is None:
+        node_mask = np.ones(graph.num_nodes, dtype=bool)
+    sub = masked_graph(graph, node_mask, edge_mask)
+    nodes = np.flatnonzero(node_mask)
+    n = len(nodes)
+    k = samples if samples is not None else sample_size(n, epsilon, delta)
+    if k >= n:
+        sources = nodes
+    else:
+        sources = np.sort(np.random.default_rng(seed).choice(nodes, size=k, replace=False))
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(sources)))
+    chunks = [chunk.tolist() for chunk in np.array_split(sources, jobs * 4) if len(chunk)]
+    total = np.zeros(graph.num_nodes)
+    if jobs == 1:
+        _init_worker(sub.offsets, sub.targets, graph.num_nodes)
+        for chunk in chunks:
+            total += _brandes_dependencies(chunk)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(sub.offsets, sub.targets, graph.num_nodes)) as pool:
+            for partial in pool.map(_brandes_dependencies, chunks):
+                total += partial
+
+    if n > 2:
+        total *= (n / len(sources)) / ((n - 1) * (n - 2))
+    else:
+        total[:] = 0.0
+    total[~node_mask] = 0.0
+    return total, len(sources)
+
+
+def closure_sizes(graph, node_mask=None, edge_mask=None):
+    """
+    Returns two int64 arrays with the number of transitive dependencies and dependents of
+    every node in the masked graph, counted from the condensation DAG's bitsets.
+    """
+    if node_mask is None:
+        node_mask = np.ones(graph.num_nodes, dtype=bool)
+    index = ReachabilityIndex(masked_graph(graph, node_mask, edge_mask))
+    size = np.bincount(index.component[node_mask], minlength=index.num_components)
+
+    def counts(rows):
+        result = np.zeros(index.num_components, dtype=np.int64)
+        # Unpack in blocks to bound memory on large graphs.
+        for start in range(0, index.num_components, 1024):
+            block = np.unpackbits(rows[start:start + 1024], axis=1, count=index.num_components)
+            result[start:start + 1024] = block.astype(np.int64) @ size
+        # Members of a cycle reach every other member of their component.
+        result += np.maximum(size - 1, 0)
+        per_node = result[index.component]
+        per_node[~node_mask] = 0
+        return per_node
+
+    return counts(index._descendants), counts(index.ancestors_bitsets)
+
+
+def module_metrics(graph, node_mask=None, edge_mask=None, epsilon=0.05, delta=0.1, samples=None, jobs=None):
+    """
+    Computes the metrics table of the masked graph, sorted by betweenness (then dependents).
+
+    Returns:
+        table (list): One dict per module with "module" and the METRIC_COLUMNS.
+        num_samples (int): Number of betweenness sources used.
+    """
+    if node_mask is None:
+        node_mask = np.ones(graph.num_nodes, dtype=bool)
+    keep = graph.edge_mask(node_mask, edge_mask)
+    in_degree = np.bincount(graph.targets[keep], minlength=graph.num_nodes)
+    out_degree = np.bincount(graph.sources[keep], minlength=graph.num_nodes)
+    dependencies, dependents = closure_sizes(graph, node_mask, keep)
+    betweenness, num_samples = approximate_betweenness(graph, node_mask, keep, epsilon=epsilon, delta=delta,
+                                                       samples=samples, jobs=jobs)
+    nodes = np.flatnonzero(node_mask)
+    order = nodes[np.lexsort((-dependents[nodes], -betweenness[nodes]))]
+    table = [{"module": graph.names[node],
+              "in_degree": int(in_degree[node]),
+              "out_degree": int(out_degree[node]),
+              "dependencies": int(dependencies[node]),
+              "dependents": int(dependents[node]),
+              "betweenness": float(betweenness[node])}
+             for node in order.tolist()]
+    return table, num_samples
+
+
+def write_metrics(table, output_filename):
+    """Writes the metrics table as CSV (module followed by the METRIC_COLUMNS)."""
+    with open(output_filename, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["module"] + METRIC_COLUMNS)
+        writer.writeheader()
+        writer.writerows(table)
+
+
+def read_node_sizes(metrics_filename, column="betweenness"):
+    """
+    Reads a metrics CSV written by write_metrics and returns module -> relative size in
+    [0, 1] (square-root scaled, so a few hotspots do not dwarf everything else).
+    """
+    with open(metrics_filename, "r", encoding="utf-8", newline="") as f:
+        values = {row["module"]: float(row[column]) for row in csv.DictReader(f)}
+    largest = max(values.values(), default=0.0)
+    if largest <= 0:
+        return {module: 0.0 for module in values}
+    return {module: math.sqrt(max(value, 0.0) / largest) for module, value in values.items()}
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Package-level import graph of a Go module for the gomodgraph scripts (see
+gomodgraph.packages.py), e.g. cmd/podman -> pkg/domain/infra -> libpod.
+
+Every .go file of the module is scanned in a process pool, reading it only up to the end of
+its import section (the package clause and import declarations come first in Go files).
+Imports are resolved against the module path from go.mod: packages of the module become
+nodes named by their import path, imports of other modules are mapped to the required
+module (or kept as packages, or dropped) and standard library imports are dropped unless
+asked for.
+
+Scan results are cached per file in .gomodgraph_cache/imports/, keyed by the file's SHA-256
+hash (with size and modification time as a shortcut), so a rescan after a small change only
+parses the changed files.
+
+Usage:
+    graph, report = build_package_graph("path/to/podman", depth=2)
+    G = FilterPipeline(graph).packages(["github.com/containers/podman/v5/pkg"]).materialize()
+"""
+
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from gomodgraph_core import ModuleGraph
+from gomodgraph_gomod import parse_go_mod
+
+IMPORT_CACHE_DIR = os.path.join(".gomodgraph_cache", "imports")
+
+# Directories the go command ignores, besides names starting with "." or "_".
+SKIPPED_DIRS = {"vendor", "testdata"}
+
+
+def _go_tokens(lines):
+    """
+    Yields the tokens of Go source lines lazily: ("string", value) for string literals and
+    ("word", text) for identifiers and punctuation. Comments and semicolons are skipped.
+    """
+    in_comment = False
+    for line in lines:
+        i = 0
+        while i < len(line):
+            if in_comment:
+                end = line.find("*/", i)
+                if end < 0:
+                    break
+                i, in_comment = end + 2, False
+            elif line[i].isspace() or line[i] == ";":
+                i += 1
+            elif line.startswith("//", i):
+                break
+            elif line.startswith("/*", i):
+                i, in_comment = i + 2, True
+            elif line[i] in "\"`":
+                end = line.find(line[i], i + 1)
+                while end > 0 and line[i] == "\"" and line[end - 1] == "\\":
+                    end = line.find(line[i], end + 1)
+                if end < 0:
+                    break
+                yield "string", line[i + 1:end]
+                i = end + 1
+            elif line[i].isalnum() or line[i] == "_":
+                end = i
+                while end < len(line) and (line[end].isalnum() or line[end] == "_"):
+                    end += 1
+                yield "word", line[i:end]
+                i = end
+            else:
+                yield "word", line[i]
+                i += 1
+
+
+def read_imports(path):
+    """
+    Reads the package clause and import declarations of a Go file. The file is read line by
+    line and closed at the first token after the import declarations.
+
+    Returns:
+        (package_name, imports): imports is the list of imported paths in file order
+                                 (package_name is None if the file has no package clause).
+    """
+    imports = []
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        tokens = _go_tokens(f)
+        if next(tokens, None) != ("word", "package"):
+            return None, imports
+        _, package = next(tokens, (None, None))
+        for kind, value in tokens:
+            if (kind, value) != ("word", "import"):
+                break
+            kind, value = next(tokens, (None, None))
+            if value == "(" and kind == "word":
+                for kind, value in tokens:
+                    if kind == "string":
+                        imports.append(value)
+                    elif value == ")":
+                        break
+            else:
+                if kind == "word":
+                    kind, value = next(tokens, (None, None))  # Alias ("_", "." or a name).
+                if kind == "string":
+                    imports.append(value)
+    return package, imports
+
+
+def _file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def scan_files(tasks):
+    """
+    Worker: scans (path, cached_entry) tasks. Files whose hash matches the cached entry are
+    not parsed again.
+
+    Returns:
+        list of (path, entry) with entry = {"size", "mtime", "sha256", "package", "imports"}.
+    """
+    results = []
+    for path, cached in tasks:
+        stat = os.stat(path)
+        digest = _file_digest(path)
+        if cached is not None and cached.get("sha256") == digest:
+            entry = dict(cached, size=stat.st_size, mtime=stat.st_mtime_ns)
+        else:
+            package, imports = read_imports(path)
+            entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "sha256": digest,
+                     "package": package, "imports": imports}
+        results.append((path, entry))
+    return results
+
+
+def find_go_files(root, include_tests=False):
+    """Returns the .go files of the module at root, skipping vendor/, testdata/ and nested modules."""
+    files = []
+    for directory, dirs, names in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if d not in SKIPPED_DIRS and not d.startswith((".", "_"))
+                         and not os.path.isfile(os.path.join(directory, d, "go.mod")))
+        for name in sorted(names):
+            if name.endswith(".go") and (include_tests or not name.endswith("_test.go")):
+                files.append(os.path.join(directory, name))
+    return files
+
+
+def _cache_file(root, cache_dir):
+    key = hashlib.sha256(os.path.abspath(root).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{key}.json")
+
+
+def scan_module(root, include_tests=False, jobs=None, cache_dir=IMPORT_CACHE_DIR, use_cache=True):
+    """
+    Scans all Go files of the module at root in parallel, reusing cached results.
+
+    Returns:
+        entries (dict): Path relative to root -> cache entry (see scan_files).
+        parsed (int): Number of files that were read (not skipped by size and mtime).
+    """
+    cache_file = _cache_file(root, cache_dir)
+    cache = {}
+    if use_cache:
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+
+    entries = {}
+    tasks = []
+    for path in find_go_files(root, include_tests):
+        relative = os.path.relpath(path, root)
+        cached = cache.get(relative)
+        stat = os.stat(path)
+        if cached is not None and cached.get("size") == stat.st_size and cached.get("mtime") == stat.st_mtime_ns:
+            entries[relative] = cached
+        else:
+            tasks.append((path, cached))
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tasks)))
+    chunks = [tasks[i::jobs * 4] for i in range(min(len(tasks), jobs * 4))]
+    if jobs == 1:
+        results = [scan_files(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(scan_files, chunks))
+    for chunk in results:
+        for path, entry in chunk:
+            entries[os.path.relpath(path, root)] = entry
+
+    if use_cache and tasks:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_file, cache_file)
+    return entries, len(tasks)
+
+
+def _collapse(import_path, module_path, depth):
+    """Shortens a package of the module to the module path plus depth path segments."""
+    if depth is None or import_path == module_path:
+        return import_path
+    segments = import_path[len(module_path) + 1:].split("/")
+    return module_path + "/" + "/".join(segments[:depth])
+
+
+def build_package_graph(root, depth=None, external="module", include_std=False, include_tests=False,
+                        jobs=None, use_cache=True):
+    """
+    Builds the package import graph of the Go module at root.
+
+    Parameters:
+        depth: Collapse the module's packages to their first depth path segments
+               (e.g. 2: ".../pkg/domain/infra/abi" -> ".../pkg/domain"), at least 1.
+        external: "module" maps imports of other modules to the required module path,
+                  "package" keeps the imported package, "drop" leaves them out.
+        include_std: Keep standard library imports (as their package path).
+        include_tests: Also scan _test.go files.
+
+    Returns:
+        graph (ModuleGraph): Packages of the module (main packages first), then external nodes.
+        report (dict): "module", "files", "parsed" (files read this run), "packages".
+    """
+    if depth is not None and depth < 1:
+        raise ValueError(f"depth must be at least 1, got {depth}")
+    root = os.path.abspath(root)
+    with open(os.path.join(root, "go.mod"), "r", encoding="utf-8") as f:
+        go_mod = parse_go_mod(f.read())
+    module_path = go_mod["module"]
+    required = sorted((module for module, _, _ in go_mod["require"]), key=len, reverse=True)
+
+    entries, parsed = scan_module(root, include_tests, jobs, use_cache=use_cache)
+
+    # Package import path -> (is main package, imports).
+    packages = {}
+    for relative, entry in entries.items():
+        if entry["package"] is None:
+            continue
+        directory = os.path.dirname(relative).replace(os.sep, "/")
+        import_path = f"{module_path}/{directory}" if directory else module_path
+        is_main, imports = packages.setdefault(import_path, [False, set()])
+        packages[import_path][0] = is_main or entry["package"] == "main"
+        imports.update(entry["imports"])
+
+    def resolve(imported):
+        if imported == module_path or imported.startswith(module_path + "/"):
+            return _collapse(imported, module_path, depth)
+        if "." not in imported.split("/", 1)[0]:
+            return imported if include_std else None
+        if external == "drop":
+            return None
+        if external == "module":
+            for module in required:
+                if imported == module or imported.startswith(module + "/"):
+                    return module
+        return imported
+
+    index = {}
+    intern = index.setdefault
+    # Main packages first, so node 0 is a command like cmd/podman.
+    for import_path in sorted(packages, key=lambda p: (not packages[p][0], p)):
+        intern(_collapse(import_path, module_path, depth), len(index))
+    sources, targets = [], []
+    for import_path, (_, imports) in packages.items():
+        source = index[_collapse(import_path, module_path, depth)]
+        for imported in sorted(imports):
+            target = resolve(imported)
+            if target is None:
+                continue
+            target = intern(target, len(index))
+            if target != source:
+                sources.append(source)
+                targets.append(target)
+
+    graph = ModuleGraph.from_edges(index, sources, targets)
+    report = {"module": module_path, "files": len(entries), "parsed": parsed, "packages": len(packages)}
+    return graph, report
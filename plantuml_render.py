@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+This script renders PlantUML diagrams (e.g. the generated podman_*.puml files) to PNG and/or
+SVG with a pool of long-lived PlantUML processes instead of starting the JVM once per file.
+
+Every worker runs PlantUML in -pipe mode with a delimiter after each image, so one JVM
+renders any number of diagrams and several of them render concurrently on separate cores.
+A diagram is skipped if its content hash and output format match the last render recorded
+in <output-dir>/.render_cache.json and the image still exists, so re-rendering everything
+after a small change only renders the diagrams that changed.
+
+Images are written to <output-dir>/<name>/<name>.<format> like before, or straight into the
+output directory with --flat (which keeps the links between sharded diagrams, see
+gomodgraph.plantuml.py --shard, working). Note that in -pipe mode relative !include paths
+are resolved from the current directory.
+
+Usage:
+    python3 plantuml_render.py [FILE_OR_DIR ...] [--output-dir out] [--format png svg] [--jobs N] [--plantuml CMD] [--flat] [--force]
+Example:
+    python3 plantuml_render.py podman_simplified_v1.puml podman_simplified_v2.puml --format png svg
+    python3 plantuml_render.py shards/ --flat --output-dir out/shards --format svg --plantuml "java -jar plantuml.jar"
+"""
+
+import os
+import sys
+import json
+import glob
+import queue
+import shlex
+import select
+import hashlib
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+DELIMITER = b"___GOMODGRAPH_PLANTUML_END___"
+CACHE_FILE = ".render_cache.json"
+
+
+class DiagramError(RuntimeError):
+    """PlantUML reported an error for a diagram (the process itself is still usable)."""
+
+
+class PlantUMLProcess:
+    """One long-lived PlantUML process in -pipe mode for a single output format."""
+
+    def __init__(self, command, image_format):
+        self.proc = subprocess.Popen(
+            command + ["-pipe", f"-t{image_format}", "-charset", "UTF-8", "-pipedelimitor", DELIMITER.decode("ascii")],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        self.pending = b""
+        self.pending_errors = b""
+        self.errors = []
+
+    def _read_errors(self, timeout=0):
+        """Appends the stderr lines available within timeout seconds to self.errors."""
+        fd = self.proc.stderr.fileno()
+        while select.select([fd], [], [], timeout)[0]:
+            chunk = os.read(fd, 1 << 16)
+            if not chunk:
+                break
+            *lines, self.pending_errors = (self.pending_errors + chunk).split(b"\n")
+            self.errors.extend(line.decode("utf-8", "replace").rstrip() for line in lines)
+            timeout = 0
+
+    def render(self, source, count=1):
+        """
+        Sends one diagram source (bytes) and returns the list of rendered images, one per
+        @start...@end block in the source.
+
+        PlantUML still writes an (error) image for a diagram with a syntax error, but first
+        prints "ERROR", the line number and the message to stderr. stderr is drained while
+        waiting for the images and once more after the last delimiter, which PlantUML
+        writes after the error message, so the error is always seen for its own diagram.
+
+        Raises:
+            DiagramError: PlantUML reported an error for this diagram.
+        """
+        self.proc.stdin.write(source.rstrip(b"\n") + b"\n")
+        self.proc.stdin.flush()
+        first_error = len(self.errors)
+        images = []
+        fd = self.proc.stdout.fileno()
+        while len(images) < count:
+            end = self.pending.find(DELIMITER)
+            if end < 0:
+                # Drain stderr as well, so a chatty diagram can never block the process.
+                readable = select.select([fd, self.proc.stderr.fileno()], [], [])[0]
+                if fd not in readable:
+                    self._read_errors()
+                    continue
+                chunk = os.read(fd, 1 << 16)
+                if not chunk:
+                    self._read_errors()
+                    message = "; ".join(self.errors[-3:]) or f"exit status {self.proc.poll()}"
+                    raise RuntimeError(f"PlantUML stopped: {message}")
+                self.pending += chunk
+                continue
+            images.append(self.pending[:end])
+            # The delimiter is printed on its own line.
+            self.pending = self.pending[end + len(DELIMITER):]
+            if self.pending.startswith(b"\r\n"):
+                self.pending = self.pending[2:]
+            elif self.pending.startswith(b"\n"):
+                self.pending = self.pending[1:]
+        self._read_errors()
+        errors = self.errors[first_error:]
+        if "ERROR" in errors:
+            # "ERROR" is followed by the line number and the message.
+            at = errors.index("ERROR")
+            raise DiagramError(" ".join(line for line in errors[at + 1:at + 3] if line) or "syntax error")
+        return images
+
+    def close(self):
+        self.proc.stdin.close()
+        self.proc.wait()
+
+
+class PlantUMLPool:
+    """
+    A pool of up to size PlantUMLProcess instances per output format, started on first use.
+    Safe to use from several threads: each render borrows a process exclusively.
+    """
+
+    def __init__(self, command, size):
+        self.command = command
+        self.size = size
+        self.idle = {}
+        self.started = {}
+        self.lock = threading.Lock()
+        self.processes = []
+
+    def _acquire(self, image_format):
+        with self.lock:
+            idle = self.idle.setdefault(image_format, queue.Queue())
+            if idle.empty() and self.started.get(image_format, 0) < self.size:
+                self.started[image_format] = self.started.get(image_format, 0) + 1
+                process = PlantUMLProcess(self.command, image_format)
+                self.processes.append(process)
+                return process
+        return idle.get()
+
+    def render(self, source, image_format, count=1):
+        process = self._acquire(image_format)
+        try:
+            images = process.render(source, count)
+        except DiagramError:
+            self.idle[image_format].put(process)
+            raise
+        except Exception:
+            # Do not hand out a broken process again; a new one is started on demand.
+            process.proc.kill()
+            with self.lock:
+                self.started[image_format] -= 1
+            raise
+        self.idle[image_format].put(process)
+        return images
+
+    def close(self):
+        for process in self.processes:
+            if process.proc.poll() is None:
+                process.close()
+
+
+def find_diagrams(paths):
+    """Expands files and directories (searched recursively) into a sorted list of .puml files."""
+    diagrams = set()
+    for path in paths:
+        if os.path.isdir(path):
+            diagrams.update(glob.glob(os.path.join(path, "**", "*.puml"), recursive=True))
+        else:
+            diagrams.add(path)
+    return sorted(diagrams)
+
+
+def output_paths(diagram, image_format, output_dir, flat, count):
+    """Returns the image paths of a diagram, <name>_001.<format> etc. for further blocks."""
+    name = os.path.splitext(os.path.basename(diagram))[0]
+    directory = output_dir if flat else os.path.join(output_dir, name)
+    return [os.path.join(directory, f"{name}.{image_format}" if i == 0 else f"{name}_{i:03d}.{image_format}")
+            for i in range(count)]
+
+
+def load_cache(output_dir):
+    try:
+        with open(os.path.join(output_dir, CACHE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(output_dir, cache):
+    os.makedirs(output_dir, exist_ok=True)
+    cache_file = os.path.join(output_dir, CACHE_FILE)
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(tmp_file, cache_file)
+
+
+def render_diagram(pool, diagram, image_format, output_dir, flat, cache, force):
+    """
+    Renders one diagram in one format unless the cache says it is up to date.
+
+    Returns:
+        (status, paths, digest): status is "rendered" or "skipped".
+
+    Raises:
+        DiagramError: PlantUML reported an error; nothing is written, so the caller must not
+                      record the digest in the cache either.
+    """
+    with open(diagram, "rb") as f:
+        source = f.read()
+    count = max(1, sum(1 for line in source.splitlines() if line.lstrip().startswith(b"@start")))
+    paths = output_paths(diagram, image_format, output_dir, flat, count)
+    digest = hashlib.sha256(image_format.encode("ascii") + b"\0" + source).hexdigest()
+    if not force and all(cache.get(path) == digest and os.path.exists(path) for path in paths):
+        return "skipped", paths, digest
+
+    images = pool.render(source, image_format, count)
+    for path, image in zip(paths, images):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(image)
+    return "rendered", paths, digest
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Render PlantUML diagrams with a pool of long-lived PlantUML processes, skipping unchanged diagrams."
+    )
+    parser.add_argument("inputs", nargs="*", default=None, help="PlantUML files or directories to render (default: *.puml in the current directory)")
+    parser.add_argument("--output-dir", default="out", help="Directory for the rendered images (default: out)")
+    parser.add_argument("--format", nargs="+", choices=["png", "svg"], default=["png"], help="Output formats (default: png)")
+    parser.add_argument("--jobs", type=int, default=None, help="Number of PlantUML processes per format (default: number of CPUs)")
+    parser.add_argument("--plantuml", default="plantuml", help="Command that starts PlantUML (default: 'plantuml', e.g. 'java -jar plantuml.jar')")
+    parser.add_argument("--flat", action="store_true", help="Write all images directly into the output directory")
+    parser.add_argument("--force", action="store_true", help="Render every diagram, even if it is unchanged")
+    args = parser.parse_args()
+
+    diagrams = find_diagrams(args.inputs or glob.glob("*.puml"))
+    if not diagrams:
+        sys.stderr.write("No PlantUML files found\n")
+        sys.exit(1)
+
+    jobs = args.jobs or os.cpu_count() or 1
+    cache = load_cache(args.output_dir)
+    pool = PlantUMLPool(shlex.split(args.plantuml), min(jobs, len(diagrams)))
+    tasks = [(diagram, image_format) for diagram in diagrams for image_format in args.format]
+    rendered = skipped = failed = 0
+    try:
+        with ThreadPoolExecutor(max_workers=min(jobs, len(diagrams)) * len(args.format)) as executor:
+            futures = {executor.submit(render_diagram, pool, diagram, image_format, args.output_dir,
+                                       args.flat, cache, args.force): (diagram, image_format)
+                       for diagram, image_format in tasks}
+            for future, (diagram, image_format) in futures.items():
+                try:
+                    status, paths, digest = future.result()
+                except (OSError, RuntimeError) as e:
+                    sys.stderr.write(f"Error rendering {diagram} ({image_format}): {e}\n")
+                    failed += 1
+                    continue
+                for path in paths:
+                    cache[path] = digest
+                if status == "rendered":
+                    rendered += 1
+                    print(f"Diagram rendered: {', '.join(paths)}")
+                else:
+                    skipped += 1
+    finally:
+        pool.close()
+        save_cache(args.output_dir, cache)
+    print(f"{rendered} rendered, {skipped} unchanged, {failed} failed")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()